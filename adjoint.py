@@ -0,0 +1,192 @@
+"""
+Adjoint (reverse-mode) gradient of a scenario's discounted objective with
+respect to every year's tariffs and subsidies.
+
+The forward pass replays ``simulate.run_scenario_with_maps`` on the array
+engine and keeps, for each year, the equilibrium and its implicit-function
+Jacobians w.r.t. tariffs, subsidies and the supply shifters
+(``solve_static_arrays(..., sensitivities=...)``).  The reverse pass walks
+``SIM_YEARS`` backwards through the year recursion
+
+  equilibrium(gamma_t, tau_t, subsidy_t) -> sales -> R&D -> T_t
+  gamma_{t+1} = gamma_t * (1 + kappa * (T_t / T_{t-1} - 1))
+
+carrying the adjoints of ``gamma`` and ``T``.  The result is the full
+gradient of ``discounted_obj`` for all years and policy instruments at
+about the cost of two forward runs, independent of the number of controls.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+import config
+from calibration import run_full_calibration
+from model_static import pack_params, pack_policy, solve_static_arrays
+from policy import compile_scenario
+from simulate import DEFAULT_DEMAND_GROWTH, DEFAULT_RD_HIT, DEFAULT_TECH_FEEDBACK, _region_chip_array
+
+# Parameters differentiated in every year's equilibrium
+_CONTROLS = ["tau", "subsidy", "gamma"]
+
+
+def _vjp(bar: Dict[str, np.ndarray], sens: Dict[str, Dict[str, np.ndarray]], name: str) -> np.ndarray:
+    """Vector-Jacobian product ``sum_Y <bar_Y, dY/d name>`` over the static outputs."""
+    total = 0.0
+    for field, bar_y in bar.items():
+        bar_y = np.asarray(bar_y)
+        total = total + np.tensordot(bar_y, sens[field][name], axes=bar_y.ndim)
+    return total
+
+
+def scenario_gradient(
+    scenario_name: str,
+    demand_growth_map: Optional[Dict[str, float]] = None,
+    tech_feedback_map: Optional[Dict[str, float]] = None,
+    rd_hit_map: Optional[Dict[str, Dict[str, float]]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    model_params: Optional[config.ModelParams] = None,
+    schedule: Optional[Union[Dict[str, Any], str]] = None,
+) -> Dict[str, Any]:
+    """
+    ``discounted_obj`` of a scenario and its gradient w.r.t. the policy
+    tensors.  Arguments mirror ``simulate.run_scenario_with_maps``;
+    ``schedule`` may also be an already compiled ``{"tau", "subsidy"}`` pair
+    of arrays over ``SIM_YEARS``.
+
+    Returns ``{"years", "discounted_obj", "tau", "subsidy", "gamma",
+    "tech_initial", "converged"}`` where ``tau`` is ``d obj / d tau[year,
+    importer, chip, exporter]`` (own-region entries zero), ``subsidy`` is
+    ``d obj / d subsidy[year, region, chip]`` and ``gamma`` /
+    ``tech_initial`` are gradients w.r.t. the calibrated initial supply
+    shifters and technology levels.  ``converged`` lists the per-year static
+    convergence flags; gradients are only meaningful where all are True.
+    """
+    if params is None:
+        params = run_full_calibration(model_params)
+    mp = params.get("model_params") or config.default_model_params()
+    years = list(config.SIM_YEARS)
+    if schedule is None or not isinstance(schedule, dict) or not isinstance(schedule.get("tau"), np.ndarray):
+        schedule = compile_scenario(scenario_name if schedule is None else schedule, years)
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    us, cn, h = regions.index("US"), regions.index("CN"), chips.index("H")
+    R, S = len(regions), len(chips)
+
+    demand_growth = (demand_growth_map or DEFAULT_DEMAND_GROWTH).get(scenario_name, mp.demand_growth_rate)
+    tech_feedback_scale = (tech_feedback_map or DEFAULT_TECH_FEEDBACK).get(scenario_name, 1.0)
+    kappa = tech_feedback_scale * mp.tech_feedback_supply
+    rd_mult = np.ones((R, S))
+    for chip, mult in (rd_hit_map or DEFAULT_RD_HIT).get(scenario_name, {}).items():
+        rd_mult[us, chips.index(chip)] = mult
+
+    arrs = pack_params(params)
+    rho = _region_chip_array(params["rd_intensity"])
+    phi = np.array([mp.tech_progress_coef[s] for s in chips])
+    eps = arrs["epsilon"]
+    eta = arrs["supply_eta"]
+    cs_weight = np.where(eps > 1, 1.0 / np.where(eps > 1, eps - 1.0, 1.0), 0.0)
+    ps_weight = eta / (eta + 1.0)
+    w_sec = np.array([config.SECURITY_WEIGHTS[s] for s in chips])
+    lam = config.SECURITY_VS_WELFARE
+
+    # ---- forward pass (records what the reverse pass needs) ----
+    gamma = arrs["gamma"].copy()
+    A = arrs["A"].copy()
+    T_prev = _region_chip_array(params["tech_initial"])
+    tape: List[Dict[str, Any]] = []
+    prev_prices = None
+    obj = 0.0
+    for t in range(len(years)):
+        A = A * (1.0 + demand_growth)
+        tau_t, sub_t = pack_policy({"tau": schedule["tau"][t], "subsidy": schedule["subsidy"][t]})
+        year_arrs = dict(arrs, gamma=gamma, A=A)
+        res = solve_static_arrays(year_arrs, tau_t, sub_t, init_prices=prev_prices, sensitivities=_CONTROLS)
+        prev_prices = res["prices"]
+        p, Q, f, C, P = res["prices"], res["Q_prod"], res["Q_trade"], res["consumption"], res["consumption_price"]
+
+        sales = p * Q
+        world = sales.sum(axis=0) + config.EPS
+        T = T_prev * (1.0 + phi * rho * sales / world)
+        saf = 1.0 - f[cn, us] / C[us]
+        gap = np.log((T[us, h] + config.EPS) / (T[cn, h] + config.EPS))
+        nsi = float(w_sec @ saf) + config.TECH_GAP_WEIGHT * gap
+        welfare = (
+            float((cs_weight * C * P).sum())
+            + float((ps_weight * p * Q).sum())
+            + float(res["gov_revenue"])
+            - float((sub_t * Q).sum())
+            - float((rd_mult * rho * sales).sum())
+        )
+        obj += config.DISCOUNT ** t * (welfare + lam * nsi)
+
+        ratio = T / (T_prev + config.EPS)
+        tape.append({
+            "res": res, "sub": sub_t, "sales": sales, "world": world,
+            "T": T, "T_prev": T_prev, "gamma": gamma, "ratio": ratio,
+        })
+        gamma = gamma * (1.0 + kappa * (ratio - 1.0))
+        T_prev = T
+
+    # ---- reverse pass ----
+    grad_tau = np.zeros_like(schedule["tau"], dtype=float)
+    grad_sub = np.zeros_like(schedule["subsidy"], dtype=float)
+    bar_gamma_next = np.zeros((R, S))   # adjoint of gamma_{t+1}
+    bar_T = np.zeros((R, S))            # adjoint of T_t from later years
+    for t in reversed(range(len(years))):
+        rec = tape[t]
+        res, sales, world = rec["res"], rec["sales"], rec["world"]
+        T, T_prev, gamma = rec["T"], rec["T_prev"], rec["gamma"]
+        p, Q, f, C, P = res["prices"], res["Q_prod"], res["Q_trade"], res["consumption"], res["consumption_price"]
+        disc = config.DISCOUNT ** t
+
+        # gamma_{t+1} = gamma_t * (1 + kappa * (T_t / (T_{t-1} + EPS) - 1))
+        bar_gamma = bar_gamma_next * (1.0 + kappa * (rec["ratio"] - 1.0))
+        bar_T = bar_T + bar_gamma_next * gamma * kappa / (T_prev + config.EPS)
+        bar_T_prev = -bar_gamma_next * gamma * kappa * T / (T_prev + config.EPS) ** 2
+
+        # Tech gap in this year's NSI
+        bar_T[us, h] += disc * lam * config.TECH_GAP_WEIGHT / (T[us, h] + config.EPS)
+        bar_T[cn, h] -= disc * lam * config.TECH_GAP_WEIGHT / (T[cn, h] + config.EPS)
+
+        # T_t = T_{t-1} * (1 + phi * rho * sales / world)
+        growth = phi * rho / world
+        bar_T_prev = bar_T_prev + bar_T * (1.0 + growth * sales)
+        weighted = bar_T * T_prev * growth
+        bar_sales = weighted - (weighted * sales).sum(axis=0) / world
+
+        # Objective terms of this year
+        bar_sales = bar_sales - disc * rd_mult * rho
+        bar = {
+            "prices": disc * ps_weight * Q + bar_sales * Q,
+            "Q_prod": disc * (ps_weight * p - rec["sub"]) + bar_sales * p,
+            "Q_trade": np.zeros_like(f),
+            "consumption": disc * cs_weight * P,
+            "consumption_price": disc * cs_weight * C,
+            "gov_revenue": np.asarray(disc),
+        }
+        bar["Q_trade"][cn, us] = -disc * lam * w_sec / C[us]
+        bar["consumption"][us] += disc * lam * w_sec * f[cn, us] / C[us] ** 2
+
+        sens = res["sensitivities"]
+        grad_sub[t] = _vjp(bar, sens, "subsidy") - disc * Q
+        # trade layout (origin, dest, chip) -> schedule layout (importer, chip, exporter)
+        grad_tau[t] = np.transpose(_vjp(bar, sens, "tau"), (1, 2, 0))
+        bar_gamma_next = bar_gamma + _vjp(bar, sens, "gamma")
+        bar_T = bar_T_prev
+
+    own = np.arange(R)
+    grad_tau[:, own, :, own] = 0.0
+    return {
+        "years": np.array(years),
+        "discounted_obj": obj,
+        "tau": grad_tau,
+        "subsidy": grad_sub,
+        "gamma": bar_gamma_next,
+        "tech_initial": bar_T,
+        "converged": [rec["res"]["converged"] for rec in tape],
+    }
+
+
+__all__ = ["scenario_gradient"]
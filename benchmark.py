@@ -0,0 +1,419 @@
+"""
+Benchmark suite for the solver and simulation pipeline.
+
+Layers:
+  - micro: array-engine kernels (``_ces_consumption_price``,
+    ``_allocate_armington``) and a single static solve;
+  - meso: calibration (cold, re-parsing the workbooks, and from the disk
+    cache) and one dynamic scenario;
+  - macro: ``run_all_scenarios`` and the elasticity/phi sensitivity sweep;
+  - synthetic: generated problems with more regions and chip types than
+    ``config.REGIONS`` / ``config.CHIP_TYPES``, solved through the array engine.
+
+Usage:
+  python benchmark.py run [--layer micro synthetic] [--filter solve] [--output out.json]
+  python benchmark.py compare base.json new.json [--threshold 0.10]
+
+``run`` writes machine-readable JSON (default
+``results/benchmarks/bench_<timestamp>.json``).  ``compare`` prints the
+ratio new/base per benchmark and exits with status 1 when any benchmark is
+slower than ``1 + threshold`` times its baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+BENCH_DIR = config.PROJECT_ROOT / "results" / "benchmarks"
+BENCH_FORMAT = 1
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+
+SYNTHETIC_SIZES: List[Tuple[int, int]] = [(3, 3), (10, 5), (30, 10), (100, 20)]
+SYNTHETIC_BATCH = (20, 10, 32)  # (regions, chips, batch members)
+
+ELASTICITY_CASES = {
+    "high_sigma_low_phi": {"sigma_scale": 1.2, "phi_scale": 0.8},
+    "low_sigma_high_phi": {"sigma_scale": 0.8, "phi_scale": 1.2},
+}
+
+# A setup function returns (callable to time, info recorded with the result)
+Setup = Callable[[], Tuple[Callable[[], Any], Dict[str, Any]]]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic problems
+# ---------------------------------------------------------------------------
+
+def synthetic_problem(
+    n_regions: int,
+    n_chips: int,
+    seed: int = 0,
+    max_tariff: float = 0.3,
+) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Random well-posed static problem in array form: ``(arrs, tau, subsidy)``
+    as accepted by ``model_static.solve_static_arrays``.
+
+    Armington weights sum to one per (destination, chip) and supply shifters
+    are set so that unit prices clear every market without tariffs; random
+    off-diagonal tariffs up to ``max_tariff`` then move the equilibrium away
+    from the starting point.
+    """
+    rng = np.random.default_rng(seed)
+    R, S = n_regions, n_chips
+    home = np.eye(R)[:, :, None]
+    beta = rng.gamma(1.0, 1.0, size=(R, R, S)) * (1.0 + 3.0 * home)
+    beta /= beta.sum(axis=0, keepdims=True)
+    A = rng.lognormal(0.0, 1.0, size=(R, S))
+    arrs = {
+        "beta": beta,
+        "sigma": rng.uniform(2.0, 5.0, size=S),
+        "A": A,
+        "epsilon": rng.uniform(0.5, 1.5, size=(R, S)),
+        # exports at unit prices: sum_j beta[i, j, s] * A[j, s]
+        "gamma": np.einsum("ijs,js->is", beta, A),
+        "supply_eta": rng.uniform(0.5, 2.0, size=(R, S)),
+        "base_price": np.ones(S),
+    }
+    tau = rng.uniform(0.0, max_tariff, size=(R, R, S)) * (1.0 - home)
+    subsidy = np.zeros((R, S))
+    return arrs, tau, subsidy
+
+
+# ---------------------------------------------------------------------------
+# Benchmark definitions
+# ---------------------------------------------------------------------------
+
+def _calibrated_arrays() -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    from calibration import run_full_calibration
+    from model_static import pack_params, pack_policy
+    from policy import compile_scenario
+
+    schedule = compile_scenario("tariff_only")
+    tau, subsidy = pack_policy({"tau": schedule["tau"][0], "subsidy": schedule["subsidy"][0]})
+    return pack_params(run_full_calibration()), tau, subsidy
+
+
+def _setup_kernel(kernel: str) -> Setup:
+    def setup():
+        from model_static import _allocate_armington, _ces_consumption_price, _prices_with_tariff, solve_static_arrays
+
+        arrs, tau, subsidy = _calibrated_arrays()
+        res = solve_static_arrays(arrs, tau, subsidy)
+        prices_tau = _prices_with_tariff(res["prices"], tau)
+        if kernel == "ces_consumption_price":
+            return (lambda: _ces_consumption_price(arrs["beta"], arrs["sigma"], prices_tau)), {}
+        Q_cons = res["consumption"]
+        return (lambda: _allocate_armington(arrs["beta"], arrs["sigma"], Q_cons, prices_tau)), {}
+
+    return setup
+
+
+def _setup_static_solve(solver: str) -> Setup:
+    def setup():
+        from model_static import solve_static_arrays
+
+        arrs, tau, subsidy = _calibrated_arrays()
+        res = solve_static_arrays(arrs, tau, subsidy, solver=solver)
+        info = {"iterations": res["iterations"], "converged": res["converged"], "solver": res["solver"]}
+        return (lambda: solve_static_arrays(arrs, tau, subsidy, solver=solver)), info
+
+    return setup
+
+
+def _setup_static_solve_dict():
+    from calibration import run_full_calibration
+    from model_static import solve_static_equilibrium
+    from policy import scenario_policy
+
+    params = run_full_calibration()
+    policy_t = scenario_policy("tariff_only", config.SIM_YEARS[0])
+    return (lambda: solve_static_equilibrium(params, policy_t, use_cache=False)), {}
+
+
+def _fresh_memo(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Time ``fn`` as a fresh run: the static-solve memo is emptied before each call."""
+    from model_static import static_cache_clear
+
+    def run():
+        static_cache_clear()
+        return fn()
+
+    return run
+
+
+def _setup_calibration_cold():
+    import tempfile
+
+    import data_loader
+    from calibration import run_full_calibration
+
+    excel_cache_dir = data_loader.EXCEL_CACHE_DIR
+
+    def run():
+        # Empty Excel cache as well, so the workbooks are parsed again
+        with tempfile.TemporaryDirectory() as tmp:
+            data_loader.EXCEL_CACHE_DIR = Path(tmp)
+            try:
+                return run_full_calibration(use_cache=False)
+            finally:
+                data_loader.EXCEL_CACHE_DIR = excel_cache_dir
+
+    return run, {}
+
+
+def _setup_calibration_disk():
+    import calibration
+
+    calibration.run_full_calibration()  # make sure the disk entry exists
+
+    def run():
+        calibration._CALIBRATION_MEMO.clear()
+        return calibration.run_full_calibration()
+
+    return run, {}
+
+
+def _setup_scenario():
+    from calibration import run_full_calibration
+    from simulate import run_scenario_with_maps
+
+    params = run_full_calibration()
+    return _fresh_memo(lambda: run_scenario_with_maps("tariff_only", None, None, None, params=params)), {"scenario": "tariff_only"}
+
+
+def _setup_all_scenarios():
+    from calibration import run_full_calibration
+    from simulate import run_all_scenarios
+
+    run_full_calibration()
+    return _fresh_memo(lambda: run_all_scenarios(workers=1)), {"workers": 1}
+
+
+def _setup_elasticity_sweep():
+    from simulate import run_elasticity_phi_sensitivity
+
+    run_elasticity_phi_sensitivity(ELASTICITY_CASES, workers=1)  # calibrate each case once
+    return _fresh_memo(lambda: run_elasticity_phi_sensitivity(ELASTICITY_CASES, workers=1)), {"cases": list(ELASTICITY_CASES), "workers": 1}
+
+
+def _setup_synthetic(n_regions: int, n_chips: int) -> Setup:
+    def setup():
+        from model_static import solve_static_arrays
+
+        arrs, tau, subsidy = synthetic_problem(n_regions, n_chips)
+        res = solve_static_arrays(arrs, tau, subsidy)
+        info = {
+            "regions": n_regions,
+            "chips": n_chips,
+            "iterations": res["iterations"],
+            "converged": res["converged"],
+            "solver": res["solver"],
+        }
+        return (lambda: solve_static_arrays(arrs, tau, subsidy)), info
+
+    return setup
+
+
+def _setup_synthetic_batch():
+    from model_static import solve_static_batch, stack_params
+
+    n_regions, n_chips, K = SYNTHETIC_BATCH
+    problems = [synthetic_problem(n_regions, n_chips, seed=k) for k in range(K)]
+    arrs = stack_params([p[0] for p in problems])
+    tau = np.stack([p[1] for p in problems])
+    subsidy = np.stack([p[2] for p in problems])
+    res = solve_static_batch(arrs, tau, subsidy)
+    info = {
+        "regions": n_regions,
+        "chips": n_chips,
+        "batch": K,
+        "max_iterations": int(res["iterations"].max()),
+        "converged": bool(res["converged"].all()),
+    }
+    return (lambda: solve_static_batch(arrs, tau, subsidy)), info
+
+
+# name -> {"layer", "setup", "number"}; number=None auto-ranges the loop count
+BENCHMARKS: Dict[str, Dict[str, Any]] = {
+    "micro.ces_consumption_price": {"layer": "micro", "setup": _setup_kernel("ces_consumption_price"), "number": None},
+    "micro.allocate_armington": {"layer": "micro", "setup": _setup_kernel("allocate_armington"), "number": None},
+    "micro.static_solve_newton": {"layer": "micro", "setup": _setup_static_solve("newton"), "number": None},
+    "micro.static_solve_tatonnement": {"layer": "micro", "setup": _setup_static_solve("tatonnement"), "number": None},
+    "micro.static_solve_dict": {"layer": "micro", "setup": _setup_static_solve_dict, "number": None},
+    "meso.calibration_cold": {"layer": "meso", "setup": _setup_calibration_cold, "number": 1},
+    "meso.calibration_disk_cache": {"layer": "meso", "setup": _setup_calibration_disk, "number": None},
+    "meso.scenario_tariff_only": {"layer": "meso", "setup": _setup_scenario, "number": None},
+    "macro.run_all_scenarios": {"layer": "macro", "setup": _setup_all_scenarios, "number": 1},
+    "macro.elasticity_phi_sweep": {"layer": "macro", "setup": _setup_elasticity_sweep, "number": 1},
+}
+for _R, _S in SYNTHETIC_SIZES:
+    BENCHMARKS[f"synthetic.solve_R{_R}_S{_S}"] = {"layer": "synthetic", "setup": _setup_synthetic(_R, _S), "number": None}
+BENCHMARKS["synthetic.batch_R{}_S{}_K{}".format(*SYNTHETIC_BATCH)] = {
+    "layer": "synthetic",
+    "setup": _setup_synthetic_batch,
+    "number": None,
+}
+
+LAYERS = ["micro", "meso", "macro", "synthetic"]
+
+
+# ---------------------------------------------------------------------------
+# Running and comparing
+# ---------------------------------------------------------------------------
+
+def _time_benchmark(spec: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    func, info = spec["setup"]()
+    timer = timeit.Timer(func)
+    number = spec["number"]
+    if number is None:
+        number, _ = timer.autorange()  # loops taking at least 0.2 s
+    per_call = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return {
+        "layer": spec["layer"],
+        "number": number,
+        "repeat": repeat,
+        "min_s": float(per_call.min()),
+        "median_s": float(np.median(per_call)),
+        "mean_s": float(per_call.mean()),
+        "std_s": float(per_call.std()),
+        "info": info,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=config.PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_benchmarks(
+    layers: Optional[List[str]] = None,
+    name_filter: Optional[str] = None,
+    repeat: int = DEFAULT_REPEAT,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run the selected benchmarks and return the JSON-ready report
+    ``{"format", "meta", "results": {name: timings}}``; times are per call.
+    """
+    layers = layers or LAYERS
+    results: Dict[str, Any] = {}
+    for name, spec in BENCHMARKS.items():
+        if spec["layer"] not in layers or (name_filter and name_filter not in name):
+            continue
+        results[name] = _time_benchmark(spec, repeat)
+        if verbose:
+            r = results[name]
+            print(f"{name:<40} median {r['median_s'] * 1e3:12.4f} ms  (min {r['min_s'] * 1e3:.4f} ms, n={r['number']}x{r['repeat']})")
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "regions": list(config.REGIONS),
+        "chips": list(config.CHIP_TYPES),
+    }
+    return {"format": BENCH_FORMAT, "meta": meta, "results": results}
+
+
+def compare_reports(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    metric: str = "median_s",
+) -> List[Dict[str, Any]]:
+    """
+    Compare two reports benchmark by benchmark.  Each row has ``status``
+    "regression" (ratio > 1 + threshold), "improvement" (ratio < 1 -
+    threshold), "ok", or "missing" when only one report has the benchmark.
+    """
+    rows = []
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        b, n = base["results"].get(name), new["results"].get(name)
+        if b is None or n is None:
+            rows.append({"name": name, "base": b and b[metric], "new": n and n[metric], "ratio": None, "status": "missing"})
+            continue
+        ratio = n[metric] / b[metric] if b[metric] > 0 else float("inf")
+        if ratio > 1.0 + threshold:
+            status = "regression"
+        elif ratio < 1.0 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": name, "base": b[metric], "new": n[metric], "ratio": ratio, "status": status})
+    return rows
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1e3:.4f}"
+
+
+def _cmd_run(args: argparse.Namespace) -> int:
+    report = run_benchmarks(args.layer, args.filter, args.repeat)
+    out = Path(args.output) if args.output else BENCH_DIR / f"bench_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Benchmark results saved to: {out}")
+    return 0
+
+
+def _cmd_compare(args: argparse.Namespace) -> int:
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    rows = compare_reports(base, new, args.threshold, args.metric)
+    print(f"{'benchmark':<40} {'base ms':>12} {'new ms':>12} {'ratio':>8}  status")
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.3f}"
+        print(f"{row['name']:<40} {_format_ms(row['base']):>12} {_format_ms(row['new']):>12} {ratio:>8}  {row['status']}")
+    n_reg = sum(row["status"] == "regression" for row in rows)
+    print(f"{n_reg} regression(s) at threshold {args.threshold:.0%} on {args.metric}")
+    return 1 if n_reg else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Solver and simulation benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="run benchmarks and write a JSON report")
+    run_p.add_argument("--layer", nargs="+", choices=LAYERS, help="layers to run (default: all)")
+    run_p.add_argument("--filter", help="only run benchmarks whose name contains this string")
+    run_p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timing repeats per benchmark")
+    run_p.add_argument("--output", help="output JSON path")
+    run_p.set_defaults(func=_cmd_run)
+
+    cmp_p = sub.add_parser("compare", help="compare two JSON reports and flag regressions")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative slowdown flagged as regression")
+    cmp_p.add_argument("--metric", default="median_s", choices=["min_s", "median_s", "mean_s"])
+    cmp_p.set_defaults(func=_cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+__all__ = ["BENCHMARKS", "synthetic_problem", "run_benchmarks", "compare_reports"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
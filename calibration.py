@@ -7,16 +7,44 @@ to reasonable defaults encoded in ``config``.
 
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
+import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
 
 import config
 from classification import (
+    build_trade_inputs_by_year,
     construct_us_region_flows,
     compute_alpha_and_asp_from_value_qty,
     compute_partner_flows_and_asp,
 )
-from model_static import solve_static_equilibrium
-from data_loader import preprocess_all
+from model_static import LRUCache, pack_params, solve_static_batch, solve_static_equilibrium, stack_params
+from data_loader import (
+    CLEANED_PANEL_FILES,
+    find_ipg_path,
+    load_dataweb_partner_value_qty,
+    load_dataweb_value_qty,
+    preprocess_all,
+)
+
+# Bump when the calibration logic changes so stale disk artifacts are ignored.
+CALIBRATION_VERSION = 1
+CALIBRATION_CACHE_DIR = config.CACHE_DIR / "calibration"
+
+# ModelParams fields the calibration reads; the others (tech progress, tech
+# feedback, demand growth) are attached afterwards and do not enter the key
+CALIBRATION_PARAM_FIELDS = ("sigma", "epsilon", "supply_eta", "rd_intensity", "tech_initial")
+
+# In-process LRU memo: key -> calibrated parameter dict
+_CALIBRATION_MEMO = LRUCache(config.CALIBRATION_MEMO_SIZE)
+# (path, mtime_ns, size) -> sha256 so unchanged inputs are not re-read
+_FILE_DIGESTS: Dict[Tuple[str, int, int], str] = {}
 
 
 def calibrate_armington_shares(flows: Dict[Tuple[str, str, str], float]) -> Dict[Tuple[str, str, str], float]:
@@ -44,19 +72,16 @@ def calibrate_armington_shares(flows: Dict[Tuple[str, str, str], float]) -> Dict
     return beta
 
 
-def calibrate_supply_and_demand(flows: Dict[Tuple[str, str, str], float], ipg_annual: Dict[int, float], beta: Dict[Tuple[str, str, str], float]) -> Dict[str, Any]:
+def _supply_demand_targets(
+    flows: Dict[Tuple[str, str, str], float],
+    ipg_val: Optional[float],
+    P_base_map: Dict[str, float],
+    mp: config.ModelParams,
+) -> Dict[str, Any]:
+    """
+    Initial gamma/A from trade flows and base prices, plus the production
+    and consumption targets the refinement pass scales toward.
     """
-    Calibrate supply shifters gamma and demand scales A using trade flows as
-    rough anchors. Prices are taken from ASP if available, then refined by
-    running one static equilibrium pass to scale gamma/A toward observed 2023
-    production/consumption.
-    """
-    partner_res = compute_partner_flows_and_asp(config.BASE_YEAR)
-    if partner_res:
-        _, _, asp = partner_res
-    else:
-        _, asp = compute_alpha_and_asp_from_value_qty()
-    P_base_map = asp
     gamma: Dict[Tuple[str, str], float] = {}
     demand_A: Dict[Tuple[str, str], float] = {}
     production_guess: Dict[Tuple[str, str], float] = {}
@@ -71,7 +96,6 @@ def calibrate_supply_and_demand(flows: Dict[Tuple[str, str, str], float], ipg_an
             production_guess[(i, s)] = base
 
     # If IPG index is available, scale US production by annual mean (relative to 100)
-    ipg_val = ipg_annual.get(config.BASE_YEAR)
     if ipg_val:
         scale = ipg_val / 100.0
         for s in config.CHIP_TYPES:
@@ -80,7 +104,7 @@ def calibrate_supply_and_demand(flows: Dict[Tuple[str, str, str], float], ipg_an
     for i in config.REGIONS:
         for s in config.CHIP_TYPES:
             Q_prod = production_guess[(i, s)]
-            eta = config.DEFAULT_SUPPLY_ELASTICITY[i][s]
+            eta = mp.supply_eta[i][s]
             gamma[(i, s)] = Q_prod / ((P_base_map.get(s, 1.0)) ** eta)
 
     # target consumption at base year (domestic use + imports)
@@ -95,24 +119,36 @@ def calibrate_supply_and_demand(flows: Dict[Tuple[str, str, str], float], ipg_an
             if cons <= 0:
                 cons = max(prod_j, 1.0)
             target_cons[(j, s)] = cons
-            eps = config.DEFAULT_EPSILON[j][s]
+            eps = mp.epsilon[j][s]
             demand_A[(j, s)] = cons / ((P_base_map.get(s, 1.0)) ** (-eps))
 
-    # One refinement pass: run static equilibrium and scale gamma/A toward targets
-    params = {
-        "beta": beta,
-        "sigma": config.DEFAULT_SIGMA,
-        "A": demand_A,
-        "epsilon": config.DEFAULT_EPSILON,
+    return {
         "gamma": gamma,
-        "supply_eta": config.DEFAULT_SUPPLY_ELASTICITY,
+        "demand_A": demand_A,
+        "production_guess": production_guess,
+        "target_cons": target_cons,
         "base_price": P_base_map,
     }
-    base_policy = {"tau": {}, "subsidy": {}}
-    result = solve_static_equilibrium(params, base_policy, max_iter=150, tol=1e-5)
+
+
+def _refinement_params(beta: Dict[Tuple[str, str, str], float], sd: Dict[str, Any], mp: config.ModelParams) -> Dict[str, Any]:
+    return {
+        "beta": beta,
+        "sigma": mp.sigma,
+        "A": sd["demand_A"],
+        "epsilon": mp.epsilon,
+        "gamma": sd["gamma"],
+        "supply_eta": mp.supply_eta,
+        "base_price": sd["base_price"],
+    }
+
+
+def _scale_to_targets(sd: Dict[str, Any], Q_prod_model: Dict[Tuple[str, str], float], Q_cons_model: Dict[Tuple[str, str], float]) -> Dict[str, Any]:
+    """Scale gamma/A in ``sd`` so the equilibrium hits the production/consumption targets."""
+    gamma, demand_A = sd["gamma"], sd["demand_A"]
+    production_guess, target_cons = sd["production_guess"], sd["target_cons"]
 
     # Scale supply to match observed production_guess
-    Q_prod_model = result["Q_prod"]
     for i in config.REGIONS:
         for s in config.CHIP_TYPES:
             model_q = Q_prod_model.get((i, s), 1.0)
@@ -121,7 +157,6 @@ def calibrate_supply_and_demand(flows: Dict[Tuple[str, str, str], float], ipg_an
                 gamma[(i, s)] *= target_q / model_q
 
     # Scale demand A to match target consumption
-    Q_cons_model = result["consumption"]
     for j in config.REGIONS:
         for s in config.CHIP_TYPES:
             model_c = Q_cons_model.get((j, s), 1.0)
@@ -129,34 +164,76 @@ def calibrate_supply_and_demand(flows: Dict[Tuple[str, str, str], float], ipg_an
             if model_c > 0:
                 demand_A[(j, s)] *= target_c / model_c
 
-    return {"gamma": gamma, "demand_A": demand_A, "production_guess": production_guess, "base_price": P_base_map}
+    return {"gamma": gamma, "demand_A": demand_A, "production_guess": production_guess, "base_price": sd["base_price"]}
+
+
+def calibrate_supply_and_demand(
+    flows: Dict[Tuple[str, str, str], float],
+    ipg_annual: Dict[int, float],
+    beta: Dict[Tuple[str, str, str], float],
+    model_params: Optional[config.ModelParams] = None,
+    base_year: int = config.BASE_YEAR,
+    asp: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Calibrate supply shifters gamma and demand scales A using trade flows as
+    rough anchors. Prices are taken from ASP if available (``asp``, else read
+    for ``base_year``), then refined by running one static equilibrium pass
+    to scale gamma/A toward observed base-year production/consumption.
+    """
+    mp = model_params or config.default_model_params()
+    if asp is None:
+        partner_res = compute_partner_flows_and_asp(base_year)
+        if partner_res:
+            _, _, asp = partner_res
+        else:
+            _, asp = compute_alpha_and_asp_from_value_qty(base_year)
+    sd = _supply_demand_targets(flows, ipg_annual.get(base_year), asp, mp)
+
+    # One refinement pass: run static equilibrium and scale gamma/A toward targets
+    base_policy = {"tau": {}, "subsidy": {}}
+    result = solve_static_equilibrium(_refinement_params(beta, sd, mp), base_policy, max_iter=150, tol=1e-5)
+    return _scale_to_targets(sd, result["Q_prod"], result["consumption"])
 
 
-def calibrate_rd_and_tech(production_guess: Dict[Tuple[str, str], float]) -> Dict[str, Any]:
+def calibrate_rd_and_tech(production_guess: Dict[Tuple[str, str], float], model_params: Optional[config.ModelParams] = None) -> Dict[str, Any]:
     """
     Initialise R&D spending and technology levels at the base year.
     """
+    mp = model_params or config.default_model_params()
     RD: Dict[Tuple[str, str], float] = {}
     T: Dict[Tuple[str, str], float] = {}
     for i in config.REGIONS:
         for s in config.CHIP_TYPES:
             sales = production_guess.get((i, s), 1.0)
-            rho = config.DEFAULT_RD_INTENSITY[i][s]
+            rho = mp.rd_intensity[i][s]
             RD[(i, s)] = rho * sales
-            T[(i, s)] = config.TECH_INITIAL_LEVEL[i][s]
+            T[(i, s)] = mp.tech_initial[i][s]
     return {"RD": RD, "T": T}
 
 
-def run_full_calibration() -> Dict[str, Any]:
+def _behavioural_params(mp: config.ModelParams) -> Dict[str, Any]:
+    """Plain-dict copies of the ``ModelParams`` blocks the model reads."""
+    plain = mp.to_dict()
+    return {
+        "sigma": plain["sigma"],
+        "epsilon": plain["epsilon"],
+        "supply_eta": plain["supply_eta"],
+        "rd_intensity": plain["rd_intensity"],
+        "model_params": mp,
+    }
+
+
+def _calibrate_from_data(mp: config.ModelParams) -> Dict[str, Any]:
     """
-    Convenience wrapper to build all calibration pieces.
+    Build all calibration pieces from the data files (uncached).
     """
     data = preprocess_all()
     ipg_annual = data.get("ipg_annual", {})
     flows = construct_us_region_flows()
     beta = calibrate_armington_shares(flows)
-    sd = calibrate_supply_and_demand(flows, ipg_annual, beta)
-    rd_tech = calibrate_rd_and_tech(sd["production_guess"])
+    sd = calibrate_supply_and_demand(flows, ipg_annual, beta, mp)
+    rd_tech = calibrate_rd_and_tech(sd["production_guess"], mp)
 
     return {
         "beta": beta,
@@ -165,12 +242,552 @@ def run_full_calibration() -> Dict[str, Any]:
         "production_guess": sd["production_guess"],
         "rd_initial": rd_tech["RD"],
         "tech_initial": rd_tech["T"],
-        "sigma": config.DEFAULT_SIGMA,
-        "epsilon": config.DEFAULT_EPSILON,
-        "supply_eta": config.DEFAULT_SUPPLY_ELASTICITY,
-        "rd_intensity": config.DEFAULT_RD_INTENSITY,
+        **_behavioural_params(mp),
         "base_price": sd.get("base_price", {"H": 1.0, "M": 1.0, "L": 1.0}),
     }
 
 
-__all__ = ["run_full_calibration"]
+def _refine_batch(cases: List[Tuple[Dict[Tuple[str, str, str], float], Dict[str, Any], config.ModelParams]]) -> List[Dict[str, Any]]:
+    """
+    Finish calibrations given ``(beta, supply/demand targets, model params)``
+    cases: the refinement equilibria of all cases run as one batched solve
+    (no tariffs, no subsidies).  Returns ``run_full_calibration``-layout dicts
+    in case order.
+    """
+    arrs = stack_params([pack_params(_refinement_params(beta, sd, mp)) for beta, sd, mp in cases])
+    K, R, S = len(cases), len(config.REGIONS), len(config.CHIP_TYPES)
+    res = solve_static_batch(arrs, np.zeros((K, R, R, S)), np.zeros((K, R, S)), max_iter=150, tol=1e-5)
+
+    def member(arr: np.ndarray, k: int) -> Dict[Tuple[str, str], float]:
+        return {(i, s): float(arr[k, a, b]) for a, i in enumerate(config.REGIONS) for b, s in enumerate(config.CHIP_TYPES)}
+
+    out = []
+    for k, (beta, sd, mp) in enumerate(cases):
+        sd = _scale_to_targets(sd, member(res["Q_prod"], k), member(res["consumption"], k))
+        rd_tech = calibrate_rd_and_tech(sd["production_guess"], mp)
+        out.append({
+            "beta": beta,
+            "gamma": sd["gamma"],
+            "A": sd["demand_A"],
+            "production_guess": sd["production_guess"],
+            "rd_initial": rd_tech["RD"],
+            "tech_initial": rd_tech["T"],
+            **_behavioural_params(mp),
+            "base_price": sd["base_price"],
+        })
+    return out
+
+
+def run_calibration_by_year(
+    years: Optional[Iterable[int]] = None,
+    model_params: Optional[config.ModelParams] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Calibrate every year in ``years`` (default ``config.HIST_YEARS``) as if it
+    were the base year, reading the DataWeb/IPG sources once and running the
+    refinement equilibria of all years as one batched solve.
+
+    Returns ``{year: params}``; each entry has the ``run_full_calibration``
+    layout plus that year's ``alpha``, ``flows`` and consumption targets
+    (``target_cons``).  Not cached.
+    """
+    mp = model_params or config.default_model_params()
+    years = list(config.HIST_YEARS if years is None else years)
+    data = preprocess_all()
+    ipg_annual = data.get("ipg_annual", {})
+    inputs = build_trade_inputs_by_year(years, cleaned=data["clean"])
+
+    cases = []
+    for year in years:
+        flows = inputs[year]["flows"]
+        sd = _supply_demand_targets(flows, ipg_annual.get(year), inputs[year]["asp"], mp)
+        cases.append((calibrate_armington_shares(flows), sd, mp))
+
+    out: Dict[int, Dict[str, Any]] = {}
+    for year, (_, sd, _), params in zip(years, cases, _refine_batch(cases)):
+        params["alpha"] = inputs[year]["alpha"]
+        params["flows"] = inputs[year]["flows"]
+        params["target_cons"] = sd["target_cons"]
+        out[year] = params
+    return out
+
+
+def run_calibration_batch(
+    model_params_list: Sequence[config.ModelParams],
+    base_year: int = config.BASE_YEAR,
+) -> List[Dict[str, Any]]:
+    """
+    Calibrate ``base_year`` under each parameter set in ``model_params_list``
+    (e.g. the samples of a sensitivity design).  The data sources are read
+    once and all refinement equilibria run as one batched solve; each result
+    matches ``run_full_calibration(model_params)``.  Not cached.
+    """
+    data = preprocess_all()
+    ipg_val = data.get("ipg_annual", {}).get(base_year)
+    inputs = build_trade_inputs_by_year([base_year], cleaned=data["clean"])[base_year]
+    beta = calibrate_armington_shares(inputs["flows"])
+    cases = [
+        (beta, _supply_demand_targets(inputs["flows"], ipg_val, inputs["asp"], mp), mp)
+        for mp in model_params_list
+    ]
+    return _refine_batch(cases) if cases else []
+
+
+# ---------------------------------------------------------------------------
+# Moment-matching fit
+# ---------------------------------------------------------------------------
+
+# Weight per moment on squared log deviations, by moment group
+MOMENT_WEIGHTS: Dict[str, float] = {"production": 1.0, "consumption": 1.0, "prices": 1.0, "flows": 1.0}
+MOMENT_GROUPS = ["production", "consumption", "prices", "flows"]
+# Elasticities that may be fitted (shared across years), with their transforms
+FIT_ELASTICITIES = ["sigma", "epsilon", "supply_eta"]
+
+
+def _observed_moments(by_year: Dict[int, Dict[str, Any]], years: List[int]) -> Dict[str, np.ndarray]:
+    """Observed moments stacked by year: ``(Y, R, S)``, flows ``(Y, R, R, S)``; zero = unobserved."""
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+
+    def region_chip(d: Dict[Tuple[str, str], float]) -> List[List[float]]:
+        return [[d[(i, s)] for s in chips] for i in regions]
+
+    flows = [
+        [[[by_year[y]["flows"].get((i, j, s), 0.0) if i != j else 0.0 for s in chips] for j in regions] for i in regions]
+        for y in years
+    ]
+    return {
+        "production": np.array([region_chip(by_year[y]["production_guess"]) for y in years], dtype=float),
+        "consumption": np.array([region_chip(by_year[y]["target_cons"]) for y in years], dtype=float),
+        "prices": np.array([[[by_year[y]["base_price"][s] for s in chips] for _ in regions] for y in years], dtype=float),
+        "flows": np.array(flows, dtype=float),
+    }
+
+
+def _log_deviations(res: Dict[str, np.ndarray], observed: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """log(model / observed) per group, zero where unobserved; ``res`` fields are ``(C, Y, ...)``."""
+    model = {
+        "production": res["Q_prod"],
+        "consumption": res["consumption"],
+        "prices": res["prices"],
+        "flows": res["Q_trade"],
+    }
+    out = {}
+    for group in MOMENT_GROUPS:
+        obs = observed[group]
+        mask = obs > 0
+        dev = np.log(np.maximum(model[group], 1e-300)) - np.log(np.where(mask, obs, 1.0))
+        out[group] = np.where(mask, dev, 0.0)
+    return out
+
+
+class _MomentProblem:
+    """
+    Parameter vector <-> batched equilibria for the moment fit.
+
+    theta = [log gamma, log A] per year (local block, ``(Y, 2, R, S)``) followed
+    by the shared elasticity blocks: log(sigma - 1) ``(S,)``, log epsilon and
+    log supply_eta ``(R, S)``.
+    """
+
+    def __init__(
+        self,
+        by_year: Dict[int, Dict[str, Any]],
+        years: List[int],
+        weights: Dict[str, float],
+        elasticities: List[str],
+        prior_weight: float,
+    ) -> None:
+        self.years = years
+        self.Y = len(years)
+        self.R, self.S = len(config.REGIONS), len(config.CHIP_TYPES)
+        self.L = 2 * self.R * self.S
+        packed = [pack_params(by_year[y]) for y in years]
+        self.base = stack_params(packed)
+        self.observed = _observed_moments(by_year, years)
+        self.weights = {g: np.sqrt(weights.get(g, 0.0)) for g in MOMENT_GROUPS}
+        self.elasticities = list(elasticities)
+        shared0 = {
+            "sigma": np.log(packed[0]["sigma"] - 1.0),
+            "epsilon": np.log(packed[0]["epsilon"]),
+            "supply_eta": np.log(packed[0]["supply_eta"]),
+        }
+        self.shapes = {name: shared0[name].shape for name in self.elasticities}
+        local0 = np.log(np.stack([self.base["gamma"], self.base["A"]], axis=1))
+        self.theta0 = np.concatenate([local0.ravel()] + [shared0[n].ravel() for n in self.elasticities])
+        self.n_shared = self.theta0.size - self.Y * self.L
+        self.prior_sqrt = np.sqrt(prior_weight)
+        self.solves = 0
+        self.unconverged = 0
+
+    def _arrays(self, thetas: np.ndarray) -> Dict[str, np.ndarray]:
+        C, Y, R, S = thetas.shape[0], self.Y, self.R, self.S
+        local = thetas[:, : Y * self.L].reshape(C, Y, 2, R, S)
+        arrs = {k: np.broadcast_to(v, (C,) + v.shape).reshape((C * Y,) + v.shape[1:]) for k, v in self.base.items()}
+        arrs["gamma"] = np.exp(local[:, :, 0]).reshape(C * Y, R, S)
+        arrs["A"] = np.exp(local[:, :, 1]).reshape(C * Y, R, S)
+        offset = Y * self.L
+        for name in self.elasticities:
+            size = int(np.prod(self.shapes[name]))
+            block = thetas[:, offset : offset + size].reshape((C,) + self.shapes[name])
+            value = 1.0 + np.exp(block) if name == "sigma" else np.exp(block)
+            arrs[name] = np.repeat(value, Y, axis=0)
+            offset += size
+        return arrs
+
+    def evaluate(self, thetas: np.ndarray, init_prices: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Solve the equilibria of ``C`` parameter vectors (``(C, P)``) as one
+        batch of ``C * Y`` members.  Returns residuals ``(C, n_residuals)``,
+        per-group log deviations, prices ``(C, Y, R, S)`` and convergence flags.
+        """
+        C, Y, R, S = thetas.shape[0], self.Y, self.R, self.S
+        if init_prices is not None:
+            init_prices = np.broadcast_to(init_prices, (C, Y, R, S)).reshape(C * Y, R, S)
+        res = solve_static_batch(self._arrays(thetas), np.zeros((R, R, S)), np.zeros((R, S)), init_prices=init_prices)
+        self.solves += C * Y
+        self.unconverged += int((~res["converged"]).sum())
+        fields = {k: res[k].reshape((C, Y) + res[k].shape[1:]) for k in ("Q_prod", "consumption", "prices", "Q_trade")}
+        devs = _log_deviations(fields, self.observed)
+        # Year-major residual layout: all moments of year 0, then year 1, ...
+        parts = [(self.weights[g] * devs[g]).reshape(C, Y, -1) for g in MOMENT_GROUPS]
+        resid = np.concatenate(parts, axis=2).reshape(C, -1)
+        prior = self.prior_sqrt * (thetas[:, Y * self.L :] - self.theta0[Y * self.L :])
+        return {
+            "residuals": np.concatenate([resid, prior], axis=1),
+            "devs": devs,
+            "prices": fields["prices"],
+            "converged": res["converged"].reshape(C, Y),
+        }
+
+    def jacobian(self, theta: np.ndarray, base_resid: np.ndarray, prices: np.ndarray, step: float) -> np.ndarray:
+        """
+        Forward-difference Jacobian in one batched solve.  Year blocks are
+        independent, so each local parameter is perturbed in every year at
+        once; each shared elasticity gets its own column.
+        """
+        Y, L = self.Y, self.L
+        n_cols = L + self.n_shared
+        thetas = np.repeat(theta[None], n_cols, axis=0)
+        for p in range(L):
+            thetas[p, p : Y * L : L] += step
+        for q in range(self.n_shared):
+            thetas[L + q, Y * L + q] += step
+        diff = (self.evaluate(thetas, prices)["residuals"] - base_resid) / step
+        n_year = (diff.shape[1] - self.n_shared) // Y
+        J = np.zeros((diff.shape[1], theta.size))
+        for y in range(Y):
+            rows = slice(y * n_year, (y + 1) * n_year)
+            J[rows, y * L : (y + 1) * L] = diff[:L, rows].T
+        J[:, Y * L :] = diff[L:].T
+        return J
+
+    def unpack(self, theta: np.ndarray) -> Dict[str, np.ndarray]:
+        arrs = self._arrays(theta[None])
+        return {k: arrs[k] for k in ["gamma", "A"] + self.elasticities}
+
+
+def _moment_table(problem: _MomentProblem, devs0: Dict[str, np.ndarray], devs: Dict[str, np.ndarray]) -> pd.DataFrame:
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    rows = []
+    for group in MOMENT_GROUPS:
+        obs = problem.observed[group]
+        for idx in zip(*np.nonzero(obs > 0)):
+            y, cells = idx[0], idx[1:]
+            origin = regions[cells[0]]
+            dest = regions[cells[1]] if group == "flows" else None
+            rows.append(
+                {
+                    "year": problem.years[y],
+                    "moment": group,
+                    "region": origin,
+                    "dest": dest,
+                    "chip": chips[cells[-1]],
+                    "observed": float(obs[idx]),
+                    "initial": float(obs[idx] * np.exp(devs0[group][(0,) + idx])),
+                    "fitted": float(obs[idx] * np.exp(devs[group][(0,) + idx])),
+                    "log_dev_initial": float(devs0[group][(0,) + idx]),
+                    "log_dev_fitted": float(devs[group][(0,) + idx]),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _rmse_by(table: pd.DataFrame, by: str, col: str) -> Dict[Any, float]:
+    return {k: float(np.sqrt(np.mean(np.square(g[col])))) for k, g in table.groupby(by)}
+
+
+def run_moment_calibration(
+    years: Optional[Iterable[int]] = None,
+    model_params: Optional[config.ModelParams] = None,
+    weights: Optional[Dict[str, float]] = None,
+    elasticities: Iterable[str] = (),
+    prior_weight: float = 1.0,
+    max_iter: int = 50,
+    tol: float = 1e-10,
+    fd_step: float = 1e-5,
+    by_year: Optional[Dict[int, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Fit ``gamma`` and ``A`` per year (and optionally shared elasticities from
+    ``FIT_ELASTICITIES``) so the zero-policy equilibria match the observed
+    production, consumption, prices (ASP) and US partner flows of ``years``
+    (default ``HIST_YEARS``).
+
+    Minimizes the weighted sum of squared log deviations (``weights`` per
+    moment group, default ``MOMENT_WEIGHTS``) with Levenberg-Marquardt.  The
+    Jacobian comes from forward differences evaluated as one batched solve
+    per iteration, and every solve is warm-started from the current
+    equilibrium prices.  Fitted elasticities are pulled toward their
+    ``model_params`` values with weight ``prior_weight`` (on log scale).
+    The one-pass ``run_calibration_by_year`` result (or ``by_year``) is
+    the starting point.
+
+    Returns ``{"params": {year: params}, "diagnostics": {...}, "moments":
+    DataFrame}``; ``params`` has the ``run_calibration_by_year`` layout with
+    fitted values and a matching ``model_params``.
+    """
+    mp = model_params or config.default_model_params()
+    years = list(config.HIST_YEARS if years is None else years)
+    elasticities = list(elasticities)
+    unknown = set(elasticities) - set(FIT_ELASTICITIES)
+    if unknown:
+        raise ValueError(f"Cannot fit {sorted(unknown)}; expected a subset of {FIT_ELASTICITIES}")
+    by_year = run_calibration_by_year(years, mp) if by_year is None else by_year
+    problem = _MomentProblem(by_year, years, {**MOMENT_WEIGHTS, **(weights or {})}, elasticities, prior_weight)
+
+    theta = problem.theta0.copy()
+    current = problem.evaluate(theta[None])
+    devs0 = current["devs"]
+    cost = 0.5 * float(current["residuals"][0] @ current["residuals"][0])
+    initial_cost = cost
+    lam = 1e-3
+    history: List[Dict[str, Any]] = []
+    message = "max_iter reached"
+    converged = False
+
+    for it in range(1, max_iter + 1):
+        r = current["residuals"][0]
+        J = problem.jacobian(theta, r, current["prices"][0], fd_step)
+        grad = J.T @ r
+        if np.max(np.abs(grad)) < tol:
+            message, converged = "gradient below tolerance", True
+            break
+        JTJ = J.T @ J
+        damping = np.maximum(np.diag(JTJ), 1e-12)
+        accepted = False
+        while lam < 1e12:
+            try:
+                delta = np.linalg.solve(JTJ + lam * np.diag(damping), -grad)
+            except np.linalg.LinAlgError:
+                lam *= 10.0
+                continue
+            trial = problem.evaluate((theta + delta)[None], current["prices"][0])
+            trial_cost = 0.5 * float(trial["residuals"][0] @ trial["residuals"][0])
+            if np.isfinite(trial_cost) and trial_cost < cost:
+                accepted = True
+                break
+            lam *= 10.0
+        if not accepted:
+            message, converged = "no descent step found", False
+            break
+        improvement = cost - trial_cost
+        theta, current, cost = theta + delta, trial, trial_cost
+        lam = max(lam / 3.0, 1e-12)
+        history.append(
+            {
+                "iteration": it,
+                "cost": cost,
+                "lambda": lam,
+                "step_norm": float(np.linalg.norm(delta)),
+                "grad_norm": float(np.max(np.abs(grad))),
+                "solves": problem.solves,
+            }
+        )
+        if improvement <= tol * max(cost, 1e-300) or np.linalg.norm(delta) < tol:
+            message, converged = "cost reduction below tolerance", True
+            break
+
+    fitted = problem.unpack(theta)
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    elastic_values: Dict[str, Any] = {}
+    if "sigma" in elasticities:
+        elastic_values["sigma"] = {s: float(fitted["sigma"][0, b]) for b, s in enumerate(chips)}
+    for name in ("epsilon", "supply_eta"):
+        if name in elasticities:
+            elastic_values[name] = {
+                i: {s: float(fitted[name][0, a, b]) for b, s in enumerate(chips)} for a, i in enumerate(regions)
+            }
+    fitted_mp = mp.replace(**elastic_values) if elastic_values else mp
+
+    params_out: Dict[int, Dict[str, Any]] = {}
+    for k, year in enumerate(years):
+        params = copy.deepcopy({key: v for key, v in by_year[year].items() if key != "model_params"})
+        params["gamma"] = {(i, s): float(fitted["gamma"][k, a, b]) for a, i in enumerate(regions) for b, s in enumerate(chips)}
+        params["A"] = {(i, s): float(fitted["A"][k, a, b]) for a, i in enumerate(regions) for b, s in enumerate(chips)}
+        params.update(_behavioural_params(fitted_mp))
+        params_out[year] = params
+
+    table = _moment_table(problem, devs0, current["devs"])
+    diagnostics = {
+        "converged": converged,
+        "message": message,
+        "iterations": len(history),
+        "initial_cost": initial_cost,
+        "final_cost": cost,
+        "rmse_initial": _rmse_by(table, "moment", "log_dev_initial"),
+        "rmse_fitted": _rmse_by(table, "moment", "log_dev_fitted"),
+        "rmse_by_year": _rmse_by(table, "year", "log_dev_fitted"),
+        "max_abs_log_dev": float(table["log_dev_fitted"].abs().max()) if len(table) else 0.0,
+        "elasticities": elastic_values,
+        "equilibrium_solves": problem.solves,
+        "unconverged_solves": problem.unconverged,
+        "history": history,
+    }
+    return {"params": params_out, "diagnostics": diagnostics, "moments": table}
+
+
+# ---------------------------------------------------------------------------
+# Calibration cache
+# ---------------------------------------------------------------------------
+
+# Calibrated (data-derived) entries stored on disk, by key layout
+_REGION_CHIP_KEYS = ["gamma", "A", "production_guess", "rd_initial", "tech_initial"]
+
+
+def calibration_input_files() -> List[Path]:
+    """
+    Data files the calibration reads; their contents are part of the cache key.
+    """
+    paths = [config.CLEAN_DATA_DIR / fname for fname in CLEANED_PANEL_FILES.values()]
+    ipg_path = find_ipg_path()
+    if ipg_path is not None:
+        paths.append(ipg_path)
+    paths.extend(load_dataweb_value_qty().values())
+    paths.extend(load_dataweb_partner_value_qty().values())
+    return sorted(p for p in paths if p.exists())
+
+
+def _file_digest(path: Path) -> str:
+    st = path.stat()
+    sig = (str(path), st.st_mtime_ns, st.st_size)
+    digest = _FILE_DIGESTS.get(sig)
+    if digest is None:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        _FILE_DIGESTS[sig] = digest
+    return digest
+
+
+def calibration_key(model_params: Optional[config.ModelParams] = None) -> str:
+    """
+    Content hash of the calibration inputs: data files, the model parameters
+    the calibration reads (``CALIBRATION_PARAM_FIELDS``) and the remaining
+    ``config`` values it depends on.
+    """
+    mp = model_params or config.default_model_params()
+    plain = mp.to_dict()
+    h = hashlib.sha256()
+    h.update(f"v{CALIBRATION_VERSION}".encode())
+    for path in calibration_input_files():
+        h.update(path.relative_to(config.PROJECT_ROOT).as_posix().encode())
+        h.update(_file_digest(path).encode())
+    settings = {
+        "regions": config.REGIONS,
+        "chips": config.CHIP_TYPES,
+        "base_year": config.BASE_YEAR,
+        "model_params": {name: plain[name] for name in CALIBRATION_PARAM_FIELDS},
+        "alpha_hml": config.DEFAULT_ALPHA_HML,
+        "hbm_share": config.DEFAULT_HBM_SHARE,
+        "domestic_share": config.DEFAULT_DOMESTIC_SHARE,
+    }
+    h.update(json.dumps(settings, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def _save_calibration(key: str, params: Dict[str, Any], cache_dir: Path) -> None:
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    arrays = {
+        name: np.array([[params[name][(i, s)] for s in chips] for i in regions], dtype=float)
+        for name in _REGION_CHIP_KEYS
+    }
+    arrays["beta"] = np.array(
+        [[[params["beta"].get((i, j, s), 0.0) for s in chips] for j in regions] for i in regions], dtype=float
+    )
+    arrays["base_price"] = np.array([params["base_price"].get(s, 1.0) for s in chips], dtype=float)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # pid-tagged temp name so concurrent writers never share a file
+    tmp = cache_dir / f"{key}.{os.getpid()}.tmp.npz"
+    try:
+        np.savez_compressed(tmp, regions=np.array(regions), chips=np.array(chips), **arrays)
+        tmp.replace(cache_dir / f"{key}.npz")
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _load_calibration(key: str, cache_dir: Path, mp: config.ModelParams) -> Optional[Dict[str, Any]]:
+    path = cache_dir / f"{key}.npz"
+    if not path.exists():
+        return None
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    with np.load(path) as z:
+        if list(z["regions"]) != regions or list(z["chips"]) != chips:
+            return None
+        params: Dict[str, Any] = {
+            name: {(i, s): float(z[name][a, b]) for a, i in enumerate(regions) for b, s in enumerate(chips)}
+            for name in _REGION_CHIP_KEYS
+        }
+        beta = z["beta"]
+        params["beta"] = {
+            (i, j, s): float(beta[a, b, c])
+            for a, i in enumerate(regions)
+            for b, j in enumerate(regions)
+            for c, s in enumerate(chips)
+        }
+        params["base_price"] = {s: float(z["base_price"][b]) for b, s in enumerate(chips)}
+    params.update(_behavioural_params(mp))
+    return params
+
+
+def run_full_calibration(
+    model_params: Optional[config.ModelParams] = None,
+    use_cache: bool = True,
+    cache_dir: Path = CALIBRATION_CACHE_DIR,
+) -> Dict[str, Any]:
+    """
+    Convenience wrapper to build all calibration pieces for ``model_params``
+    (``config.default_model_params()`` when omitted).  The result also
+    carries the parameter object under ``"model_params"``.
+
+    Results are memoized per process and stored as ``<key>.npz`` under
+    ``cache_dir``, where the key is ``calibration_key(model_params)``; any
+    change to the input files, the model parameters the calibration reads or
+    the relevant ``config`` values yields a new key and triggers
+    recalibration (the in-process memo keeps the ``CALIBRATION_MEMO_SIZE``
+    most recent entries).  Callers receive a copy they may mutate.
+    """
+    mp = model_params or config.default_model_params()
+    if not use_cache:
+        return _calibrate_from_data(mp)
+    key = calibration_key(mp)
+    params = _CALIBRATION_MEMO.get(key)
+    if params is None:
+        params = _load_calibration(key, cache_dir, mp)
+        if params is None:
+            params = _calibrate_from_data(mp)
+            _save_calibration(key, params, cache_dir)
+        _CALIBRATION_MEMO.put(key, params)
+    params = copy.deepcopy(params)
+    # The entry may come from parameters differing only outside the key
+    params.update(_behavioural_params(mp))
+    return params
+
+
+__all__ = [
+    "run_full_calibration",
+    "run_calibration_by_year",
+    "run_calibration_batch",
+    "run_moment_calibration",
+    "MOMENT_WEIGHTS",
+    "calibration_key",
+    "calibration_input_files",
+]
@@ -5,8 +5,9 @@ trade splits for the model.
 
 from __future__ import annotations
 
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 import config
@@ -15,6 +16,7 @@ from data_loader import (
     load_dataweb_files,
     load_dataweb_value_qty,
     load_dataweb_partner_value_qty,
+    read_excel_cached,
 )
 
 # Fraction of "other" 8542 lines assigned to mid-end when we lack finer
@@ -30,7 +32,7 @@ def _parse_dataweb_values(path: Optional[str], year: int) -> Dict[str, float]:
     """
     if not path:
         return {}
-    xls = pd.read_excel(path, sheet_name="Query Results", header=None)
+    xls = read_excel_cached(path, sheet_name="Query Results", header=None)
     # The sheet has a simple 5-column structure after the first header row.
     xls.columns = xls.iloc[0]
     df = xls.iloc[1:].copy()
@@ -78,18 +80,20 @@ def estimate_chip_type_shares_from_dataweb(year: int = config.BASE_YEAR) -> Dict
     return {"H": float(alpha_H), "M": float(alpha_M), "L": float(alpha_L)}
 
 
-def compute_alpha_and_asp_from_value_qty(year: int = config.BASE_YEAR) -> Tuple[Dict[str, float], Dict[str, float]]:
+def compute_alpha_and_asp_from_value_qty_by_year(years: Iterable[int]) -> Dict[int, Tuple[Dict[str, float], Dict[str, float]]]:
     """
-    Use DataWeb value+quantity files (import/export) to compute:
+    Use DataWeb value+quantity files (import/export) to compute, per year:
       - alpha_H/M/L shares based on total value (import+export) for 854231/232/239
       - ASP (value/quantity) per chip type (average of import/export if both exist)
+    Each file is parsed once for all ``years``.
     """
+    years = list(years)
     paths = load_dataweb_value_qty()
     if not paths:
-        return config.DEFAULT_ALPHA_HML.copy(), DEFAULT_ASP.copy()
+        return {year: (config.DEFAULT_ALPHA_HML.copy(), DEFAULT_ASP.copy()) for year in years}
 
     def parse_file(path: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        df = pd.read_excel(path, sheet_name="Query Results", header=0)
+        df = read_excel_cached(path, sheet_name="Query Results", header=0)
         value_cols = [c for c in df.columns if "value" in str(c).lower() and "quantity" not in str(c).lower()]
         if not value_cols:
             raise ValueError(f"No value column found in {path}")
@@ -100,48 +104,97 @@ def compute_alpha_and_asp_from_value_qty(year: int = config.BASE_YEAR) -> Tuple[
         df_qty = df_qty.rename(columns={val_col: "Quantity"})
         return df_value, df_qty
 
-    values: Dict[str, float] = {"H": 0.0, "M": 0.0, "L": 0.0}
-    qtys: Dict[str, float] = {"H": 0.0, "M": 0.0, "L": 0.0}
+    values = {year: {"H": 0.0, "M": 0.0, "L": 0.0} for year in years}
+    qtys = {year: {"H": 0.0, "M": 0.0, "L": 0.0} for year in years}
 
     for kind, path in paths.items():
         df_val, df_qty = parse_file(path)
         for hs, chip in [("854231", "H"), ("854232", "M"), ("854239", "L")]:
-            v = df_val.loc[(df_val["HTS Number"] == int(hs)) & (df_val["Year"] == year), "TradeValue"].sum()
-            q = df_qty.loc[(df_qty["HTS Number"] == int(hs)) & (df_qty["Year"] == year), "Quantity"].sum()
-            values[chip] += float(v)
-            qtys[chip] += float(q)
-
-    total_value = sum(values.values())
-    if total_value <= 0:
-        alpha = config.DEFAULT_ALPHA_HML.copy()
-    else:
-        alpha = {k: (v / total_value) for k, v in values.items()}
-
-    asp: Dict[str, float] = {}
-    for chip in ["H", "M", "L"]:
-        v = values[chip]
-        q = qtys[chip]
-        if q > 0:
-            asp[chip] = v / q
+            val_hs = df_val[df_val["HTS Number"] == int(hs)]
+            qty_hs = df_qty[df_qty["HTS Number"] == int(hs)]
+            for year in years:
+                v = val_hs.loc[val_hs["Year"] == year, "TradeValue"].sum()
+                q = qty_hs.loc[qty_hs["Year"] == year, "Quantity"].sum()
+                values[year][chip] += float(v)
+                qtys[year][chip] += float(q)
+
+    out: Dict[int, Tuple[Dict[str, float], Dict[str, float]]] = {}
+    for year in years:
+        total_value = sum(values[year].values())
+        if total_value <= 0:
+            alpha = config.DEFAULT_ALPHA_HML.copy()
         else:
-            asp[chip] = DEFAULT_ASP[chip]
-    return alpha, asp
+            alpha = {k: (v / total_value) for k, v in values[year].items()}
+
+        asp: Dict[str, float] = {}
+        for chip in ["H", "M", "L"]:
+            v = values[year][chip]
+            q = qtys[year][chip]
+            if q > 0:
+                asp[chip] = v / q
+            else:
+                asp[chip] = DEFAULT_ASP[chip]
+        out[year] = (alpha, asp)
+    return out
+
+
+def compute_alpha_and_asp_from_value_qty(year: int = config.BASE_YEAR) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Single-year ``compute_alpha_and_asp_from_value_qty_by_year``.
+    """
+    return compute_alpha_and_asp_from_value_qty_by_year([year])[year]
+
+
+HS6_TO_CHIP = {"854231": "H", "854232": "M", "854239": "L"}
 
 
-def compute_partner_flows_and_asp(base_year: int = config.BASE_YEAR) -> Optional[Tuple[Dict[str, float], Dict[Tuple[str, str, str], float], Dict[str, float]]]:
+def _cn_or_row(is_china: pd.Series) -> np.ndarray:
+    return np.where(is_china.to_numpy(dtype=bool), "CN", "ROW")
+
+
+def _accumulate(keys: pd.DataFrame, values: np.ndarray) -> Dict[tuple, float]:
+    """
+    Sum ``values`` by the rows of ``keys``.  Groups keep first-appearance
+    order and each sum is accumulated in row order (``np.add.at``), so the
+    result matches a sequential ``d[k] = d.get(k, 0.0) + v`` loop exactly.
     """
-    Use partner-level value+quantity files to build:
+    if keys.empty:
+        return {}
+    cols: List[str] = list(keys.columns)
+    codes = keys.groupby(cols, sort=False).ngroup().to_numpy()
+    sums = np.zeros(codes.max() + 1)
+    np.add.at(sums, codes, values)
+    uniques = keys.drop_duplicates().itertuples(index=False, name=None)
+    return dict(zip(uniques, sums.tolist()))
+
+
+PartnerResult = Tuple[Dict[str, float], Dict[Tuple[str, str, str], float], Dict[str, float]]
+
+
+def _year_labels(year_col: pd.Series, years: List[int]) -> np.ndarray:
+    """Requested year of each row (0 for other years); tolerant of mixed-type Year columns."""
+    labels = np.zeros(len(year_col), dtype=int)
+    for year in years:
+        labels[(year_col == year).to_numpy(dtype=bool)] = year
+    return labels
+
+
+def compute_partner_flows_and_asp_by_year(years: Iterable[int]) -> Optional[Dict[int, PartnerResult]]:
+    """
+    Use partner-level value+quantity files to build, per year:
       - alpha shares (H/M/L) based on total value
       - flows dict in quantities keyed by (origin, dest, chip_type)
       - ASP per chip_type (value/quantity)
-    Partners are mapped to CN vs ROW.
+    Partners are mapped to CN vs ROW.  Each file is parsed once and all
+    ``years`` are aggregated in one grouped pass.
     """
+    years = list(years)
     paths = load_dataweb_partner_value_qty()
     if not paths:
         return None
 
     def parse_partner(path: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        df = pd.read_excel(path, sheet_name="Query Results", header=0)
+        df = read_excel_cached(path, sheet_name="Query Results", header=0)
         val_cols = [c for c in df.columns if "value" in str(c).lower() and "quantity" not in str(c).lower()]
         if not val_cols:
             raise ValueError(f"No value column in {path}")
@@ -152,141 +205,204 @@ def compute_partner_flows_and_asp(base_year: int = config.BASE_YEAR) -> Optional
         df_qty = df_qty.rename(columns={val_col: "Quantity"})
         return df_val, df_qty
 
-    values = {"H": {}, "M": {}, "L": {}}
-    qtys = {"H": {}, "M": {}, "L": {}}
-    flows: Dict[Tuple[str, str, str], float] = {}
-
-    def map_region(country: str) -> str:
-        if isinstance(country, str) and country.lower().strip() == "china":
-            return "CN"
-        return "ROW"
-
-    hs_to_chip = {"854231": "H", "854232": "M", "854239": "L"}
-
+    frames = []
     for kind, path in paths.items():
         df_val, df_qty = parse_partner(path)
-        df_val = df_val[df_val["Year"] == base_year]
-        df_qty = df_qty[df_qty["Year"] == base_year]
+        df_val = df_val[_year_labels(df_val["Year"], years) > 0]
+        df_qty = df_qty[_year_labels(df_qty["Year"], years) > 0]
         merge_df = pd.merge(df_val, df_qty, on=["Country", "Year", "HTS Number"], how="left")
-        for _, row in merge_df.iterrows():
-            hs = str(int(row["HTS Number"])).zfill(6)
-            chip = hs_to_chip.get(hs)
-            if chip is None:
-                continue
-            region = map_region(str(row["Country"]))
-            val = float(row["TradeValue"])
-            qty = float(row["Quantity"]) if pd.notna(row["Quantity"]) else 0.0
-            values[chip][region] = values[chip].get(region, 0.0) + val
-            qtys[chip][region] = qtys[chip].get(region, 0.0) + qty
-            if kind == "import":
-                key = (region, "US", chip)
-            else:
-                key = ("US", region, chip)
-            if qty > 0:
-                flows[key] = flows.get(key, 0.0) + qty
+        frames.append(merge_df.assign(kind=kind))
+    rows = pd.concat(frames, ignore_index=True)
+
+    hs = pd.to_numeric(rows["HTS Number"]).astype("int64").astype(str).str.zfill(6)
+    rows = rows.assign(chip=hs.map(HS6_TO_CHIP))
+    rows = rows[rows["chip"].notna()]
+    year = _year_labels(rows["Year"], years)
+    region = _cn_or_row(rows["Country"].astype(str).str.lower().str.strip() == "china")
+    is_import = (rows["kind"] == "import").to_numpy()
+    keys = pd.DataFrame({"year": year, "chip": rows["chip"].to_numpy(), "region": region})
+    val = rows["TradeValue"].astype(float).to_numpy()
+    qty = rows["Quantity"].astype(float).fillna(0.0).to_numpy()
+
+    values = {y: {"H": {}, "M": {}, "L": {}} for y in years}
+    qtys = {y: {"H": {}, "M": {}, "L": {}} for y in years}
+    flows: Dict[int, Dict[Tuple[str, str, str], float]] = {y: {} for y in years}
+    for (y, chip, reg), v in _accumulate(keys, val).items():
+        values[int(y)][chip][reg] = v
+    for (y, chip, reg), q in _accumulate(keys, qty).items():
+        qtys[int(y)][chip][reg] = q
+
+    # Imports flow (partner -> US), exports (US -> partner); quantities only
+    flow_keys = pd.DataFrame(
+        {
+            "year": year,
+            "origin": np.where(is_import, region, "US"),
+            "dest": np.where(is_import, "US", region),
+            "chip": keys["chip"].to_numpy(),
+        }
+    )
+    positive = qty > 0
+    for (y, o, d, chip), q in _accumulate(flow_keys[positive], qty[positive]).items():
+        flows[int(y)][(o, d, chip)] = q
+
+    out: Dict[int, PartnerResult] = {}
+    for y in years:
+        # Compute alpha based on total value across regions
+        total_value = sum(sum(v.values()) for v in values[y].values())
+        if total_value <= 0:
+            alpha = config.DEFAULT_ALPHA_HML.copy()
+        else:
+            alpha = {chip: sum(values[y][chip].values()) / total_value for chip in values[y]}
 
-    # Compute alpha based on total value across regions
-    total_value = sum(sum(v.values()) for v in values.values())
-    if total_value <= 0:
-        alpha = config.DEFAULT_ALPHA_HML.copy()
-    else:
-        alpha = {chip: sum(values[chip].values()) / total_value for chip in values}
+        # Compute ASP per chip (using total value/qty)
+        asp: Dict[str, float] = {}
+        for chip in ["H", "M", "L"]:
+            v = sum(values[y][chip].values())
+            q = sum(qtys[y][chip].values())
+            asp[chip] = v / q if q > 0 else DEFAULT_ASP[chip]
+        out[y] = (alpha, flows[y], asp)
+    return out
 
-    # Compute ASP per chip (using total value/qty)
-    asp: Dict[str, float] = {}
-    for chip in ["H", "M", "L"]:
-        v = sum(values[chip].values())
-        q = sum(qtys[chip].values())
-        asp[chip] = v / q if q > 0 else DEFAULT_ASP[chip]
 
-    return alpha, flows, asp
+def compute_partner_flows_and_asp(base_year: int = config.BASE_YEAR) -> Optional[PartnerResult]:
+    """
+    Single-year ``compute_partner_flows_and_asp_by_year``; None when the
+    partner files are missing.
+    """
+    result = compute_partner_flows_and_asp_by_year([base_year])
+    return None if result is None else result[base_year]
 
 
 def split_trade_by_chip_type(trade_df: pd.DataFrame, value_col: str, alpha: Dict[str, float]) -> pd.DataFrame:
     """
     Split an aggregate trade dataframe into three chip types using share alpha.
+    Each input row becomes one row per chip type (in ``alpha`` order).
     """
-    records = []
-    for _, row in trade_df.iterrows():
-        for chip, share in alpha.items():
-            rec = row.to_dict()
-            rec["chip_type"] = chip
-            rec[value_col] = row[value_col] * share
-            records.append(rec)
-    return pd.DataFrame.from_records(records)
-
-
-def construct_us_region_flows(
-    base_year: int = config.BASE_YEAR,
-    use_sector: str = "electrical_equipment",
-    asp: Optional[Dict[str, float]] = None,
+    if trade_df.empty:
+        return pd.DataFrame()
+    shares = pd.DataFrame({"chip_type": list(alpha.keys()), "_share": list(alpha.values())})
+    split = trade_df.drop(columns=["chip_type"], errors="ignore").merge(shares, how="cross")
+    split[value_col] = split[value_col] * split.pop("_share")
+    return split
+
+
+def _chip_flows(
+    df: pd.DataFrame,
+    region_col: str,
+    value_col: str,
+    alpha: Dict[str, float],
+    asp: Dict[str, float],
+    exports: bool,
 ) -> Dict[Tuple[str, str, str], float]:
     """
-    Build a coarse mapping of trade flows (origin -> destination -> chip_type)
-    using cleaned DataWeb panels.  Origin is restricted to the US; flows are
-    split into CN and ROW partners.  This is primarily used to seed Armington
-    weights; when missing, the calibration falls back to symmetric defaults.
+    Quantities by (origin, dest, chip) from trade values split by ``alpha``
+    and divided by ASP; rows are accumulated region by region as in a
+    ``groupby(region_col)`` loop.
     """
-    cleaned = load_cleaned_panels()
-    trade_export = cleaned["trade_export_panel"]
-    trade_duty = cleaned["trade_duty_panel"]
-    partner_result = compute_partner_flows_and_asp(base_year)
-    if partner_result:
-        alpha, flows_prefill, alpha_asp = partner_result
-    else:
-        alpha, alpha_asp = compute_alpha_and_asp_from_value_qty(base_year)
-        flows_prefill = {}
-    if asp is None:
-        asp = alpha_asp
+    if df.empty:
+        return {}
+    split = split_trade_by_chip_type(df.sort_values(region_col, kind="stable"), value_col, alpha)
+    price = split["chip_type"].map({chip: max(asp.get(chip, 1.0), config.EPS) for chip in alpha})
+    q = split[value_col].to_numpy(dtype=float) / price.to_numpy(dtype=float)
+    region = split[region_col].to_numpy()
+    keys = pd.DataFrame(
+        {
+            "origin": np.full(len(split), "US") if exports else region,
+            "dest": region if exports else np.full(len(split), "US"),
+            "chip": split["chip_type"].to_numpy(),
+        }
+    )
+    return _accumulate(keys, q)
 
-    flows: Dict[Tuple[str, str, str], float] = {}
 
-    if partner_result:
-        flows.update(flows_prefill)
+def _region_flows(
+    year: int,
+    cleaned: Dict[str, pd.DataFrame],
+    alpha: Dict[str, float],
+    asp: Dict[str, float],
+    flows_prefill: Dict[Tuple[str, str, str], float],
+    from_partners: bool,
+    use_sector: str,
+) -> Dict[Tuple[str, str, str], float]:
+    """Flows for one year: partner-file flows, else panel values split by alpha."""
+    trade_export = cleaned["trade_export_panel"]
+    trade_duty = cleaned["trade_duty_panel"]
+    flows: Dict[Tuple[str, str, str], float] = dict(flows_prefill)
 
-    if not trade_export.empty and not partner_result:
+    if not trade_export.empty and not from_partners:
         exp = trade_export.copy()
-        exp = exp[exp["year"] == base_year]
+        exp = exp[exp["year"] == year]
         if use_sector and "sector_big" in exp.columns:
             exp = exp[exp["sector_big"] == use_sector]
-        exp["partner_norm"] = exp["partner_name"].str.lower()
-        exp["region_dest"] = exp["partner_norm"].apply(
-            lambda x: "CN" if isinstance(x, str) and "china" in x else "ROW"
-        )
-        for (_, g) in exp.groupby("region_dest"):
-            split = split_trade_by_chip_type(g, "export_fas", alpha)
-            for _, r in split.iterrows():
-                key = ("US", r["region_dest"], r["chip_type"])
-                qty_val = float(r["export_fas"])
-                q = qty_val / max(asp.get(r["chip_type"], 1.0), config.EPS)
-                flows[key] = flows.get(key, 0.0) + q
-
-    if not trade_duty.empty and not partner_result:
+        exp["region_dest"] = _cn_or_row(exp["partner_name"].str.lower().str.contains("china", regex=False, na=False))
+        for key, q in _chip_flows(exp, "region_dest", "export_fas", alpha, asp, exports=True).items():
+            flows[key] = flows.get(key, 0.0) + q
+
+    if not trade_duty.empty and not from_partners:
         imp = trade_duty.copy()
-        imp = imp[imp["year"] == base_year]
+        imp = imp[imp["year"] == year]
         if use_sector and "sector_big" in imp.columns:
             imp = imp[imp["sector_big"] == use_sector]
-        imp["partner_norm"] = imp["partner_name"].str.lower()
-        imp["region_orig"] = imp["partner_norm"].apply(
-            lambda x: "CN" if isinstance(x, str) and "china" in x else "ROW"
-        )
+        imp["region_orig"] = _cn_or_row(imp["partner_name"].str.lower().str.contains("china", regex=False, na=False))
         # Approximate import value from duty / ad valorem rate (guard against zero)
         mfn = imp.get("mfn_adval_hs2", pd.Series(0.05, index=imp.index)).fillna(0.05)
         imp_value = imp["import_duty"] / mfn.replace(0, 0.01)
         imp = imp.assign(import_value=imp_value)
-        for (_, g) in imp.groupby("region_orig"):
-            split = split_trade_by_chip_type(g, "import_value", alpha)
-            for _, r in split.iterrows():
-                key = (r["region_orig"], "US", r["chip_type"])
-                qty_val = float(r["import_value"])
-                q = qty_val / max(asp.get(r["chip_type"], 1.0), config.EPS)
-                flows[key] = flows.get(key, 0.0) + q
+        for key, q in _chip_flows(imp, "region_orig", "import_value", alpha, asp, exports=False).items():
+            flows[key] = flows.get(key, 0.0) + q
 
     return flows
 
 
+def build_trade_inputs_by_year(
+    years: Iterable[int],
+    use_sector: str = "electrical_equipment",
+    asp: Optional[Dict[str, float]] = None,
+    cleaned: Optional[Dict[str, pd.DataFrame]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Trade inputs for each year, parsing every source once:
+    ``{year: {"alpha", "asp", "flows"}}``.  ``asp`` is the data-derived ASP
+    (partner files, else HS6 value/qty files); passing ``asp`` only
+    overrides the prices used to convert panel values into quantities.
+    ``cleaned`` reuses already loaded panels (``load_cleaned_panels()``).
+    """
+    years = list(years)
+    cleaned = load_cleaned_panels() if cleaned is None else cleaned
+    partner = compute_partner_flows_and_asp_by_year(years)
+    fallback = None if partner else compute_alpha_and_asp_from_value_qty_by_year(years)
+    out: Dict[int, Dict[str, Any]] = {}
+    for year in years:
+        if partner:
+            alpha, flows_prefill, data_asp = partner[year]
+        else:
+            (alpha, data_asp), flows_prefill = fallback[year], {}
+        flows = _region_flows(
+            year, cleaned, alpha, data_asp if asp is None else asp, flows_prefill, bool(partner), use_sector
+        )
+        out[year] = {"alpha": alpha, "asp": data_asp, "flows": flows}
+    return out
+
+
+def construct_us_region_flows(
+    base_year: int = config.BASE_YEAR,
+    use_sector: str = "electrical_equipment",
+    asp: Optional[Dict[str, float]] = None,
+) -> Dict[Tuple[str, str, str], float]:
+    """
+    Build a coarse mapping of trade flows (origin -> destination -> chip_type)
+    using cleaned DataWeb panels.  Origin is restricted to the US; flows are
+    split into CN and ROW partners.  This is primarily used to seed Armington
+    weights; when missing, the calibration falls back to symmetric defaults.
+    """
+    return build_trade_inputs_by_year([base_year], use_sector, asp)[base_year]["flows"]
+
+
 __all__ = [
     "estimate_chip_type_shares_from_dataweb",
     "split_trade_by_chip_type",
     "construct_us_region_flows",
+    "build_trade_inputs_by_year",
+    "compute_partner_flows_and_asp_by_year",
+    "compute_alpha_and_asp_from_value_qty_by_year",
 ]
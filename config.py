@@ -6,6 +6,10 @@ portable in this workspace.
 
 from __future__ import annotations
 
+import hashlib
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields, replace
 from pathlib import Path
 from typing import Dict, List
 
@@ -23,6 +27,9 @@ CLEAN_DATA_DIR = PROJECT_ROOT / "wash" / "output"
 # non-ASCII folder names on Windows consoles.
 RAW_DATA_DIR = PROJECT_ROOT / "external_data"
 
+# Derived artifacts (calibration arrays, parsed-file caches); safe to delete.
+CACHE_DIR = PROJECT_ROOT / "cache"
+
 # -----------------------------
 # Model dimensions
 # -----------------------------
@@ -34,6 +41,17 @@ BASE_YEAR: int = 2023
 HIST_YEARS: List[int] = [2020, 2021, 2022, 2023]
 SIM_YEARS: List[int] = [2023, 2024, 2025, 2026, 2027, 2028, 2029]
 
+# Worker processes for scenario/sensitivity runs (1 = serial, in-process)
+SIM_WORKERS: int = 1
+
+# Memoized static equilibria: LRU entries kept per process, and whether solves
+# are also shared across processes/runs on disk (CACHE_DIR / "static")
+STATIC_CACHE_SIZE: int = 4096
+STATIC_CACHE_DISK: bool = False
+
+# Calibrated parameter sets kept in memory per process (LRU; disk entries are unbounded)
+CALIBRATION_MEMO_SIZE: int = 64
+
 # Discount factor for intertemporal objective
 DISCOUNT: float = 0.96
 
@@ -103,3 +121,112 @@ EPS: float = 1e-9
 # Dynamic feedback parameters
 DEMAND_GROWTH_RATE: float = 0.02  # annual demand shifter growth (2% default)
 TECH_FEEDBACK_SUPPLY: float = 0.2  # how strongly tech gains raise supply shifter
+
+
+# -----------------------------
+# Model parameter object
+# -----------------------------
+# Sensitivity cases build modified copies of ``ModelParams`` instead of
+# editing the module-level defaults above, so cases can run concurrently and
+# be used as cache keys.
+
+
+class FrozenMap(Mapping):
+    """
+    Read-only, hashable mapping.  Unlike ``types.MappingProxyType`` it can be
+    pickled, so it travels to worker processes.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Mapping = ()) -> None:
+        object.__setattr__(self, "_data", {k: _freeze(v) for k, v in dict(data).items()})
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __hash__(self) -> int:
+        return hash(tuple(sorted(self._data.items())))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenMap is read-only")
+
+    def __reduce__(self):
+        return (FrozenMap, (self._data,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self) -> str:
+        return f"FrozenMap({self._data!r})"
+
+
+def _freeze(value):
+    if isinstance(value, Mapping) and not isinstance(value, FrozenMap):
+        return FrozenMap(value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    return value
+
+
+@dataclass(frozen=True)
+class ModelParams:
+    """
+    Behavioural parameters of the model.  Defaults mirror the module-level
+    constants; use ``replace``/``scaled`` to derive variants.
+    """
+
+    sigma: Mapping[str, float] = field(default_factory=lambda: DEFAULT_SIGMA)
+    epsilon: Mapping[str, Mapping[str, float]] = field(default_factory=lambda: DEFAULT_EPSILON)
+    supply_eta: Mapping[str, Mapping[str, float]] = field(default_factory=lambda: DEFAULT_SUPPLY_ELASTICITY)
+    rd_intensity: Mapping[str, Mapping[str, float]] = field(default_factory=lambda: DEFAULT_RD_INTENSITY)
+    tech_progress_coef: Mapping[str, float] = field(default_factory=lambda: TECH_PROGRESS_COEF)
+    tech_initial: Mapping[str, Mapping[str, float]] = field(default_factory=lambda: TECH_INITIAL_LEVEL)
+    tech_feedback_supply: float = field(default_factory=lambda: TECH_FEEDBACK_SUPPLY)
+    demand_growth_rate: float = field(default_factory=lambda: DEMAND_GROWTH_RATE)
+
+    def __post_init__(self) -> None:
+        for f in fields(self):
+            object.__setattr__(self, f.name, _freeze(getattr(self, f.name)))
+
+    def replace(self, **changes) -> "ModelParams":
+        return replace(self, **changes)
+
+    def scaled(self, **factors: float) -> "ModelParams":
+        """
+        Multiply whole parameter blocks by a factor, e.g.
+        ``params.scaled(sigma=1.2, tech_progress_coef=0.8)``.
+        """
+        def scale(value, k):
+            if isinstance(value, Mapping):
+                return {key: scale(v, k) for key, v in value.items()}
+            return value * k
+
+        return replace(self, **{name: scale(getattr(self, name), k) for name, k in factors.items()})
+
+    def to_dict(self) -> Dict[str, object]:
+        """Plain (mutable, JSON-serialisable) copy of all fields."""
+        return {f.name: _thaw(getattr(self, f.name)) for f in fields(self)}
+
+    def fingerprint(self) -> str:
+        """Stable content hash, usable as a cache key."""
+        payload = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def default_model_params() -> ModelParams:
+    """``ModelParams`` built from the current module-level defaults."""
+    return ModelParams()
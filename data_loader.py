@@ -10,13 +10,25 @@ matching to cope with non-ASCII folder names.
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import pickle
 from pathlib import Path
-from typing import Dict, Iterable, Optional
+from typing import Dict, Iterable, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 import config
 
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.feather as feather  # type: ignore
+except ImportError:  # pragma: no cover - pickle fallback
+    pa = None  # type: ignore
+    feather = None  # type: ignore
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -37,24 +49,163 @@ def _find_path_with_keyword(base: Path, keywords: Iterable[str], suffix: Optiona
     return None
 
 
+# ---------------------------------------------------------------------------
+# Parsed-Excel cache
+# ---------------------------------------------------------------------------
+
+EXCEL_CACHE_DIR = config.CACHE_DIR / "excel"
+EXCEL_CACHE_VERSION = 1
+
+
+def _excel_cache_stem(path: Path, sheet_name: Union[str, int], header: Optional[int]) -> str:
+    ident = json.dumps([str(path.resolve()), sheet_name, header, EXCEL_CACHE_VERSION])
+    return f"{path.stem}-{hashlib.sha256(ident.encode()).hexdigest()[:12]}"
+
+
+# Object columns from Excel mix ints, floats and strings (header repeats,
+# footnotes).  Arrow needs one type per column, so they are stored as text
+# plus a per-cell type tag and decoded on read.
+_OBJECT_TAGS = {int: 0, float: 1, str: 2, bool: 3, type(None): 4}
+_OBJECT_DECODE = {0: int, 1: float, 2: str, 3: lambda v: v == "True"}
+_TAG_SUFFIX = "__type"
+
+
+def _to_arrow(df: pd.DataFrame) -> "pa.Table":
+    labels = list(df.columns)
+    frame: Dict[str, object] = {}
+    object_cols = []
+    for i in range(len(labels)):
+        col = df.iloc[:, i]
+        name = str(i)
+        if col.dtype != object:
+            frame[name] = col.reset_index(drop=True)
+            continue
+        values = col.to_numpy()
+        # Other cell types (datetimes, ...) raise KeyError -> pickle fallback
+        tags = np.fromiter((_OBJECT_TAGS[type(v)] for v in values), dtype=np.int8, count=len(values))
+        frame[name] = pd.Series([None if t == 4 else (repr(v) if t == 1 else str(v)) for v, t in zip(values, tags)], dtype=object)
+        frame[name + _TAG_SUFFIX] = tags
+        object_cols.append(i)
+    table = pa.Table.from_pandas(pd.DataFrame(frame), preserve_index=False)
+    meta = json.dumps({"labels": labels, "object_cols": object_cols})
+    return table.replace_schema_metadata({**(table.schema.metadata or {}), b"excel_cache": meta.encode()})
+
+
+def _from_arrow(table: "pa.Table") -> pd.DataFrame:
+    meta = json.loads(table.schema.metadata[b"excel_cache"])
+    raw = table.to_pandas()
+    object_cols = set(meta["object_cols"])
+    out: Dict[object, object] = {}
+    for i, label in enumerate(meta["labels"]):
+        name = str(i)
+        if i not in object_cols:
+            out[label] = raw[name]
+            continue
+        text = raw[name].to_numpy(dtype=object)
+        tags = raw[name + _TAG_SUFFIX].to_numpy()
+        values = np.full(len(text), None, dtype=object)
+        for tag, decode in _OBJECT_DECODE.items():
+            idx = np.flatnonzero(tags == tag)
+            values[idx] = [decode(v) for v in text[idx]]
+        out[label] = pd.Series(values, dtype=object)
+    return pd.DataFrame(out, columns=meta["labels"])
+
+
+def _read_cache_entry(path: Path) -> Optional[pd.DataFrame]:
+    try:
+        if path.suffix == ".feather":
+            return _from_arrow(feather.read_table(path))
+        return pd.read_pickle(path)
+    except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _prune_cache_entries(cache_dir: Path, stem: str, keep: Path) -> None:
+    """Drop finished entries of older workbook versions (other processes' temp files are left alone)."""
+    for old in cache_dir.glob(f"{stem}-*"):
+        if old != keep and ".tmp" not in old.suffixes:
+            old.unlink(missing_ok=True)
+
+
+def _write_cache_entry(df: pd.DataFrame, cache_dir: Path, stem: str, entry: str) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Per-process temp names: concurrent writers never touch each other's files
+    tag = f"{os.getpid()}.tmp"
+    if feather is not None:
+        tmp = cache_dir / f"{entry}.{tag}.feather"
+        try:
+            # Uncompressed: the cache trades disk space for read speed
+            feather.write_feather(_to_arrow(df), tmp, compression="uncompressed")
+            target = cache_dir / f"{entry}.feather"
+            tmp.replace(target)
+            _prune_cache_entries(cache_dir, stem, target)
+            return
+        except (pa.ArrowException, ValueError, TypeError, KeyError):
+            # Cell types or column labels Arrow/JSON cannot represent
+            tmp.unlink(missing_ok=True)
+    tmp = cache_dir / f"{entry}.{tag}.pkl"
+    df.to_pickle(tmp)
+    target = cache_dir / f"{entry}.pkl"
+    tmp.replace(target)
+    _prune_cache_entries(cache_dir, stem, target)
+
+
+def read_excel_cached(
+    path: Union[str, Path],
+    sheet_name: Union[str, int] = 0,
+    header: Optional[int] = 0,
+    cache_dir: Optional[Path] = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    ``pd.read_excel`` with a read-through on-disk cache.
+
+    Each sheet is parsed once and stored under ``cache_dir`` (default
+    ``EXCEL_CACHE_DIR``, looked up at call time) as uncompressed Feather
+    (requires pyarrow) or as a pickle when pyarrow is unavailable or Arrow
+    cannot represent the frame (mixed-type object columns, integer column
+    labels).  Entries are keyed by path,
+    sheet, header and the workbook's mtime and size, so editing or replacing
+    the file triggers a re-parse.
+    """
+    path = Path(path)
+    if not use_cache:
+        return pd.read_excel(path, sheet_name=sheet_name, header=header)
+    cache_dir = EXCEL_CACHE_DIR if cache_dir is None else cache_dir
+    st = path.stat()
+    stem = _excel_cache_stem(path, sheet_name, header)
+    entry = f"{stem}-{st.st_mtime_ns}-{st.st_size}"
+    for suffix in (".feather", ".pkl"):
+        cached = cache_dir / f"{entry}{suffix}"
+        if cached.exists():
+            df = _read_cache_entry(cached)
+            if df is not None:
+                return df
+    df = pd.read_excel(path, sheet_name=sheet_name, header=header)
+    _write_cache_entry(df, cache_dir, stem, entry)
+    return df
+
+
 # ---------------------------------------------------------------------------
 # Cleaned data loaders
 # ---------------------------------------------------------------------------
 
+CLEANED_PANEL_FILES: Dict[str, str] = {
+    "tariff_hs4_panel": "tariff_hs4_panel.csv",
+    "tariff_hs2_panel": "tariff_hs2_panel.csv",
+    "trade_export_panel": "trade_export_panel.csv",
+    "trade_duty_panel": "trade_duty_panel.csv",
+    "exports_CN_sector": "exports_CN_sector.csv",
+    "duty_total_year": "duty_total_year.csv",
+}
+
+
 def load_cleaned_panels(data_dir: Path = config.CLEAN_DATA_DIR) -> Dict[str, pd.DataFrame]:
     """
     Load the cleaned CSV artifacts produced by ``wash/datawash.py``.
     """
-    files = {
-        "tariff_hs4_panel": "tariff_hs4_panel.csv",
-        "tariff_hs2_panel": "tariff_hs2_panel.csv",
-        "trade_export_panel": "trade_export_panel.csv",
-        "trade_duty_panel": "trade_duty_panel.csv",
-        "exports_CN_sector": "exports_CN_sector.csv",
-        "duty_total_year": "duty_total_year.csv",
-    }
     out: Dict[str, pd.DataFrame] = {}
-    for key, fname in files.items():
+    for key, fname in CLEANED_PANEL_FILES.items():
         fpath = data_dir / fname
         if fpath.exists():
             out[key] = pd.read_csv(fpath)
@@ -67,19 +218,24 @@ def load_cleaned_panels(data_dir: Path = config.CLEAN_DATA_DIR) -> Dict[str, pd.
 # Raw supporting data (best-effort)
 # ---------------------------------------------------------------------------
 
-def load_ipg_index(raw_dir: Path = config.RAW_DATA_DIR) -> pd.DataFrame:
+def find_ipg_path(raw_dir: Path = config.RAW_DATA_DIR) -> Optional[Path]:
     """
-    Load the FRED IPG3344S monthly index; returns empty DF if not found.
+    Locate the FRED IPG3344S CSV (folder matched by substring); None if absent.
     """
-    fred_dir = None
     for p in raw_dir.iterdir():
         if "fred" in p.name.lower():
-            fred_dir = p
-            break
-    if fred_dir:
-        ipg_path = fred_dir / "IPG3344S.csv"
-        if ipg_path.exists():
-            return pd.read_csv(ipg_path)
+            ipg_path = p / "IPG3344S.csv"
+            return ipg_path if ipg_path.exists() else None
+    return None
+
+
+def load_ipg_index(raw_dir: Path = config.RAW_DATA_DIR) -> pd.DataFrame:
+    """
+    Load the FRED IPG3344S monthly index; returns empty DF if not found.
+    """
+    ipg_path = find_ipg_path(raw_dir)
+    if ipg_path is not None:
+        return pd.read_csv(ipg_path)
     return pd.DataFrame()
 
 
@@ -176,6 +332,10 @@ __all__ = [
     "preprocess_all",
     "load_cleaned_panels",
     "load_ipg_index",
+    "find_ipg_path",
+    "CLEANED_PANEL_FILES",
+    "EXCEL_CACHE_DIR",
+    "read_excel_cached",
     "load_dataweb_files",
     "load_comtrade_files",
     "load_dataweb_value_qty",
@@ -18,7 +18,13 @@ def compute_sales(prices: Dict[PriceKey, float], Q_prod: Dict[PriceKey, float])
     return {(i, s): prices[(i, s)] * Q_prod[(i, s)] for (i, s) in Q_prod}
 
 
-def update_rd_and_tech(prev_T, sales, rd_intensity, world_sales=None):
+def update_rd_and_tech(prev_T, sales, rd_intensity, world_sales=None, tech_progress_coef=None):
+    """
+    R&D spending ``rho * sales`` raises technology by
+    ``phi * RD / world_sales`` (per chip type).  ``tech_progress_coef`` gives
+    phi by chip type; defaults to ``config.TECH_PROGRESS_COEF``.
+    """
+    phi_by_chip = config.TECH_PROGRESS_COEF if tech_progress_coef is None else tech_progress_coef
     new_T: Dict[PriceKey, float] = {}
     RD: Dict[PriceKey, float] = {}
     # Compute world sales per chip type for scaling
@@ -31,7 +37,7 @@ def update_rd_and_tech(prev_T, sales, rd_intensity, world_sales=None):
             rho = rd_intensity[i][s]
             S_is = sales.get((i, s), 0.0)
             RD[(i, s)] = rho * S_is
-            phi = config.TECH_PROGRESS_COEF[s]
+            phi = phi_by_chip[s]
             base = prev_T[(i, s)]
             denom = world_sales_type[s] + config.EPS
             new_T[(i, s)] = base * (1.0 + phi * RD[(i, s)] / denom)
@@ -1,14 +1,35 @@
 """
 Single-period partial equilibrium solver for the chip trade model.
 
-We use a damped fixed-point iteration on prices: given prices, compute supply,
-CES demand, Armington allocation, and adjust prices proportional to the supply
-surplus/shortage until markets clear.
+Given prices we compute supply, CES demand and the Armington allocation; the
+market-clearing residual is supply minus exports for every (region, chip).
+Two solvers are available:
+
+  - ``newton`` (default): Newton steps on log prices with an analytic
+    Jacobian of the residual and a backtracking line search;
+  - ``tatonnement``: damped fixed-point iteration that adjusts prices in
+    proportion to the supply surplus/shortage (also the Newton fallback).
+
+The solver runs on dense NumPy arrays indexed by ``config.REGIONS`` and
+``config.CHIP_TYPES``:
+
+  - prices, supply, demand scales, subsidies: ``(R, S)``
+  - Armington weights, tariffs, trade flows: ``(R_origin, R_dest, S)``
+  - sigma: ``(S,)``
+
+``solve_static_equilibrium`` keeps the tuple-keyed dict interface and simply
+packs its inputs into arrays and unpacks the result.  Its solves are memoized
+by a content hash of the packed inputs (see ``static_cache_info``).
 """
 
 from __future__ import annotations
 
-from typing import Dict, Tuple, Any
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional
 
 import numpy as np
 
@@ -17,139 +38,960 @@ import config
 PriceKey = Tuple[str, str]          # (region, chip_type)
 TradeKey = Tuple[str, str, str]     # (origin, dest, chip_type)
 
+PRICE_FLOOR = 0.05
+TATONNEMENT_STEP = 0.3
+TATONNEMENT_SMALL_STEP = 0.1
 
-def _prices_with_tariff(prices: Dict[PriceKey, float], tau: Dict[Tuple[str, str, str], float]) -> Dict[TradeKey, float]:
-    out: Dict[TradeKey, float] = {}
-    for i in config.REGIONS:
-        for j in config.REGIONS:
-            for s in config.CHIP_TYPES:
-                base_p = prices[(i, s)]
-                t = tau.get((j, s, i), 0.0)
-                out[(i, j, s)] = base_p * (1.0 + t)
-    return out
+# Newton on log prices: cap on a single step (in logs) and line-search depth
+NEWTON_MAX_STEP = 2.0
+NEWTON_MAX_BACKTRACK = 30
+
+# Default max relative market-clearing gap per solver
+DEFAULT_TOL: Dict[str, float] = {"newton": 1e-10, "tatonnement": 1e-4}
+
+# Escalation path when the requested solver does not converge:
+# (solver, tatonnement step) stages tried in order
+ESCALATION: Dict[str, List[Tuple[str, Optional[float]]]] = {
+    "newton": [("newton", None), ("tatonnement", TATONNEMENT_STEP), ("tatonnement", TATONNEMENT_SMALL_STEP)],
+    "tatonnement": [("tatonnement", TATONNEMENT_STEP), ("tatonnement", TATONNEMENT_SMALL_STEP), ("newton", None)],
+}
 
 
-def _ces_consumption_price(beta: Dict[Tuple[str, str, str], float], sigma: Dict[str, float], prices_with_tau: Dict[TradeKey, float]) -> Dict[Tuple[str, str], float]:
-    P_cons: Dict[Tuple[str, str], float] = {}
-    for j in config.REGIONS:
-        for s in config.CHIP_TYPES:
-            sig = sigma[s]
-            agg = 0.0
-            for i in config.REGIONS:
-                b = beta.get((i, j, s), 0.0)
-                pij = prices_with_tau[(i, j, s)]
-                agg += b * (pij ** (1.0 - sig))
-            P_cons[(j, s)] = agg ** (1.0 / (1.0 - sig))
-    return P_cons
-
-
-def _compute_consumption(A: Dict[Tuple[str, str], float], epsilon: Dict[str, Dict[str, float]], P_cons: Dict[Tuple[str, str], float]) -> Dict[Tuple[str, str], float]:
-    Q_cons: Dict[Tuple[str, str], float] = {}
-    for j in config.REGIONS:
-        for s in config.CHIP_TYPES:
-            eps = epsilon[j][s]
-            A_js = A[(j, s)]
-            p = P_cons[(j, s)]
-            Q_cons[(j, s)] = A_js * (p ** (-eps))
-    return Q_cons
-
-
-def _allocate_armington(beta: Dict[Tuple[str, str, str], float], sigma: Dict[str, float], Q_cons: Dict[Tuple[str, str], float], prices_with_tau: Dict[TradeKey, float]) -> Dict[TradeKey, float]:
-    flows: Dict[TradeKey, float] = {}
-    for j in config.REGIONS:
-        for s in config.CHIP_TYPES:
-            sig = sigma[s]
-            denom = 0.0
-            weight: Dict[str, float] = {}
-            for i in config.REGIONS:
-                b = beta.get((i, j, s), 0.0)
-                pij = prices_with_tau[(i, j, s)]
-                weight[i] = b * (pij ** (1.0 - sig))
-                denom += weight[i]
-            for i in config.REGIONS:
-                share = 0.0 if denom == 0 else weight[i] / denom
-                flows[(i, j, s)] = share * Q_cons[(j, s)]
-    return flows
-
-
-def solve_static_equilibrium(params: Dict[str, Any], policy_t: Dict[str, Any], max_iter: int = 200, tol: float = 1e-4) -> Dict[str, Any]:
+# ---------------------------------------------------------------------------
+# Packing helpers (dict <-> array)
+# ---------------------------------------------------------------------------
+
+def pack_params(params: Dict[str, Any]) -> Dict[str, np.ndarray]:
     """
-    Solve for prices, production, trade flows, and implied consumption given
-    parameters and a policy (tariffs + optional subsidies).
+    Convert a calibrated parameter dict (tuple-keyed / nested dicts) into
+    dense arrays for the array engine.
     """
-    tau = policy_t.get("tau", {})
-    subsidy = policy_t.get("subsidy", {})
-
+    regions, chips = config.REGIONS, config.CHIP_TYPES
     beta = params["beta"]
     sigma = params["sigma"]
     A = params["A"]
     epsilon = params["epsilon"]
     gamma = params["gamma"]
     eta = params["supply_eta"]
-
     base_price = params.get("base_price", {"H": 1.0, "M": 1.0, "L": 1.0})
-    prices: Dict[PriceKey, float] = {(i, s): base_price.get(s, 1.0) for i in config.REGIONS for s in config.CHIP_TYPES}
+    return {
+        "beta": np.array([[[beta.get((i, j, s), 0.0) for s in chips] for j in regions] for i in regions], dtype=float),
+        "sigma": np.array([sigma[s] for s in chips], dtype=float),
+        "A": np.array([[A[(j, s)] for s in chips] for j in regions], dtype=float),
+        "epsilon": np.array([[epsilon[j][s] for s in chips] for j in regions], dtype=float),
+        "gamma": np.array([[gamma[(i, s)] for s in chips] for i in regions], dtype=float),
+        "supply_eta": np.array([[eta[i][s] for s in chips] for i in regions], dtype=float),
+        "base_price": np.array([base_price.get(s, 1.0) for s in chips], dtype=float),
+    }
 
-    for _ in range(max_iter):
-        prices_tau = _prices_with_tariff(prices, tau)
-        P_cons = _ces_consumption_price(beta, sigma, prices_tau)
-        Q_cons = _compute_consumption(A, epsilon, P_cons)
-        Q_trade = _allocate_armington(beta, sigma, Q_cons, prices_tau)
-
-        # Supply
-        Q_prod: Dict[PriceKey, float] = {}
-        for i in config.REGIONS:
-            for s in config.CHIP_TYPES:
-                g = gamma[(i, s)]
-                sub = subsidy.get((i, s), 0.0)
-                e = eta[i][s]
-                Q_prod[(i, s)] = g * ((prices[(i, s)] + sub) ** e)
-
-        # Market clearing gap
-        max_gap = 0.0
-        new_prices = prices.copy()
-        for i in config.REGIONS:
-            for s in config.CHIP_TYPES:
-                exports = sum(v for (o, d, ss), v in Q_trade.items() if o == i and ss == s)
-                gap = Q_prod[(i, s)] - exports
-                rel_gap = gap / (Q_prod[(i, s)] + config.EPS)
-                max_gap = max(max_gap, abs(rel_gap))
-                # Price update (damped)
-                step = 0.3
-                new_prices[(i, s)] = max(0.05, prices[(i, s)] * (1.0 - step * rel_gap))
-        prices = new_prices
-        if max_gap < tol:
-            break
 
-    # Final recompute with converged prices
+def pack_policy(policy_t: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert a policy dict into ``(tau, subsidy)`` arrays.  ``tau`` is returned
+    in trade layout ``(origin, dest, chip)``; the dict form is keyed
+    ``(importer, chip, exporter)``.
+
+    ``tau``/``subsidy`` may also be arrays in schedule layout
+    ``(..., importer, chip, exporter)`` / ``(..., region, chip)`` as produced by
+    ``policy.compile_scenario``; leading axes become batch axes.
+    """
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    tau = policy_t.get("tau", {})
+    subsidy = policy_t.get("subsidy", {})
+    if isinstance(tau, np.ndarray):
+        tau_arr = np.moveaxis(np.asarray(tau, dtype=float), -1, -3)
+        if isinstance(subsidy, np.ndarray):
+            sub_arr = np.asarray(subsidy, dtype=float)
+        else:
+            sub_arr = np.array([[subsidy.get((i, s), 0.0) for s in chips] for i in regions], dtype=float)
+        return tau_arr, np.broadcast_to(sub_arr, tau_arr.shape[:-3] + sub_arr.shape[-2:])
+    tau_arr = np.array([[[tau.get((j, s, i), 0.0) for s in chips] for j in regions] for i in regions], dtype=float)
+    sub_arr = np.array([[subsidy.get((i, s), 0.0) for s in chips] for i in regions], dtype=float)
+    return tau_arr, sub_arr
+
+
+def _to_price_dict(arr: np.ndarray) -> Dict[PriceKey, float]:
+    return {
+        (r, s): float(arr[a, b])
+        for a, r in enumerate(config.REGIONS)
+        for b, s in enumerate(config.CHIP_TYPES)
+    }
+
+
+def _to_trade_dict(arr: np.ndarray) -> Dict[TradeKey, float]:
+    return {
+        (i, j, s): float(arr[a, b, c])
+        for a, i in enumerate(config.REGIONS)
+        for b, j in enumerate(config.REGIONS)
+        for c, s in enumerate(config.CHIP_TYPES)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Array engine
+# ---------------------------------------------------------------------------
+
+def _prices_with_tariff(prices: np.ndarray, tau: np.ndarray) -> np.ndarray:
+    """(..., R, S) producer prices -> (..., R_origin, R_dest, S) delivered prices."""
+    return prices[..., :, None, :] * (1.0 + tau)
+
+
+def _armington_weights(beta: np.ndarray, sigma: np.ndarray, prices_with_tau: np.ndarray) -> np.ndarray:
+    return beta * prices_with_tau ** (1.0 - sigma[..., None, None, :])
+
+
+def _ces_consumption_price(beta: np.ndarray, sigma: np.ndarray, prices_with_tau: np.ndarray) -> np.ndarray:
+    agg = _armington_weights(beta, sigma, prices_with_tau).sum(axis=-3)
+    return agg ** (1.0 / (1.0 - sigma[..., None, :]))
+
+
+def _compute_consumption(A: np.ndarray, epsilon: np.ndarray, P_cons: np.ndarray) -> np.ndarray:
+    return A * P_cons ** (-epsilon)
+
+
+def _allocate_armington(beta: np.ndarray, sigma: np.ndarray, Q_cons: np.ndarray, prices_with_tau: np.ndarray) -> np.ndarray:
+    weight = _armington_weights(beta, sigma, prices_with_tau)
+    denom = weight.sum(axis=-3, keepdims=True)
+    share = np.divide(weight, denom, out=np.zeros_like(weight), where=denom != 0)
+    return share * Q_cons[..., None, :, :]
+
+
+def _compute_supply(gamma: np.ndarray, eta: np.ndarray, prices: np.ndarray, subsidy: np.ndarray) -> np.ndarray:
+    return gamma * (prices + subsidy) ** eta
+
+
+def _evaluate(arrs: Dict[str, np.ndarray], prices: np.ndarray, tau: np.ndarray, subsidy: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    One pass of the model at given producer prices.
+    """
+    beta, sigma = arrs["beta"], arrs["sigma"]
     prices_tau = _prices_with_tariff(prices, tau)
     P_cons = _ces_consumption_price(beta, sigma, prices_tau)
-    Q_cons = _compute_consumption(A, epsilon, P_cons)
+    Q_cons = _compute_consumption(arrs["A"], arrs["epsilon"], P_cons)
     Q_trade = _allocate_armington(beta, sigma, Q_cons, prices_tau)
-    Q_prod = {}
-    for i in config.REGIONS:
-        for s in config.CHIP_TYPES:
-            g = gamma[(i, s)]
-            sub = subsidy.get((i, s), 0.0)
-            e = eta[i][s]
-            Q_prod[(i, s)] = g * ((prices[(i, s)] + sub) ** e)
-
-    gov_rev = 0.0
-    for (i, j, s), q in Q_trade.items():
-        if i == j:
-            continue
-        t = tau.get((j, s, i), 0.0)
-        gov_rev += t * prices[(i, s)] * q
-
+    Q_prod = _compute_supply(arrs["gamma"], arrs["supply_eta"], prices, subsidy)
     return {
-        "prices": prices,
         "prices_with_tariff": prices_tau,
         "consumption_price": P_cons,
-        "Q_prod": Q_prod,
-        "Q_trade": Q_trade,
         "consumption": Q_cons,
-        "gov_revenue": gov_rev,
+        "Q_trade": Q_trade,
+        "Q_prod": Q_prod,
     }
 
 
-__all__ = ["solve_static_equilibrium"]
+def _gov_revenue(prices: np.ndarray, tau: np.ndarray, Q_trade: np.ndarray) -> np.ndarray:
+    n = tau.shape[-2]
+    offdiag = (~np.eye(n, dtype=bool))[:, :, None]
+    rev = np.where(offdiag, tau * prices[..., :, None, :] * Q_trade, 0.0)
+    return rev.sum(axis=(-3, -2, -1))
+
+
+def _relative_gap(state: Dict[str, np.ndarray]) -> np.ndarray:
+    Q_prod = state["Q_prod"]
+    exports = state["Q_trade"].sum(axis=-2)
+    return (Q_prod - exports) / (Q_prod + config.EPS)
+
+
+# Number of trailing (non-batch) axes of each packed array
+_PARAM_NDIM: Dict[str, int] = {
+    "beta": 3,
+    "sigma": 1,
+    "A": 2,
+    "epsilon": 2,
+    "gamma": 2,
+    "supply_eta": 2,
+    "base_price": 1,
+}
+
+
+def _take(arrs: Dict[str, np.ndarray], idx: np.ndarray) -> Dict[str, np.ndarray]:
+    """Select batch members ``idx`` (leading axis) from a dict of arrays."""
+    return {k: v[idx] for k, v in arrs.items()}
+
+
+def _solve_tatonnement(
+    arrs: Dict[str, np.ndarray],
+    prices: np.ndarray,
+    tau: np.ndarray,
+    subsidy: np.ndarray,
+    max_iter: int,
+    tol: float,
+    step: float = TATONNEMENT_STEP,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Damped multiplicative price adjustment over a leading batch axis.
+    Members stop updating once their gap is below ``tol``.  Returns
+    ``(prices, iterations, max_gap, converged)`` with per-member arrays.
+    """
+    K = prices.shape[0]
+    prices = prices.copy()
+    iterations = np.zeros(K, dtype=int)
+    max_gap = np.full(K, np.inf)
+    converged = np.zeros(K, dtype=bool)
+    active = np.arange(K)
+    sub = (arrs, tau, subsidy)
+    for _ in range(max_iter):
+        rel_gap = _relative_gap(_evaluate(sub[0], prices[active], sub[1], sub[2]))
+        gap = np.max(np.abs(rel_gap), axis=(-2, -1))
+        # Price update (damped)
+        prices[active] = np.maximum(PRICE_FLOOR, prices[active] * (1.0 - step * rel_gap))
+        iterations[active] += 1
+        max_gap[active] = gap
+        done = gap < tol
+        if done.any():
+            converged[active[done]] = True
+            keep = ~done
+            active = active[keep]
+            if active.size == 0:
+                break
+            sub = (_take(sub[0], keep), sub[1][keep], sub[2][keep])
+    return prices, iterations, max_gap, converged
+
+
+def _excess_demand(arrs: Dict[str, np.ndarray], log_prices: np.ndarray, tau: np.ndarray, subsidy: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Market-clearing residual in logs, ``F = log(supply) - log(exports)``,
+    as a function of log producer prices.
+    """
+    state = _evaluate(arrs, np.exp(log_prices), tau, subsidy)
+    exports = state["Q_trade"].sum(axis=-2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        F = np.log(state["Q_prod"]) - np.log(exports)
+    state["exports"] = exports
+    return F, state
+
+
+def _excess_demand_jacobian(arrs: Dict[str, np.ndarray], prices: np.ndarray, subsidy: np.ndarray, state: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Analytic Jacobian of ``_excess_demand`` w.r.t. log prices.  Chip types do
+    not interact, so the result is block diagonal and returned as
+    ``(..., S, R, R)`` with ``J[s, k, i] = dF[k, s] / dlog p[i, s]``.
+
+    With ``share_ij = f_ij / C_j`` the Armington flow elasticity is
+    ``dlog f_kj / dlog p_i = (1 - sigma)(delta_ki - share_ij) - eps_j share_ij``.
+    """
+    sigma = arrs["sigma"]
+    f = state["Q_trade"]
+    X = state["exports"]
+    C = state["consumption"]
+    share = np.divide(f, C[..., None, :, :], out=np.zeros_like(f), where=C[..., None, :, :] != 0)
+    one_minus_sigma = 1.0 - sigma[..., None, :]
+    # M[k, i, s] = sum_j f_kj share_ij ((1 - sigma) + eps_j)
+    M = np.einsum("...kjs,...ijs,...js->...kis", f, share, one_minus_sigma + arrs["epsilon"])
+    n = f.shape[-2]
+    eye = np.eye(n)[:, :, None]
+    dX = one_minus_sigma[..., None, :, :] * eye * X[..., :, None, :] - M
+    dlogS = arrs["supply_eta"] * prices / (prices + subsidy)
+    J = eye * dlogS[..., :, None, :] - dX / X[..., :, None, :]
+    return np.moveaxis(J, -1, -3)
+
+
+def _newton_direction(J: np.ndarray, F: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve ``J dx = -F`` per batch member and chip block.  Returns
+    ``(dx, ok)``; members with a singular block get ``ok = False``.
+    """
+    rhs = np.moveaxis(F, -1, -2)[..., None]
+    ok = np.ones(F.shape[0], dtype=bool)
+    try:
+        sol = np.linalg.solve(J, rhs)
+    except np.linalg.LinAlgError:
+        sol = np.zeros_like(rhs)
+        for k in range(F.shape[0]):
+            try:
+                sol[k] = np.linalg.solve(J[k], rhs[k])
+            except np.linalg.LinAlgError:
+                ok[k] = False
+    dx = -np.moveaxis(sol[..., 0], -2, -1)
+    ok &= np.all(np.isfinite(dx), axis=(-2, -1))
+    return np.where(ok[:, None, None], dx, 0.0), ok
+
+
+def _solve_newton(
+    arrs: Dict[str, np.ndarray],
+    prices: np.ndarray,
+    tau: np.ndarray,
+    subsidy: np.ndarray,
+    max_iter: int,
+    tol: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Newton iteration on log prices with a backtracking (Armijo) line search
+    on ``0.5 * ||F||^2``, over a leading batch axis.  Converged members are
+    masked out of later iterations.  Returns ``(prices, iterations,
+    max_gap, converged)``; a member is not converged when its residual is
+    not finite, its Jacobian is singular or its line search stalls, so the
+    caller can fall back.
+    """
+    K = prices.shape[0]
+    x_all = np.log(prices)
+    iterations = np.zeros(K, dtype=int)
+    max_gap = np.full(K, np.inf)
+    converged = np.zeros(K, dtype=bool)
+    active = np.arange(K)
+    sub_arrs, sub_tau, sub_s = arrs, tau, subsidy
+    x = x_all
+    F, state = _excess_demand(sub_arrs, x, sub_tau, sub_s)
+
+    for it in range(max_iter + 1):
+        finite = np.all(np.isfinite(F), axis=(-2, -1))
+        gap = np.max(np.abs(_relative_gap(state)), axis=(-2, -1))
+        max_gap[active] = np.where(finite, gap, np.inf)
+        done = finite & (gap < tol)
+        converged[active[done]] = True
+        keep = finite & ~done
+        if it == max_iter:
+            break
+        if not keep.all():
+            active = active[keep]
+            if active.size == 0:
+                break
+            sub_arrs, sub_tau, sub_s = _take(sub_arrs, keep), sub_tau[keep], sub_s[keep]
+            x, F, state = x[keep], F[keep], {k: v[keep] for k, v in state.items()}
+
+        J = _excess_demand_jacobian(sub_arrs, np.exp(x), sub_s, state)
+        dx, ok = _newton_direction(J, F)
+        # Keep a single step within a factor of e^NEWTON_MAX_STEP in prices
+        biggest = np.maximum(np.max(np.abs(dx), axis=(-2, -1)), config.EPS)
+        dx *= np.minimum(1.0, NEWTON_MAX_STEP / biggest)[:, None, None]
+
+        merit = 0.5 * np.sum(F * F, axis=(-2, -1))
+        lam = np.ones(active.size)
+        accepted = np.zeros(active.size, dtype=bool)
+        x_new, F_new = x.copy(), F.copy()
+        state_new = {k: v.copy() for k, v in state.items()}
+        pending = np.flatnonzero(ok)
+        for _ in range(NEWTON_MAX_BACKTRACK):
+            if pending.size == 0:
+                break
+            x_try = x[pending] + lam[pending, None, None] * dx[pending]
+            F_try, state_try = _excess_demand(_take(sub_arrs, pending), x_try, sub_tau[pending], sub_s[pending])
+            merit_try = 0.5 * np.sum(F_try * F_try, axis=(-2, -1))
+            good = np.isfinite(merit_try) & (merit_try <= (1.0 - 1e-4 * lam[pending]) * merit[pending])
+            idx = pending[good]
+            x_new[idx], F_new[idx] = x_try[good], F_try[good]
+            for k in state_new:
+                state_new[k][idx] = state_try[k][good]
+            accepted[idx] = True
+            lam[pending[~good]] *= 0.5
+            pending = pending[~good]
+
+        x_all[active] = x_new
+        iterations[active] += 1
+        # Members whose step was rejected are dropped as failures
+        if not accepted.all():
+            active = active[accepted]
+            if active.size == 0:
+                break
+            sub_arrs, sub_tau, sub_s = _take(sub_arrs, accepted), sub_tau[accepted], sub_s[accepted]
+            x_new, F_new = x_new[accepted], F_new[accepted]
+            state_new = {k: v[accepted] for k, v in state_new.items()}
+        x, F, state = x_new, F_new, state_new
+
+    return np.exp(x_all), iterations, max_gap, converged
+
+
+# ---------------------------------------------------------------------------
+# Sensitivities (implicit function theorem)
+# ---------------------------------------------------------------------------
+
+# Parameters with IFT sensitivities, in trade/price layout (``tau`` is
+# ``(origin, dest, chip)``).  Derivatives are w.r.t. levels.
+SENSITIVITY_PARAMS = ["tau", "subsidy", "sigma", "epsilon", "supply_eta", "gamma", "A"]
+
+# Equilibrium outputs with sensitivities
+SENSITIVITY_OUTPUTS = ["prices", "prices_with_tariff", "consumption_price", "consumption", "Q_trade", "Q_prod", "gov_revenue"]
+
+
+def _tangent(
+    arrs: Dict[str, np.ndarray],
+    prices: np.ndarray,
+    tau: np.ndarray,
+    subsidy: np.ndarray,
+    state: Dict[str, np.ndarray],
+    dx: np.ndarray,
+    d: Dict[str, np.ndarray],
+) -> Dict[str, np.ndarray]:
+    """
+    Forward-mode derivative of one model pass at ``prices`` along ``D``
+    directions: ``dx`` ``(K, D, R, S)`` in log prices and ``d[name]``
+    ``(K or 1, D, *shape)`` in parameter levels (see ``SENSITIVITY_PARAMS``;
+    missing names are not perturbed).  Member inputs are ``(K, ...)``.
+
+    Returns the directional derivatives ``(K, D, ...)`` of the residual
+    ``F`` of ``_excess_demand`` and of every ``SENSITIVITY_OUTPUTS`` field.
+    """
+    def direction(name: str) -> np.ndarray:
+        if name in d:
+            return d[name]
+        return np.zeros((1, 1) + inputs[name].shape[1:])
+
+    inputs = dict(arrs, tau=tau, subsidy=subsidy)
+
+    def member(arr: np.ndarray) -> np.ndarray:
+        return arr[:, None]
+
+    p, s = member(prices), member(subsidy)
+    t = member(tau)
+    sigma = member(arrs["sigma"])
+    one_minus_sigma = 1.0 - sigma[..., None, :]          # (K, 1, 1, S) for (R, S) arrays
+    q = member(state["prices_with_tariff"])
+    f, C, P = member(state["Q_trade"]), member(state["consumption"]), member(state["consumption_price"])
+    X, Q = f.sum(axis=-2), member(state["Q_prod"])
+    w = _armington_weights(member(arrs["beta"]), sigma, q)
+    W = w.sum(axis=-3)
+    share = np.divide(w, W[..., None, :, :], out=np.zeros_like(w), where=W[..., None, :, :] != 0)
+
+    d_sigma = direction("sigma")
+    ell = dx[..., :, None, :] + direction("tau") / (1.0 + t)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_q = np.where(q > 0, np.log(q), 0.0)
+        log_W = np.where(W > 0, np.log(W), 0.0)
+        log_P = np.where(P > 0, np.log(P), 0.0)
+    dlog_w = one_minus_sigma[..., None, :, :] * ell - log_q * d_sigma[..., None, None, :]
+    dlog_W = (share * dlog_w).sum(axis=-3)
+    dlog_P = dlog_W / one_minus_sigma + log_W * d_sigma[..., None, :] / one_minus_sigma ** 2
+    dlog_C = direction("A") / member(arrs["A"]) - member(arrs["epsilon"]) * dlog_P - log_P * direction("epsilon")
+    dlog_f = dlog_w - dlog_W[..., None, :, :] + dlog_C[..., None, :, :]
+    df = f * dlog_f
+    dlog_X = df.sum(axis=-2) / X
+
+    eta = member(arrs["supply_eta"])
+    ps = p + s
+    dlog_Q = (
+        direction("gamma") / member(arrs["gamma"])
+        + eta * (p * dx + direction("subsidy")) / ps
+        + np.log(ps) * direction("supply_eta")
+    )
+
+    n = tau.shape[-2]
+    offdiag = (~np.eye(n, dtype=bool))[:, :, None]
+    pf = p[..., :, None, :] * f
+    d_rev = np.where(offdiag, direction("tau") * pf + t * pf * (dx[..., :, None, :] + dlog_f), 0.0)
+    return {
+        "F": dlog_Q - dlog_X,
+        "prices": p * dx,
+        "prices_with_tariff": q * ell,
+        "consumption_price": P * dlog_P,
+        "consumption": C * dlog_C,
+        "Q_trade": df,
+        "Q_prod": Q * dlog_Q,
+        "gov_revenue": d_rev.sum(axis=(-3, -2, -1)),
+    }
+
+
+def _static_sensitivities(
+    arrs: Dict[str, np.ndarray],
+    tau: np.ndarray,
+    subsidy: np.ndarray,
+    out: Dict[str, np.ndarray],
+    names: List[str],
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Total derivatives of the equilibrium outputs w.r.t. the ``names``
+    parameters by the implicit function theorem: with ``F(x, theta) = 0`` at
+    the solution, ``dx/dtheta = -J^{-1} dF/dtheta`` (one batched solve on
+    the block-diagonal Jacobian for all parameters), then one tangent pass
+    gives every output.
+
+    Returns ``sens[output][param]`` of shape ``(K, *output_shape,
+    *param_shape)``; members that did not converge are NaN.
+    """
+    K = out["prices"].shape[0]
+    inputs = dict(arrs, tau=tau, subsidy=subsidy)
+    shapes = {name: inputs[name].shape[1:] for name in names}
+    sizes = [int(np.prod(shape)) for shape in shapes.values()]
+    D = sum(sizes)
+    d: Dict[str, np.ndarray] = {}
+    offset = 0
+    for (name, shape), size in zip(shapes.items(), sizes):
+        block = np.zeros((D, size))
+        block[offset:offset + size] = np.eye(size)
+        d[name] = block.reshape((1, D) + shape)
+        offset += size
+
+    state = {k: out[k] for k in ("prices_with_tariff", "consumption_price", "consumption", "Q_trade", "Q_prod")}
+    prices = out["prices"]
+    zero_dx = np.zeros((K, D) + prices.shape[1:])
+    partial = _tangent(arrs, prices, tau, subsidy, state, zero_dx, d)["F"]
+
+    jac_state = dict(state, exports=state["Q_trade"].sum(axis=-2))
+    J = _excess_demand_jacobian(arrs, prices, subsidy, jac_state)   # (K, S, R, R)
+    rhs = np.moveaxis(partial, 1, -1)                                # (K, R, S, D)
+    with np.errstate(all="ignore"):
+        try:
+            sol = np.linalg.solve(J, np.moveaxis(rhs, -3, -2))       # (K, S, R, D)
+        except np.linalg.LinAlgError:
+            sol = np.full(J.shape[:-1] + (D,), np.nan)
+    dx = -np.moveaxis(np.moveaxis(sol, -2, -3), -1, 1)               # (K, D, R, S)
+
+    total = _tangent(arrs, prices, tau, subsidy, state, dx, d)
+    bad = ~np.asarray(out["converged"], dtype=bool)
+    sens: Dict[str, Dict[str, np.ndarray]] = {}
+    for field in SENSITIVITY_OUTPUTS:
+        values = total[field]
+        values = np.where(bad.reshape((K,) + (1,) * (values.ndim - 1)), np.nan, values)
+        sens[field] = {}
+        offset = 0
+        for (name, shape), size in zip(shapes.items(), sizes):
+            block = np.moveaxis(values[:, offset:offset + size], 1, -1)
+            sens[field][name] = block.reshape(block.shape[:-1] + shape)
+            offset += size
+    return sens
+
+
+def _sensitivity_names(sensitivities: Any) -> List[str]:
+    names = list(SENSITIVITY_PARAMS) if sensitivities is True else list(sensitivities)
+    unknown = sorted(set(names) - set(SENSITIVITY_PARAMS))
+    if unknown:
+        raise ValueError(f"No sensitivities for {unknown}, expected a subset of {SENSITIVITY_PARAMS}")
+    return names
+
+
+def _stage_label(name: str, step: Optional[float]) -> str:
+    return name if step is None else f"{name}(step={step:g})"
+
+
+def _batch_size(arrs: Dict[str, np.ndarray], tau: np.ndarray, subsidy: np.ndarray) -> int:
+    sizes = {v.shape[0] for k, v in arrs.items() if v.ndim == _PARAM_NDIM[k] + 1}
+    if tau.ndim == 4:
+        sizes.add(tau.shape[0])
+    if subsidy.ndim == 3:
+        sizes.add(subsidy.shape[0])
+    sizes.discard(1)
+    if len(sizes) > 1:
+        raise ValueError(f"Inconsistent batch sizes: {sorted(sizes)}")
+    return sizes.pop() if sizes else 1
+
+
+def _broadcast_batch(arr: np.ndarray, ndim: int, K: int) -> np.ndarray:
+    if arr.ndim == ndim:
+        arr = arr[None]
+    return np.broadcast_to(arr, (K,) + arr.shape[1:])
+
+
+def solve_static_batch(
+    arrs: Dict[str, np.ndarray],
+    tau: np.ndarray,
+    subsidy: np.ndarray,
+    max_iter: int = 200,
+    tol: Optional[float] = None,
+    solver: str = "newton",
+    init_prices: Optional[np.ndarray] = None,
+    fallback: bool = True,
+    sensitivities: Any = False,
+) -> Dict[str, Any]:
+    """
+    Solve K equilibria at once.  Any packed parameter, ``tau`` or ``subsidy``
+    may carry a leading batch axis of length K (see ``stack_params`` /
+    ``stack_policies``); unbatched inputs are shared by all members.
+    Members that have converged are masked out of further iterations.
+    ``init_prices`` (``(R, S)`` or ``(K, R, S)``) warm-starts the solver,
+    e.g. from a previous year's solution; default is ``base_price``.
+
+    Members that do not converge are escalated through ``ESCALATION[solver]``
+    (disabled with ``fallback=False``); each stage restarts from the
+    initial prices and the best attempt is kept.
+
+    Returns the fields of ``solve_static_arrays`` stacked along the batch
+    axis, including per-member ``converged``, ``iterations`` (summed over
+    stages), ``max_gap`` and ``solver`` (the stage that produced the result).
+
+    ``sensitivities`` (``True`` or a subset of ``SENSITIVITY_PARAMS``) adds
+    ``out["sensitivities"][output][param]``: exact derivatives of each
+    ``SENSITIVITY_OUTPUTS`` field w.r.t. the parameters at the solution,
+    shaped ``(K, *output_shape, *param_shape)`` and NaN for members that did
+    not converge.
+    """
+    if solver not in DEFAULT_TOL:
+        raise ValueError(f"Unknown solver '{solver}', expected one of {sorted(DEFAULT_TOL)}")
+    tol = DEFAULT_TOL[solver] if tol is None else tol
+    K = _batch_size(arrs, tau, subsidy)
+    arrs = {k: _broadcast_batch(np.asarray(v, dtype=float), _PARAM_NDIM[k], K) for k, v in arrs.items() if k in _PARAM_NDIM}
+    tau = _broadcast_batch(np.asarray(tau, dtype=float), 3, K)
+    subsidy = _broadcast_batch(np.asarray(subsidy, dtype=float), 2, K)
+    if init_prices is None:
+        start = np.broadcast_to(arrs["base_price"][:, None, :], arrs["gamma"].shape).astype(float)
+    else:
+        start = _broadcast_batch(np.asarray(init_prices, dtype=float), 2, K).astype(float)
+
+    stages = ESCALATION[solver] if fallback else ESCALATION[solver][:1]
+    prices = start.copy()
+    iterations = np.zeros(K, dtype=int)
+    max_gap = np.full(K, np.inf)
+    converged = np.zeros(K, dtype=bool)
+    used = np.full(K, _stage_label(*stages[0]), dtype=object)
+    for name, step in stages:
+        retry = np.flatnonzero(~converged)
+        if retry.size == 0:
+            break
+        sub = (_take(arrs, retry), start[retry], tau[retry], subsidy[retry], max_iter, tol)
+        if name == "newton":
+            p_s, it_s, gap_s, conv_s = _solve_newton(*sub)
+        else:
+            p_s, it_s, gap_s, conv_s = _solve_tatonnement(*sub, step=step)
+        iterations[retry] += it_s
+        # Keep the stage's answer if it converged or beats earlier attempts
+        better = conv_s | (gap_s < max_gap[retry])
+        idx = retry[better]
+        prices[idx], max_gap[idx], converged[idx] = p_s[better], gap_s[better], conv_s[better]
+        used[idx] = _stage_label(name, step)
+
+    # Final recompute with converged prices
+    out = _evaluate(arrs, prices, tau, subsidy)
+    out["prices"] = prices
+    out["gov_revenue"] = _gov_revenue(prices, tau, out["Q_trade"])
+    out["converged"] = converged
+    out["iterations"] = iterations
+    out["max_gap"] = max_gap
+    out["solver"] = used
+    if sensitivities:
+        out["sensitivities"] = _static_sensitivities(arrs, tau, subsidy, out, _sensitivity_names(sensitivities))
+    return out
+
+
+def solve_static_arrays(
+    arrs: Dict[str, np.ndarray],
+    tau: np.ndarray,
+    subsidy: np.ndarray,
+    max_iter: int = 200,
+    tol: Optional[float] = None,
+    solver: str = "newton",
+    init_prices: Optional[np.ndarray] = None,
+    fallback: bool = True,
+    sensitivities: Any = False,
+) -> Dict[str, Any]:
+    """
+    Array form of the equilibrium solver.  ``arrs`` comes from
+    ``pack_params``; ``tau``/``subsidy`` from ``pack_policy``.  Returns the
+    same fields as ``solve_static_equilibrium`` but as arrays.
+
+    ``solver`` is ``"newton"`` (default) or ``"tatonnement"``; on failure
+    the solve escalates through ``ESCALATION[solver]`` unless
+    ``fallback=False``.  ``tol`` bounds the max relative supply/export gap
+    and defaults per solver (see ``DEFAULT_TOL``).  ``init_prices`` is an
+    optional ``(R, S)`` warm start.  ``sensitivities`` adds parameter
+    derivatives as in ``solve_static_batch`` (without the batch axis).
+    """
+    res = solve_static_batch(
+        arrs, tau, subsidy, max_iter=max_iter, tol=tol, solver=solver, init_prices=init_prices, fallback=fallback,
+        sensitivities=sensitivities,
+    )
+    out = {k: v[0] for k, v in res.items() if k != "sensitivities"}
+    if "sensitivities" in res:
+        out["sensitivities"] = {f: {p: v[0] for p, v in by.items()} for f, by in res["sensitivities"].items()}
+    out["converged"] = bool(out["converged"])
+    out["iterations"] = int(out["iterations"])
+    out["max_gap"] = float(out["max_gap"])
+    return out
+
+
+def stack_params(packed: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Stack ``pack_params`` outputs along a new leading batch axis."""
+    return {k: np.stack([p[k] for p in packed]) for k in packed[0]}
+
+
+def stack_policies(policies: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack a list of policy dicts into batched ``(tau, subsidy)`` arrays."""
+    packed = [pack_policy(p) for p in policies]
+    return np.stack([t for t, _ in packed]), np.stack([s for _, s in packed])
+
+
+# ---------------------------------------------------------------------------
+# Memoization of solved equilibria
+# ---------------------------------------------------------------------------
+
+# Bump when the solver changes so stale disk entries are ignored.
+STATIC_CACHE_VERSION = 1
+STATIC_CACHE_DIR = config.CACHE_DIR / "static"
+
+
+class LRUCache:
+    """
+    In-memory LRU keyed by content-hash strings.  ``maxsize <= 0`` disables
+    it.  Counts hits, misses and evictions; ``info()`` reports them.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: str) -> Any:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+
+    def _remember(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._evict()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "currsize": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+class StaticSolveCache(LRUCache):
+    """
+    LRU of solved equilibria (``solve_static_arrays`` results) keyed by
+    ``static_solve_key``, with an optional on-disk tier under ``cache_dir``
+    that processes share.  Counts hits (``disk_hits`` of them served from
+    disk), misses and evictions.
+    """
+
+    def __init__(self, maxsize: int = config.STATIC_CACHE_SIZE, cache_dir: Optional[Path] = None):
+        super().__init__(maxsize)
+        self.cache_dir = cache_dir
+        self.disk_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 or self.cache_dir is not None
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        if self.cache_dir is not None:
+            try:
+                with open(self._path(key), "rb") as fh:
+                    value = pickle.load(fh)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                value = None
+            if value is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self._remember(key, value)
+        if self.cache_dir is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+
+    def info(self) -> Dict[str, Any]:
+        info = super().info()
+        info["disk_hits"] = self.disk_hits
+        info["disk"] = str(self.cache_dir) if self.cache_dir is not None else None
+        return info
+
+    def clear(self, disk: bool = False) -> None:
+        super().clear()
+        self.disk_hits = 0
+        if disk and self.cache_dir is not None and self.cache_dir.exists():
+            for path in self.cache_dir.glob("*/*.pkl"):
+                path.unlink(missing_ok=True)
+
+
+_STATIC_CACHE = StaticSolveCache(config.STATIC_CACHE_SIZE, STATIC_CACHE_DIR if config.STATIC_CACHE_DISK else None)
+
+
+def static_solve_key(arrays: Dict[str, Optional[np.ndarray]], options: Tuple[Any, ...]) -> str:
+    """Content hash of the solver inputs (packed arrays, policy, warm start) and options."""
+    h = hashlib.sha256()
+    h.update(repr((STATIC_CACHE_VERSION, config.REGIONS, config.CHIP_TYPES, options)).encode())
+    for name in sorted(arrays):
+        arr = arrays[name]
+        h.update(name.encode())
+        if arr is None:
+            h.update(b"-")
+            continue
+        arr = np.ascontiguousarray(arr, dtype=float)
+        h.update(repr(arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def configure_static_cache(
+    maxsize: Optional[int] = None,
+    disk: Optional[bool] = None,
+    cache_dir: Path = STATIC_CACHE_DIR,
+) -> None:
+    """
+    Resize the in-memory LRU (``maxsize=0`` turns it off) and/or switch the
+    shared on-disk tier on or off.  Affects this process and workers forked
+    after the call.
+    """
+    if maxsize is not None:
+        _STATIC_CACHE.resize(maxsize)
+    if disk is not None:
+        _STATIC_CACHE.cache_dir = cache_dir if disk else None
+
+
+def static_cache_info() -> Dict[str, Any]:
+    """Hit/miss/eviction counters and size of the static-solve memo."""
+    return _STATIC_CACHE.info()
+
+
+def static_cache_clear(disk: bool = False) -> None:
+    """Empty the in-memory memo and reset its counters (and the disk tier with ``disk=True``)."""
+    _STATIC_CACHE.clear(disk)
+
+
+def solve_static_equilibrium(
+    params: Dict[str, Any],
+    policy_t: Dict[str, Any],
+    max_iter: int = 200,
+    tol: Optional[float] = None,
+    solver: str = "newton",
+    init_prices: Optional[Dict[PriceKey, float]] = None,
+    fallback: bool = True,
+    sensitivities: Any = False,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Solve for prices, production, trade flows, and implied consumption given
+    parameters and a policy (tariffs + optional subsidies).
+
+    ``init_prices`` warm-starts the solver (e.g. the previous year's
+    ``result["prices"]``); otherwise prices start from ``base_price``.
+
+    Besides the equilibrium quantities the result reports ``converged``,
+    ``iterations``, ``max_gap`` (final max relative market-clearing gap)
+    and ``solver`` (the escalation stage that produced the answer).
+
+    ``sensitivities`` (``True`` or a subset of ``SENSITIVITY_PARAMS``) adds
+    ``result["sensitivities"][output][param]``: implicit-function-theorem
+    derivatives keyed ``(output_key, param_key)`` (just ``param_key`` for
+    ``gov_revenue``), with tariffs keyed ``(importer, chip, exporter)`` as
+    in the policy dict, subsidies/elasticities/shifters ``(region, chip)``
+    and sigma by chip.  Cross-chip entries are identically zero and left out.
+
+    Solves are memoized (``use_cache=False`` to bypass): the key hashes the
+    packed parameters, policy, warm start and solver options, so a hit
+    returns exactly what the solve would.
+    """
+    arrs = pack_params(params)
+    tau, subsidy = pack_policy(policy_t)
+    p0 = None
+    if init_prices is not None:
+        p0 = np.array([[init_prices[(i, s)] for s in config.CHIP_TYPES] for i in config.REGIONS], dtype=float)
+    res = key = None
+    if use_cache and _STATIC_CACHE.enabled:
+        names = tuple(_sensitivity_names(sensitivities)) if sensitivities else ()
+        key = static_solve_key(
+            dict(arrs, tau=tau, subsidy=subsidy, init_prices=p0),
+            (max_iter, tol, solver, fallback, names),
+        )
+        res = _STATIC_CACHE.get(key)
+    if res is None:
+        res = solve_static_arrays(
+            arrs, tau, subsidy, max_iter=max_iter, tol=tol, solver=solver, init_prices=p0, fallback=fallback,
+            sensitivities=sensitivities,
+        )
+        if key is not None:
+            _STATIC_CACHE.put(key, res)
+    result = {
+        "prices": _to_price_dict(res["prices"]),
+        "prices_with_tariff": _to_trade_dict(res["prices_with_tariff"]),
+        "consumption_price": _to_price_dict(res["consumption_price"]),
+        "Q_prod": _to_price_dict(res["Q_prod"]),
+        "Q_trade": _to_trade_dict(res["Q_trade"]),
+        "consumption": _to_price_dict(res["consumption"]),
+        "gov_revenue": float(res["gov_revenue"]),
+        "converged": res["converged"],
+        "iterations": res["iterations"],
+        "max_gap": res["max_gap"],
+        "solver": res["solver"],
+    }
+    if sensitivities:
+        result["sensitivities"] = _sensitivities_to_dict(res["sensitivities"])
+    return result
+
+
+def _keyed_entries(ndim: int) -> List[Tuple[Tuple[int, ...], Any, str]]:
+    """(array index, dict key, chip) for scalar, chip-, price- or trade-shaped arrays."""
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    if ndim == 0:
+        return [((), None, "")]
+    if ndim == 1:
+        return [((b,), s, s) for b, s in enumerate(chips)]
+    if ndim == 2:
+        return [((a, b), (r, s), s) for a, r in enumerate(regions) for b, s in enumerate(chips)]
+    return [((a, b, c), (i, j, s), s) for a, i in enumerate(regions) for b, j in enumerate(regions) for c, s in enumerate(chips)]
+
+
+def _sensitivities_to_dict(sens: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, Dict[str, Dict[Any, float]]]:
+    out_ndim = {"gov_revenue": 0, "prices_with_tariff": 3, "Q_trade": 3}
+    param_ndim = {"tau": 3, "sigma": 1}
+    result: Dict[str, Dict[str, Dict[Any, float]]] = {}
+    for field, by_param in sens.items():
+        result[field] = {}
+        out_entries = _keyed_entries(out_ndim.get(field, 2))
+        for name, arr in by_param.items():
+            entries = {}
+            for p_idx, p_key, p_chip in _keyed_entries(param_ndim.get(name, 2)):
+                if name == "tau":
+                    i, j, s = p_key
+                    if i == j:
+                        continue
+                    p_key = (j, s, i)   # policy-dict order (importer, chip, exporter)
+                for o_idx, o_key, o_chip in out_entries:
+                    if o_chip and o_chip != p_chip:
+                        continue
+                    value = float(arr[o_idx + p_idx])
+                    entries[p_key if o_key is None else (o_key, p_key)] = value
+            result[field][name] = entries
+    return result
+
+
+__all__ = [
+    "SENSITIVITY_OUTPUTS",
+    "SENSITIVITY_PARAMS",
+    "solve_static_equilibrium",
+    "solve_static_arrays",
+    "StaticSolveCache",
+    "configure_static_cache",
+    "static_cache_clear",
+    "static_cache_info",
+    "static_solve_key",
+    "solve_static_batch",
+    "pack_params",
+    "pack_policy",
+    "stack_params",
+    "stack_policies",
+]
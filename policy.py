@@ -1,114 +1,271 @@
 """
 Policy scenario definitions: tariff schedules, subsidies, and export-control
 proxies.
+
+Scenarios are declared as schedules: ordered lists of rules, each setting
+(or adding to) a block of the tariff or subsidy tensor along a step-function
+year path.  ``compile_scenario`` turns a scenario into dense arrays for all
+years at once:
+
+  tau[year, importer, chip, exporter]   ad-valorem tariffs
+  subsidy[year, region, chip]           production subsidy rates
+
+Indices follow ``config.REGIONS`` / ``config.CHIP_TYPES``.  Own-region
+tariffs are always zero.
 """
 
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 import config
 
 ScenarioName = str
 TariffKey = Tuple[str, str, str]  # (importer, chip_type, exporter)
+Path = Union[float, Dict[int, float]]  # constant, or {first_year: value} steps
+Selector = Union[None, str, Sequence[str]]  # None = all
+
 
+# ---------------------------------------------------------------------------
+# Schedule building blocks
+# ---------------------------------------------------------------------------
 
-def scenario_baseline(year: int) -> Dict[TariffKey, float]:
+def tariff_rule(path: Path, importer: Selector = None, chip: Selector = None, exporter: Selector = None, op: str = "set") -> Dict[str, Any]:
+    """Tariff rule on the (importer, chip, exporter) block; ``op`` is "set" or "add"."""
+    return {"path": path, "index": (importer, chip, exporter), "op": op}
+
+
+def subsidy_rule(path: Path, region: Selector = None, chip: Selector = None, op: str = "set") -> Dict[str, Any]:
+    """Production-subsidy rule on the (region, chip) block; ``op`` is "set" or "add"."""
+    return {"path": path, "index": (region, chip), "op": op}
+
+
+def linear_path(
+    first_year: int,
+    first_value: float,
+    slope: float,
+    cap: float = np.inf,
+    last_year: Optional[int] = None,
+) -> Dict[int, float]:
     """
-    Baseline: MFN=0 on chips, existing high-end embargo (approximated by a
-    prohibitive tariff on US->CN high-end).
+    Step path ``min(first_value + slope * (year - first_year), cap)`` for
+    ``first_year .. last_year`` (default: the last of ``config.SIM_YEARS``).
+    A rising path stops at the first year it reaches ``cap`` (the last step
+    holds); ``cap`` may be ``inf`` and ``slope`` negative (phase-downs).
     """
-    tau: Dict[TariffKey, float] = {}
-    for j in config.REGIONS:
-        for i in config.REGIONS:
-            if i == j:
-                continue
-            for s in config.CHIP_TYPES:
-                tau[(j, s, i)] = 0.0
-    tau[("CN", "H", "US")] = config.VERY_LARGE_TARIFF
-    return tau
-
-
-def scenario_tariff_only(year: int) -> Dict[TariffKey, float]:
+    if np.isnan(cap) or not np.isfinite(first_value) or not np.isfinite(slope):
+        raise ValueError("linear_path needs a finite first_value and slope and a non-NaN cap")
+    if last_year is None:
+        last_year = max(config.SIM_YEARS)
+    path: Dict[int, float] = {first_year: min(first_value, cap)}
+    if slope == 0:
+        return path
+    for year in range(first_year + 1, last_year + 1):
+        value = min(first_value + slope * (year - first_year), cap)
+        path[year] = value
+        if slope > 0 and value >= cap:
+            break
+    return path
+
+
+def _path_values(path: Path, years: Sequence[int]) -> np.ndarray:
     """
-    Reciprocal tariffs replace subsidies with an escalating path on US<->CN:
-      - 10% baseline on everyone
-      - US<->CN starts at 30% (2023/2024) and adds +10pp per year from 2025, capped at 80%
-      - Stronger friction intended to widen high-end tech gap under de-risking
+    Evaluate a path on ``years``.  A step takes effect in its year and holds
+    until the next one; years before the first step take the first value.
     """
-    tau: Dict[TariffKey, float] = {}
-    extra_cn = 0.20  # 20% means 30% total (base 10 + extra 20)
-    if year >= 2025:
-        extra_cn += 0.10 * (year - 2024)
-        extra_cn = min(extra_cn, 0.70)  # extra 70% + base 10% = 80% cap
-    for j in config.REGIONS:
-        for i in config.REGIONS:
-            if i == j:
-                continue
-            for s in config.CHIP_TYPES:
-                base = 0.10
-                extra = 0.0
-                if (j == "US" and i == "CN") or (j == "CN" and i == "US"):
-                    extra = extra_cn
-                tau[(j, s, i)] = base + extra
-    return tau
-
-
-def scenario_tariff_plus_subsidy(year: int) -> Dict[str, object]:
+    if not isinstance(path, dict):
+        return np.full(len(years), float(path))
+    steps = sorted(path.items())
+    step_years = np.array([y for y, _ in steps])
+    step_values = np.array([v for _, v in steps], dtype=float)
+    pos = np.searchsorted(step_years, np.asarray(years), side="right") - 1
+    return step_values[np.maximum(pos, 0)]
+
+
+def _select(selector: Selector, labels: List[str]) -> List[int]:
+    if selector is None:
+        return list(range(len(labels)))
+    if isinstance(selector, str):
+        selector = [selector]
+    return [labels.index(name) for name in selector]
+
+
+def _apply_rules(target: np.ndarray, rules: Iterable[Dict[str, Any]], years: Sequence[int], axes: Sequence[List[str]]) -> None:
+    year_idx = list(range(len(years)))
+    for rule in rules:
+        block = np.ix_(year_idx, *(_select(sel, labels) for sel, labels in zip(rule["index"], axes)))
+        values = _path_values(rule["path"], years).reshape((-1,) + (1,) * len(axes))
+        if rule["op"] == "set":
+            target[block] = values
+        elif rule["op"] == "add":
+            target[block] += values
+        else:
+            raise ValueError(f"Unknown rule op: {rule['op']!r}")
+
+
+# ---------------------------------------------------------------------------
+# Registry and compilation
+# ---------------------------------------------------------------------------
+
+SCENARIO_SCHEDULES: Dict[ScenarioName, Dict[str, Any]] = {}
+
+# Per-year view of each registered scenario: year -> {"tau": {...}, "subsidy": {...}}.
+SCENARIO_FUNC_MAP: Dict[ScenarioName, Callable[[int], Dict[str, Any]]] = {}
+
+
+def register_scenario(
+    name: ScenarioName,
+    tau: Iterable[Dict[str, Any]] = (),
+    subsidy: Iterable[Dict[str, Any]] = (),
+    description: str = "",
+) -> Dict[str, Any]:
     """
-    Keep subsidies and add moderate tariffs to China on mid/low-end imports.
+    Declare a scenario as tariff and subsidy rules, applied in order on top
+    of zero tariffs and zero subsidies.
     """
-    tau = scenario_baseline(year)
-    # Moderate tariff on CN mid/low, mild on high-end to reflect targeted friction
-    tau[("US", "H", "CN")] = 0.05
-    tau[("US", "M", "CN")] = 0.15
-    tau[("US", "L", "CN")] = 0.20
-    # Ramp subsidies over time to reflect CHIPS disbursement (stronger ramps for high-end)
-    if year >= 2027:
-        subsidy_h, subsidy_m = 0.15, 0.08
-    elif year >= 2025:
-        subsidy_h, subsidy_m = 0.12, 0.07
-    else:
-        subsidy_h, subsidy_m = 0.10, 0.06
-    subsidy: Dict[Tuple[str, str], float] = {("US", "H"): subsidy_h, ("US", "M"): subsidy_m}
-    return {"tau": tau, "subsidy": subsidy}
+    schedule = {"description": description, "tau": list(tau), "subsidy": list(subsidy)}
+    SCENARIO_SCHEDULES[name] = schedule
+    SCENARIO_FUNC_MAP[name] = partial(scenario_policy, name)
+    return schedule
+
+
+def _compile_callable(func: Callable[[int], Any], years: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    tau = np.zeros((len(years), len(regions), len(chips), len(regions)))
+    sub = np.zeros((len(years), len(regions), len(chips)))
+    for t, year in enumerate(years):
+        raw = func(year)
+        tau_d, sub_d = (raw["tau"], raw.get("subsidy", {})) if "tau" in raw else (raw, {})
+        for (j, s, i), v in tau_d.items():
+            tau[t, regions.index(j), chips.index(s), regions.index(i)] = v
+        for (i, s), v in sub_d.items():
+            sub[t, regions.index(i), chips.index(s)] = v
+    return tau, sub
 
 
-def scenario_diff_by_chip_type(year: int) -> Dict[TariffKey, float]:
+def compile_scenario(
+    scenario: Union[ScenarioName, Dict[str, Any], Callable[[int], Any]],
+    years: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
     """
-    Zero tariffs on high-end (preserve supply chains with allies), higher
-    tariffs on Chinese mid/low-end to strengthen legacy supply security.
+    Compile a registered scenario, an unregistered schedule (``{"tau":
+    rules, "subsidy": rules}``) or a legacy ``year -> policy dict`` function
+    into dense arrays over ``years`` (default ``SIM_YEARS``).
+
+    Returns ``{"years", "tau", "subsidy"}``; ``{"tau": tau[t], "subsidy":
+    subsidy[t]}`` is a valid ``policy_t`` for the static solver.
     """
-    tau: Dict[TariffKey, float] = {}
-    # Mid/low CN tariffs ramp from 10% -> 40% over time
-    if year >= 2027:
-        ramp = 0.30  # extra, base=0, so 30%
-    elif year >= 2025:
-        ramp = 0.20
+    years = list(config.SIM_YEARS if years is None else years)
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    if callable(scenario):
+        tau, sub = _compile_callable(scenario, years)
     else:
-        ramp = 0.10
-    if year >= 2029:
-        ramp = 0.40
-    for j in config.REGIONS:
-        for i in config.REGIONS:
-            if i == j:
-                continue
-            for s in config.CHIP_TYPES:
-                if s == "H":
-                    tau[(j, s, i)] = 0.0
-                else:
-                    extra = ramp if (j == "US" and i == "CN") else 0.0
-                    tau[(j, s, i)] = extra
-    return tau
-
-
-SCENARIO_FUNC_MAP = {
-    "baseline": scenario_baseline,
-    "tariff_only": scenario_tariff_only,
-    "tariff_plus_subsidy": scenario_tariff_plus_subsidy,
-    "diff_by_chip": scenario_diff_by_chip_type,
-    "subsidy_only": lambda year: scenario_tariff_plus_subsidy(year) | {"tau": scenario_baseline(year)},
-}
-
-
-__all__ = ["SCENARIO_FUNC_MAP"]
+        schedule = scenario if isinstance(scenario, dict) else SCENARIO_SCHEDULES[scenario]
+        tau = np.zeros((len(years), len(regions), len(chips), len(regions)))
+        sub = np.zeros((len(years), len(regions), len(chips)))
+        _apply_rules(tau, schedule.get("tau", ()), years, (regions, chips, regions))
+        _apply_rules(sub, schedule.get("subsidy", ()), years, (regions, chips))
+    own = np.arange(len(regions))
+    tau[:, own, :, own] = 0.0
+    return {"years": np.array(years), "tau": tau, "subsidy": sub}
+
+
+def scenario_policy(name: ScenarioName, year: int) -> Dict[str, Any]:
+    """Dict-form policy for one year: ``{"tau": {(j, s, i): ...}, "subsidy": {(i, s): ...}}``."""
+    compiled = compile_scenario(name, [year])
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    tau = {
+        (j, s, i): float(compiled["tau"][0, a, b, c])
+        for a, j in enumerate(regions)
+        for b, s in enumerate(chips)
+        for c, i in enumerate(regions)
+        if i != j
+    }
+    subsidy = {
+        (i, s): float(compiled["subsidy"][0, a, b])
+        for a, i in enumerate(regions)
+        for b, s in enumerate(chips)
+        if compiled["subsidy"][0, a, b] != 0.0
+    }
+    return {"tau": tau, "subsidy": subsidy}
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+# Existing high-end embargo, approximated by a prohibitive tariff on US->CN high-end.
+_EMBARGO_H = tariff_rule(config.VERY_LARGE_TARIFF, importer="CN", chip="H", exporter="US")
+
+# CHIPS disbursement ramps (stronger for high-end).
+_CHIPS_SUBSIDY = [
+    subsidy_rule({2023: 0.10, 2025: 0.12, 2027: 0.15}, region="US", chip="H"),
+    subsidy_rule({2023: 0.06, 2025: 0.07, 2027: 0.08}, region="US", chip="M"),
+]
+
+register_scenario(
+    "baseline",
+    tau=[_EMBARGO_H],
+    description="MFN=0 on chips plus the existing high-end embargo.",
+)
+
+register_scenario(
+    "tariff_only",
+    tau=[
+        tariff_rule(0.10),
+        # US<->CN: 30% in 2023/2024, +10pp per year from 2025, capped at 80%
+        tariff_rule(linear_path(2024, 0.20, 0.10, 0.70), importer="US", exporter="CN", op="add"),
+        tariff_rule(linear_path(2024, 0.20, 0.10, 0.70), importer="CN", exporter="US", op="add"),
+    ],
+    description=(
+        "Reciprocal tariffs replace subsidies: 10% on everyone and an escalating "
+        "US<->CN path; stronger friction widens the high-end tech gap."
+    ),
+)
+
+register_scenario(
+    "tariff_plus_subsidy",
+    tau=[
+        _EMBARGO_H,
+        # Moderate tariff on CN mid/low, mild on high-end to reflect targeted friction
+        tariff_rule(0.05, importer="US", chip="H", exporter="CN"),
+        tariff_rule(0.15, importer="US", chip="M", exporter="CN"),
+        tariff_rule(0.20, importer="US", chip="L", exporter="CN"),
+    ],
+    subsidy=_CHIPS_SUBSIDY,
+    description="Keep subsidies and add moderate tariffs to China on mid/low-end imports.",
+)
+
+register_scenario(
+    "diff_by_chip",
+    tau=[
+        # Zero on high-end; CN mid/low ramps 10% -> 40%
+        tariff_rule({2023: 0.10, 2025: 0.20, 2027: 0.30, 2029: 0.40}, importer="US", chip=["M", "L"], exporter="CN"),
+    ],
+    description=(
+        "Zero tariffs on high-end (preserve allied supply chains), higher tariffs "
+        "on Chinese mid/low-end to strengthen legacy supply security."
+    ),
+)
+
+register_scenario(
+    "subsidy_only",
+    tau=[_EMBARGO_H],
+    subsidy=_CHIPS_SUBSIDY,
+    description="Baseline tariffs with the CHIPS subsidy ramps.",
+)
+
+
+__all__ = [
+    "SCENARIO_FUNC_MAP",
+    "SCENARIO_SCHEDULES",
+    "compile_scenario",
+    "linear_path",
+    "register_scenario",
+    "scenario_policy",
+    "subsidy_rule",
+    "tariff_rule",
+]
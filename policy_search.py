@@ -0,0 +1,355 @@
+"""
+Policy search: parameterised US tariff/subsidy schedules optimised for the
+discounted objective of ``simulate``.
+
+A point in the search space sets
+
+  tariff.<partner>.<chip>   first-year US tariff on imports from partner
+  tariff_ramp               yearly increase of the tariffs on CN
+  tariff_cap                ceiling of the CN ramp (never below the first-year level)
+  subsidy.<chip>            first-year US production subsidy
+  subsidy_ramp              yearly increase of the US subsidies (capped at ``subsidy_cap``)
+
+``build_schedule`` turns it into policy rules (``policy.tariff_rule`` /
+``policy.subsidy_rule``), optionally keeping the existing high-end embargo
+and adding proportional Chinese retaliation.  ``optimize_policy`` screens a
+Latin hypercube of points and refines the best one with Nelder-Mead on the
+normalised box.  Constraints are floors on ``simulate.summarize_history``
+fields (e.g. ``{"SAF_H_min": 0.6, "Welfare_min": 4e12}``) enforced by a
+penalty.  Candidate points run as lockstep batches on a persistent process pool and
+each distinct point is simulated once.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from calibration import run_full_calibration
+from policy import subsidy_rule, tariff_rule
+from simulate import run_scenario, run_scenario_tasks, scenario_pool, summarize_history
+
+PARTNERS = [r for r in config.REGIONS if r != "US"]
+
+
+# ---------------------------------------------------------------------------
+# Search space and schedules
+# ---------------------------------------------------------------------------
+
+def _knob(name: str, low: float, high: float) -> Dict[str, Any]:
+    return {"name": name, "low": low, "high": high}
+
+
+def default_search_space(max_tariff: float = 0.6, max_subsidy: float = 0.2) -> List[Dict[str, Any]]:
+    """Tariff levels per partner and chip, CN ramp and cap, subsidy levels and ramp."""
+    space = [_knob(f"tariff.{p}.{s}", 0.0, max_tariff) for p in PARTNERS for s in config.CHIP_TYPES]
+    space += [_knob("tariff_ramp", 0.0, 0.15), _knob("tariff_cap", 0.0, 1.0)]
+    space += [_knob(f"subsidy.{s}", 0.0, max_subsidy) for s in config.CHIP_TYPES]
+    space.append(_knob("subsidy_ramp", 0.0, 0.03))
+    return space
+
+
+def _ramp(level: float, slope: float, cap: float, years: Sequence[int]) -> Dict[int, float]:
+    start = years[0]
+    top = max(cap, level)
+    return {year: min(level + slope * (year - start), top) for year in years}
+
+
+def build_schedule(
+    values: Dict[str, float],
+    embargo: bool = True,
+    retaliation: float = 0.0,
+    subsidy_cap: float = 0.3,
+    years: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Policy rules (``{"tau", "subsidy"}``, see ``policy.compile_scenario``)
+    for one point of the search space.  Missing knobs are zero.
+    ``retaliation`` sets CN tariffs on US imports to that fraction of the US
+    tariffs on CN; ``embargo`` keeps the prohibitive US->CN high-end tariff.
+    """
+    years = list(config.SIM_YEARS if years is None else years)
+    tariff_ramp = values.get("tariff_ramp", 0.0)
+    tariff_cap = values.get("tariff_cap", 0.0)
+    tau = []
+    for p in PARTNERS:
+        for s in config.CHIP_TYPES:
+            level = values.get(f"tariff.{p}.{s}", 0.0)
+            if p == "CN":
+                path = _ramp(level, tariff_ramp, tariff_cap, years)
+                tau.append(tariff_rule(path, importer="US", chip=s, exporter=p))
+                if retaliation:
+                    retaliated = {year: retaliation * v for year, v in path.items()}
+                    tau.append(tariff_rule(retaliated, importer="CN", chip=s, exporter="US"))
+            else:
+                tau.append(tariff_rule(level, importer="US", chip=s, exporter=p))
+    if embargo:
+        tau.append(tariff_rule(config.VERY_LARGE_TARIFF, importer="CN", chip="H", exporter="US"))
+    subsidy = [
+        subsidy_rule(_ramp(values.get(f"subsidy.{s}", 0.0), values.get("subsidy_ramp", 0.0), subsidy_cap, years), region="US", chip=s)
+        for s in config.CHIP_TYPES
+    ]
+    return {"tau": tau, "subsidy": subsidy}
+
+
+def _knob_values(unit: np.ndarray, space: Sequence[Dict[str, Any]]) -> Dict[str, float]:
+    return {k["name"]: k["low"] + float(u) * (k["high"] - k["low"]) for k, u in zip(space, unit)}
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+class _PolicyEvaluator:
+    """
+    Scores batches of unit-box points.  Distinct points are simulated once
+    (``cache`` maps a settings/point key to the run summary) and each batch
+    of new points runs as one lockstep batch (split over the persistent pool
+    when it is large).
+    """
+
+    def __init__(
+        self,
+        space: Sequence[Dict[str, Any]],
+        params: Dict[str, Any],
+        maps_scenario: str,
+        schedule_kwargs: Dict[str, Any],
+        constraints: Dict[str, float],
+        penalty: float,
+        workers: Optional[int],
+        cache: Dict[Any, Dict[str, float]],
+    ):
+        self.space = space
+        self.maps_scenario = maps_scenario
+        self.schedule_kwargs = schedule_kwargs
+        self.constraints = constraints
+        self.penalty = penalty
+        self.contexts = {"base": {"params": params}}
+        self.workers = config.SIM_WORKERS if workers is None else workers
+        self.pool = scenario_pool(self.contexts, self.workers)
+        self.cache = cache
+        self.settings = (maps_scenario, tuple(sorted(schedule_kwargs.items())), params["model_params"].fingerprint())
+        self.records: List[Dict[str, Any]] = []
+        self.n_runs = 0
+        self.n_hits = 0
+        try:
+            self.reference = self._run([{"context": "base", "scenario": maps_scenario, "summary": True}])[0]
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _run(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        self.n_runs += len(tasks)
+        return run_scenario_tasks(tasks, self.contexts, workers=self.workers, pool=self.pool, lockstep=True)
+
+    def violation(self, summary: Dict[str, float]) -> float:
+        """Sum of relative shortfalls below the constraint floors."""
+        total = 0.0
+        for key, floor in self.constraints.items():
+            scale = max(abs(floor), abs(self.reference[key]), config.EPS)
+            total += max(0.0, floor - summary[key]) / scale
+        return total
+
+    def __call__(self, points: np.ndarray) -> np.ndarray:
+        """Penalised objectives (to maximise) of unit-box ``points``."""
+        points = np.clip(np.atleast_2d(points), 0.0, 1.0)
+        values = [_knob_values(u, self.space) for u in points]
+        keys = [(self.settings, tuple(round(v, 12) for v in vals.values())) for vals in values]
+        todo: Dict[Any, Dict[str, float]] = {}
+        for key, vals in zip(keys, values):
+            if key not in self.cache and key not in todo:
+                todo[key] = vals
+        self.n_hits += len(keys) - len(todo)
+        tasks = [
+            {
+                "context": "base",
+                "scenario": self.maps_scenario,
+                "schedule": build_schedule(vals, **self.schedule_kwargs),
+                "summary": True,
+            }
+            for vals in todo.values()
+        ]
+        for key, summary in zip(todo, self._run(tasks) if tasks else []):
+            self.cache[key] = summary
+
+        scale = abs(self.reference["discounted_obj"]) + config.EPS
+        scores = np.empty(len(points))
+        for n, (key, vals) in enumerate(zip(keys, values)):
+            summary = self.cache[key]
+            violation = self.violation(summary)
+            scores[n] = summary["discounted_obj"] - self.penalty * scale * violation
+            self.records.append({**vals, **summary, "violation": violation, "score": scores[n]})
+        return scores
+
+
+# ---------------------------------------------------------------------------
+# Optimisers (maximise on the unit box)
+# ---------------------------------------------------------------------------
+
+def _latin_hypercube(n: int, d: int, rng: np.random.Generator) -> np.ndarray:
+    strata = np.argsort(rng.random((d, n)), axis=1).T
+    return (strata + rng.random((n, d))) / n
+
+
+def _nelder_mead(
+    score: Callable[[np.ndarray], np.ndarray],
+    x0: np.ndarray,
+    max_evals: int,
+    step: float = 0.15,
+    xatol: float = 1e-4,
+    fatol: float = 1e-8,
+) -> Tuple[np.ndarray, float, int]:
+    """
+    Nelder-Mead maximisation on [0, 1]^d with points clipped to the box.
+    The reflection, expansion and both contractions of an iteration are
+    scored as one batch so they run in parallel.  Returns ``(x, f,
+    n_points)``.
+    """
+    d = len(x0)
+    simplex = np.tile(np.clip(x0, 0.0, 1.0), (d + 1, 1))
+    for i in range(d):
+        simplex[i + 1, i] += step if simplex[i + 1, i] + step <= 1.0 else -step
+    f = score(simplex)
+    n_points = d + 1
+    while n_points < max_evals:
+        order = np.argsort(-f)
+        simplex, f = simplex[order], f[order]
+        spread_f = abs(f[0] - f[-1]) <= fatol * max(1.0, abs(f[0]))
+        if spread_f and np.abs(simplex[1:] - simplex[0]).max() <= xatol:
+            break
+        centroid = simplex[:-1].mean(axis=0)
+        direction = centroid - simplex[-1]
+        trial = np.clip(centroid + np.outer([1.0, 2.0, 0.5, -0.5], direction), 0.0, 1.0)
+        fr, fe, foc, fic = score(trial)
+        n_points += 4
+        if fr > f[0]:
+            simplex[-1], f[-1] = (trial[1], fe) if fe > fr else (trial[0], fr)
+        elif fr > f[-2]:
+            simplex[-1], f[-1] = trial[0], fr
+        elif fr > f[-1] and foc >= fr:
+            simplex[-1], f[-1] = trial[2], foc
+        elif fr <= f[-1] and fic > f[-1]:
+            simplex[-1], f[-1] = trial[3], fic
+        else:
+            simplex[1:] = simplex[0] + 0.5 * (simplex[1:] - simplex[0])
+            f[1:] = score(simplex[1:])
+            n_points += d
+    best = int(np.argmax(f))
+    return simplex[best], float(f[best]), n_points
+
+
+def optimize_policy(
+    space: Optional[List[Dict[str, Any]]] = None,
+    constraints: Optional[Dict[str, float]] = None,
+    method: str = "nelder-mead",
+    n_init: Optional[int] = None,
+    max_evals: int = 400,
+    x0: Optional[Dict[str, float]] = None,
+    maps_scenario: str = "baseline",
+    penalty: float = 10.0,
+    embargo: bool = True,
+    retaliation: float = 0.0,
+    subsidy_cap: float = 0.3,
+    seed: Optional[int] = 0,
+    workers: Optional[int] = None,
+    model_params: Optional[config.ModelParams] = None,
+    cache: Optional[Dict[Any, Dict[str, float]]] = None,
+) -> Dict[str, Any]:
+    """
+    Maximise ``discounted_obj`` over ``space`` (default
+    ``default_search_space()``) subject to ``constraints`` (summary field ->
+    floor).  A Latin hypercube of ``n_init`` points (default ``4 d``) is
+    screened in one parallel batch; ``method="nelder-mead"`` then refines the
+    best point (or ``x0``) for up to ``max_evals`` further points, while
+    ``method="random"`` stops after the screening.
+
+    Scenario maps (demand growth, tech feedback, R&D hits) are those of
+    ``maps_scenario``.  Violations are penalised by ``penalty`` times the
+    reference objective per unit of relative shortfall.  Pass a dict as
+    ``cache`` to share simulated points between calls.
+
+    Returns ``{"best", "schedule", "summary", "score", "feasible",
+    "reference", "history", "runs", "cache_hits"}``; ``reference`` is the
+    summary of the registered ``maps_scenario`` policy and ``history`` has
+    one row per scored point.
+    """
+    space = default_search_space() if space is None else space
+    constraints = dict(constraints or {})
+    d = len(space)
+    rng = np.random.default_rng(seed)
+    schedule_kwargs = {"embargo": embargo, "retaliation": retaliation, "subsidy_cap": subsidy_cap}
+    params = run_full_calibration(model_params)
+    evaluator = _PolicyEvaluator(
+        space, params, maps_scenario, schedule_kwargs, constraints, penalty, workers,
+        {} if cache is None else cache,
+    )
+    try:
+        n_init = 4 * d if n_init is None else n_init
+        points = _latin_hypercube(n_init, d, rng) if n_init else np.empty((0, d))
+        if x0 is not None:
+            start = np.array([(x0.get(k["name"], k["low"]) - k["low"]) / (k["high"] - k["low"]) for k in space])
+            points = np.vstack([start, points])
+        scores = evaluator(points) if len(points) else np.empty(0)
+        if len(points):
+            best_x, best_f = points[int(np.argmax(scores))], float(scores.max())
+        else:
+            best_x, best_f = np.full(d, 0.5), -np.inf
+        if method == "nelder-mead":
+            nm_x, nm_f, _ = _nelder_mead(evaluator, best_x, max_evals)
+            if nm_f >= best_f:
+                best_x, best_f = nm_x, nm_f
+        elif method != "random":
+            raise ValueError(f"Unknown method: {method!r}")
+        if not np.isfinite(best_f):
+            best_f = float(evaluator(best_x)[0])
+    finally:
+        evaluator.close()
+
+    best = _knob_values(np.clip(best_x, 0.0, 1.0), space)
+    key = (evaluator.settings, tuple(round(v, 12) for v in best.values()))
+    summary = evaluator.cache[key]
+    return {
+        "best": best,
+        "schedule": build_schedule(best, **schedule_kwargs),
+        "summary": summary,
+        "score": best_f,
+        "feasible": evaluator.violation(summary) == 0.0,
+        "reference": evaluator.reference,
+        "history": pd.DataFrame(evaluator.records),
+        "runs": evaluator.n_runs,
+        "cache_hits": evaluator.n_hits,
+    }
+
+
+__all__ = [
+    "PARTNERS",
+    "default_search_space",
+    "build_schedule",
+    "optimize_policy",
+]
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    base = summarize_history(run_scenario("baseline"))
+    constraints = {"SAF_H_min": base["SAF_H_min"], "Welfare_min": 0.95 * base["Welfare_min"]}
+    result = optimize_policy(constraints=constraints, workers=config.SIM_WORKERS)
+    print(f"Reference (baseline) discounted objective: {result['reference']['discounted_obj']:.4e}")
+    print(f"Optimised discounted objective: {result['summary']['discounted_obj']:.4e} (feasible: {result['feasible']})")
+    for name, value in result["best"].items():
+        print(f"  {name:>16s} = {value:.4f}")
+    print(f"{result['runs']} simulations, {result['cache_hits']} cache hits, {time.perf_counter() - start:.1f}s")
+    out = config.PROJECT_ROOT / "results" / "policy_search.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    result["history"].to_csv(out, index=False)
+    print(f"Search history saved to: {out}")
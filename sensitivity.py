@@ -0,0 +1,390 @@
+"""
+Global sensitivity analysis over the behavioural parameters and scenario
+maps: Morris elementary-effect screening and Sobol first/total-order indices
+(Saltelli design, Saltelli 2010 / Jansen estimators).
+
+Factors perturb the baseline multiplicatively ("scale") or additively
+("shift"):
+
+  sigma.<chip>               Armington elasticities (DEFAULT_SIGMA)
+  epsilon.<chip>             demand elasticities of all regions (DEFAULT_EPSILON)
+  supply_eta.<chip>          supply elasticities of all regions (DEFAULT_SUPPLY_ELASTICITY)
+  tech_progress_coef.<chip>  TECH_PROGRESS_COEF
+  tech_feedback_supply       TECH_FEEDBACK_SUPPLY
+  demand_growth.<scenario>   additive shift of the scenario's demand growth
+  rd_hit.<scenario>.<chip>   US R&D hit multipliers
+
+With ``per_region=True`` epsilon and supply_eta get one factor per
+(region, chip) cell.  Designs live on the unit hypercube; ``evaluate_design``
+maps them to parameters, calibrates every distinct parameter set in one
+batched solve and runs all scenarios of all samples through
+``simulate.run_scenario_tasks`` (process pool with ``workers > 1``).  Outputs
+per scenario are the discounted objective and final-year NSI and welfare.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from calibration import calibration_key, run_calibration_batch
+from policy import SCENARIO_SCHEDULES
+from simulate import DEFAULT_DEMAND_GROWTH, DEFAULT_RD_HIT, run_scenario_tasks
+
+OUTPUTS = ["discounted_obj", "NSI_final", "Welfare_final"]
+
+
+# ---------------------------------------------------------------------------
+# Factor space
+# ---------------------------------------------------------------------------
+
+def _factor(name: str, block: str, keys: Tuple[str, ...], kind: str, low: float, high: float) -> Dict[str, Any]:
+    return {"name": name, "block": block, "keys": keys, "kind": kind, "low": low, "high": high}
+
+
+def default_factors(
+    per_region: bool = False,
+    rel_range: float = 0.25,
+    feedback_range: float = 0.5,
+    growth_shift: float = 0.01,
+) -> List[Dict[str, Any]]:
+    """
+    Default factor space: multipliers in ``[1 - rel_range, 1 + rel_range]``
+    (``feedback_range`` for TECH_FEEDBACK_SUPPLY) and demand-growth shifts in
+    ``[-growth_shift, growth_shift]``.
+    """
+    lo, hi = 1.0 - rel_range, 1.0 + rel_range
+    factors = [_factor(f"sigma.{s}", "sigma", (s,), "scale", lo, hi) for s in config.CHIP_TYPES]
+    for block in ("epsilon", "supply_eta"):
+        if per_region:
+            factors += [
+                _factor(f"{block}.{i}.{s}", block, (i, s), "scale", lo, hi)
+                for i in config.REGIONS
+                for s in config.CHIP_TYPES
+            ]
+        else:
+            factors += [_factor(f"{block}.{s}", block, (s,), "scale", lo, hi) for s in config.CHIP_TYPES]
+    factors += [_factor(f"tech_progress_coef.{s}", "tech_progress_coef", (s,), "scale", lo, hi) for s in config.CHIP_TYPES]
+    factors.append(_factor("tech_feedback_supply", "tech_feedback_supply", (), "scale", 1.0 - feedback_range, 1.0 + feedback_range))
+    factors += [
+        _factor(f"demand_growth.{scen}", "demand_growth", (scen,), "shift", -growth_shift, growth_shift)
+        for scen in DEFAULT_DEMAND_GROWTH
+    ]
+    factors += [
+        _factor(f"rd_hit.{scen}.{chip}", "rd_hit", (scen, chip), "scale", lo, hi)
+        for scen, hits in DEFAULT_RD_HIT.items()
+        for chip in hits
+    ]
+    return factors
+
+
+def factor_values(unit: np.ndarray, factors: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Map unit-hypercube samples ``(n, k)`` to factor values."""
+    low = np.array([f["low"] for f in factors])
+    high = np.array([f["high"] for f in factors])
+    return low + np.asarray(unit) * (high - low)
+
+
+def _perturb(value: float, kind: str, x: float) -> float:
+    return value * x if kind == "scale" else value + x
+
+
+def sample_inputs(
+    values: Sequence[float],
+    factors: Sequence[Dict[str, Any]],
+    model_params: Optional[config.ModelParams] = None,
+) -> Tuple[config.ModelParams, Dict[str, float], Dict[str, Dict[str, float]]]:
+    """
+    Apply one sample of factor values to ``model_params`` and the default
+    scenario maps.  Returns ``(model_params, demand_growth_map, rd_hit_map)``.
+    """
+    base = model_params or config.default_model_params()
+    plain = base.to_dict()
+    demand_growth = dict(DEFAULT_DEMAND_GROWTH)
+    rd_hit = copy.deepcopy(DEFAULT_RD_HIT)
+    for f, x in zip(factors, values):
+        block, keys, kind = f["block"], f["keys"], f["kind"]
+        if block == "demand_growth":
+            demand_growth[keys[0]] = _perturb(demand_growth[keys[0]], kind, x)
+        elif block == "rd_hit":
+            scen, chip = keys
+            rd_hit[scen][chip] = _perturb(rd_hit[scen][chip], kind, x)
+        elif block == "tech_feedback_supply":
+            plain[block] = _perturb(plain[block], kind, x)
+        elif block in ("sigma", "tech_progress_coef"):
+            plain[block][keys[0]] = _perturb(plain[block][keys[0]], kind, x)
+        else:
+            # region x chip blocks: (chip,) perturbs the chip in every region
+            regions = [keys[0]] if len(keys) == 2 else config.REGIONS
+            for i in regions:
+                plain[block][i][keys[-1]] = _perturb(plain[block][i][keys[-1]], kind, x)
+    return config.ModelParams(**plain), demand_growth, rd_hit
+
+
+# ---------------------------------------------------------------------------
+# Designs (unit hypercube)
+# ---------------------------------------------------------------------------
+
+def morris_design(n_factors: int, n_trajectories: int = 10, levels: int = 4, seed: Optional[int] = 0) -> np.ndarray:
+    """
+    Morris one-at-a-time trajectories on a ``levels``-level grid with jump
+    ``levels / (2 (levels - 1))``.  Returns ``(n_trajectories * (k + 1), k)``;
+    consecutive rows of a trajectory differ in exactly one factor.
+    """
+    if levels < 2 or levels % 2:
+        raise ValueError("levels must be an even number >= 2")
+    rng = np.random.default_rng(seed)
+    k = n_factors
+    delta = levels / (2.0 * (levels - 1))
+    B = np.tril(np.ones((k + 1, k)), -1)
+    J = np.ones((k + 1, k))
+    starts = np.arange(levels // 2) / (levels - 1)
+    out = np.empty((n_trajectories, k + 1, k))
+    for r in range(n_trajectories):
+        x0 = rng.choice(starts, size=k)
+        D = np.diag(rng.choice([-1.0, 1.0], size=k))
+        P = np.eye(k)[rng.permutation(k)]
+        out[r] = (J * x0 + 0.5 * delta * ((2.0 * B - J) @ D + J)) @ P
+    return out.reshape(-1, k)
+
+
+def saltelli_design(n_factors: int, n_base: int = 64, seed: Optional[int] = 0, sampling: str = "random") -> np.ndarray:
+    """
+    Saltelli design ``[A; B; AB_1; ...; AB_k]`` of ``n_base * (k + 2)`` rows,
+    where ``AB_i`` is ``A`` with column ``i`` taken from ``B``.  ``sampling``
+    is "random" or "lhs" (Latin hypercube for ``A`` and ``B``).
+    """
+    rng = np.random.default_rng(seed)
+    k = n_factors
+    if sampling == "random":
+        AB = rng.random((n_base, 2 * k))
+    elif sampling == "lhs":
+        strata = np.argsort(rng.random((2 * k, n_base)), axis=1).T
+        AB = (strata + rng.random((n_base, 2 * k))) / n_base
+    else:
+        raise ValueError(f"Unknown sampling: {sampling!r}")
+    A, B = AB[:, :k], AB[:, k:]
+    blocks = [A, B]
+    for i in range(k):
+        ABi = A.copy()
+        ABi[:, i] = B[:, i]
+        blocks.append(ABi)
+    return np.vstack(blocks)
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def evaluate_design(
+    unit_samples: np.ndarray,
+    factors: Sequence[Dict[str, Any]],
+    scenarios: Optional[Sequence[str]] = None,
+    model_params: Optional[config.ModelParams] = None,
+    workers: Optional[int] = None,
+    lockstep: bool = True,
+) -> pd.DataFrame:
+    """
+    Run every scenario for every row of ``unit_samples``.  Returns one row
+    per sample with ``(scenario, output)`` MultiIndex columns over
+    ``OUTPUTS``.  With ``lockstep`` (default) the runs advance in batches
+    through ``simulate.run_scenarios_lockstep``.
+    """
+    scenarios = list(SCENARIO_SCHEDULES if scenarios is None else scenarios)
+    values = factor_values(unit_samples, factors)
+    inputs = [sample_inputs(row, factors, model_params) for row in values]
+
+    # Calibrate each distinct calibration input once, all in one batched
+    # solve; each task carries its full ModelParams for the simulation
+    keys = [calibration_key(mp) for mp, _, _ in inputs]
+    unique: Dict[str, config.ModelParams] = {}
+    for key, (mp, _, _) in zip(keys, inputs):
+        unique.setdefault(key, mp)
+    calibrated = run_calibration_batch(list(unique.values()))
+    contexts = {key: {"params": params} for key, params in zip(unique, calibrated)}
+
+    tasks = [
+        {
+            "context": key,
+            "scenario": scen,
+            "demand_growth_map": demand_growth,
+            "rd_hit_map": rd_hit,
+            "model_params": mp,
+            "summary": True,
+        }
+        for key, (mp, demand_growth, rd_hit) in zip(keys, inputs)
+        for scen in scenarios
+    ]
+    summaries = run_scenario_tasks(tasks, contexts, workers, lockstep=lockstep)
+    data = np.array([[summ[out] for out in OUTPUTS] for summ in summaries]).reshape(len(inputs), -1)
+    columns = pd.MultiIndex.from_product([scenarios, OUTPUTS], names=["scenario", "output"])
+    return pd.DataFrame(data, columns=columns)
+
+
+# ---------------------------------------------------------------------------
+# Indices
+# ---------------------------------------------------------------------------
+
+def _long_table(outputs: pd.DataFrame, factors: Sequence[Dict[str, Any]], stats: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Stack ``stats[name][factor, column]`` into rows (scenario, output, factor)."""
+    rows = []
+    for c, col in enumerate(outputs.columns):
+        scen, out = col if isinstance(col, tuple) else ("", col)
+        for f, factor in enumerate(factors):
+            row = {"scenario": scen, "output": out, "factor": factor["name"]}
+            row.update({name: float(arr[f, c]) for name, arr in stats.items()})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def morris_indices(unit_samples: np.ndarray, outputs: pd.DataFrame, factors: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Morris statistics per (scenario, output, factor): mean elementary effect
+    ``mu``, mean absolute effect ``mu_star`` and its spread ``sigma``.
+    Effects are per unit of the normalised factor range.
+    """
+    k = len(factors)
+    X = np.asarray(unit_samples).reshape(-1, k + 1, k)
+    Y = outputs.to_numpy().reshape(X.shape[0], k + 1, -1)
+    dX = np.diff(X, axis=1)  # (r, k, k): one non-zero per step
+    moved = np.abs(dX).argmax(axis=2)  # factor moved at each step
+    step = np.take_along_axis(dX, moved[..., None], axis=2)
+    ee_steps = np.diff(Y, axis=1) / step  # (r, k, n_out)
+    order = np.argsort(moved, axis=1)
+    ee = np.take_along_axis(ee_steps, order[..., None], axis=1)  # (r, factor, n_out)
+    ddof = 1 if X.shape[0] > 1 else 0
+    stats = {
+        "mu": ee.mean(axis=0),
+        "mu_star": np.abs(ee).mean(axis=0),
+        "sigma": ee.std(axis=0, ddof=ddof),
+    }
+    return _long_table(outputs, factors, stats)
+
+
+def _sobol_estimates(fA: np.ndarray, fB: np.ndarray, fAB: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """First/total-order estimates; ``fA``/``fB`` are ``(..., N, m)``, ``fAB`` ``(k, ..., N, m)``."""
+    var = np.concatenate([fA, fB], axis=-2).var(axis=-2)
+    var = np.where(var > 0, var, np.nan)
+    S1 = (fB * (fAB - fA)).mean(axis=-2) / var
+    ST = 0.5 * ((fA - fAB) ** 2).mean(axis=-2) / var
+    return S1, ST
+
+
+def sobol_indices(
+    outputs: pd.DataFrame,
+    factors: Sequence[Dict[str, Any]],
+    n_boot: int = 200,
+    conf_level: float = 0.95,
+    seed: Optional[int] = 0,
+) -> pd.DataFrame:
+    """
+    First-order (``S1``) and total-order (``ST``) Sobol indices from the
+    outputs of a ``saltelli_design``, with bootstrap confidence half-widths
+    (``S1_conf``, ``ST_conf``) at ``conf_level``.
+    """
+    k = len(factors)
+    Y = outputs.to_numpy()
+    N = Y.shape[0] // (k + 2)
+    if N * (k + 2) != Y.shape[0]:
+        raise ValueError("outputs do not match a Saltelli design for these factors")
+    blocks = Y.reshape(k + 2, N, -1)
+    fA, fB, fAB = blocks[0], blocks[1], blocks[2:]
+    S1, ST = _sobol_estimates(fA, fB, fAB)
+    stats = {"S1": S1, "ST": ST}
+    if n_boot:
+        rng = np.random.default_rng(seed)
+        idx = rng.integers(0, N, size=(n_boot, N))
+        S1_b, ST_b = _sobol_estimates(fA[idx], fB[idx], fAB[:, idx])
+        lo, hi = np.nanpercentile(S1_b, [50 * (1 - conf_level), 50 * (1 + conf_level)], axis=1)
+        stats["S1_conf"] = (hi - lo) / 2
+        lo, hi = np.nanpercentile(ST_b, [50 * (1 - conf_level), 50 * (1 + conf_level)], axis=1)
+        stats["ST_conf"] = (hi - lo) / 2
+    return _long_table(outputs, factors, stats)
+
+
+# ---------------------------------------------------------------------------
+# Drivers
+# ---------------------------------------------------------------------------
+
+def run_morris(
+    factors: Optional[List[Dict[str, Any]]] = None,
+    n_trajectories: int = 10,
+    levels: int = 4,
+    seed: Optional[int] = 0,
+    scenarios: Optional[Sequence[str]] = None,
+    model_params: Optional[config.ModelParams] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Morris screening: ``n_trajectories * (k + 1)`` samples, each run for all
+    scenarios.  Returns ``{"factors", "samples", "outputs", "indices"}``.
+    """
+    factors = default_factors() if factors is None else factors
+    samples = morris_design(len(factors), n_trajectories, levels, seed)
+    outputs = evaluate_design(samples, factors, scenarios, model_params, workers)
+    return {"factors": factors, "samples": samples, "outputs": outputs, "indices": morris_indices(samples, outputs, factors)}
+
+
+def run_sobol(
+    factors: Optional[List[Dict[str, Any]]] = None,
+    n_base: int = 64,
+    seed: Optional[int] = 0,
+    sampling: str = "random",
+    n_boot: int = 200,
+    scenarios: Optional[Sequence[str]] = None,
+    model_params: Optional[config.ModelParams] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Sobol analysis on a Saltelli design: ``n_base * (k + 2)`` samples, each
+    run for all scenarios.  Returns ``{"factors", "samples", "outputs",
+    "indices"}``.
+    """
+    factors = default_factors() if factors is None else factors
+    samples = saltelli_design(len(factors), n_base, seed, sampling)
+    outputs = evaluate_design(samples, factors, scenarios, model_params, workers)
+    return {
+        "factors": factors,
+        "samples": samples,
+        "outputs": outputs,
+        "indices": sobol_indices(outputs, factors, n_boot=n_boot, seed=seed),
+    }
+
+
+__all__ = [
+    "OUTPUTS",
+    "default_factors",
+    "factor_values",
+    "sample_inputs",
+    "morris_design",
+    "saltelli_design",
+    "evaluate_design",
+    "morris_indices",
+    "sobol_indices",
+    "run_morris",
+    "run_sobol",
+]
+
+
+if __name__ == "__main__":
+    import time
+
+    out_dir = config.PROJECT_ROOT / "results" / "sensitivity"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    morris = run_morris(n_trajectories=10)
+    morris["indices"].to_csv(out_dir / "morris_indices.csv", index=False)
+    print(f"Morris: {len(morris['samples'])} samples in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    sobol = run_sobol(n_base=64)
+    sobol["indices"].to_csv(out_dir / "sobol_indices.csv", index=False)
+    print(f"Sobol: {len(sobol['samples'])} samples in {time.perf_counter() - start:.1f}s")
+    top = sobol["indices"].sort_values("ST", ascending=False).groupby(["scenario", "output"]).head(3)
+    print(top.to_string(index=False))
+    print(f"Indices saved to: {out_dir}")
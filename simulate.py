@@ -5,15 +5,17 @@ collect welfare / national security trajectories.
 
 from __future__ import annotations
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import copy
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 import config
 from calibration import run_full_calibration
-from model_static import solve_static_equilibrium
+from model_static import pack_params, pack_policy, solve_static_batch, solve_static_equilibrium, stack_params
 from model_dynamic import (
     compute_sales,
     update_rd_and_tech,
@@ -22,10 +24,37 @@ from model_dynamic import (
     compute_national_security_index,
     compute_welfare,
 )
-from policy import SCENARIO_FUNC_MAP
+from policy import SCENARIO_SCHEDULES, compile_scenario
 from analysis_plots import save_all_plots
 
 
+# Default scenario maps used when ``run_scenario_with_maps`` gets ``None``.
+# Annual demand growth per scenario.
+DEFAULT_DEMAND_GROWTH: Dict[str, float] = {
+    "baseline": 0.02,
+    "tariff_only": 0.0,
+    "tariff_plus_subsidy": 0.025,
+    "diff_by_chip": 0.012,
+    "subsidy_only": 0.03,
+}
+# Tech feedback scaling per scenario (amplify penalties/bonuses for separation).
+DEFAULT_TECH_FEEDBACK: Dict[str, float] = {
+    "baseline": 1.0,
+    "tariff_only": 3.0,
+    "tariff_plus_subsidy": 0.9,
+    "diff_by_chip": 1.0,
+    "subsidy_only": 1.4,
+}
+# Multipliers on US R&D spending by chip type.
+DEFAULT_RD_HIT: Dict[str, Dict[str, float]] = {
+    "tariff_only": {"H": 0.2, "M": 0.6},
+    "tariff_plus_subsidy": {"H": 1.40, "M": 1.15},
+    "diff_by_chip": {"H": 0.85, "M": 0.90},
+    "subsidy_only": {"H": 1.25, "M": 1.10},
+    "baseline": {},
+}
+
+
 def run_scenario(scenario_name: str) -> Dict[str, Any]:
     return run_scenario_with_maps(
         scenario_name,
@@ -40,8 +69,24 @@ def run_scenario_with_maps(
     demand_growth_map: Optional[Dict[str, float]],
     tech_feedback_map: Optional[Dict[str, float]],
     rd_hit_map: Optional[Dict[str, Dict[str, float]]],
+    params: Optional[Dict[str, Any]] = None,
+    model_params: Optional[config.ModelParams] = None,
+    schedule: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    params = run_full_calibration()
+    """
+    Run one scenario over SIM_YEARS.  ``params`` are calibrated parameters
+    (``run_full_calibration(model_params)`` when omitted); they are not
+    modified.  Behavioural parameters (phi, tech feedback, default demand
+    growth) come from ``params["model_params"]``, never from ``config``
+    globals, so independent runs do not interfere.
+
+    ``schedule`` (tariff/subsidy rules, see ``policy.compile_scenario``)
+    replaces the registered policy of ``scenario_name``; the scenario maps
+    are still looked up by ``scenario_name``.
+    """
+    if params is None:
+        params = run_full_calibration(model_params)
+    mp = params.get("model_params") or config.default_model_params()
     state_T = params["tech_initial"]
     rd_intensity = params["rd_intensity"]
     gamma_curr = params["gamma"].copy()
@@ -59,42 +104,30 @@ def run_scenario_with_maps(
         "us_prod": [],
         "us_import_cn": [],
         "us_import_cn_share": [],
+        "solver_iterations": [],
+        "solver_converged": [],
+        "solver_max_gap": [],
+        "solver": [],
     }
 
-    scenario_func = SCENARIO_FUNC_MAP[scenario_name]
+    # Tariff/subsidy tensors for every simulated year, compiled once
+    schedule = compile_scenario(scenario_name if schedule is None else schedule, config.SIM_YEARS)
     discounted_obj = 0.0
 
     # Scenario-specific demand growth and tech feedback multipliers
-    default_dg = {
-        "baseline": 0.02,
-        "tariff_only": 0.0,
-        "tariff_plus_subsidy": 0.025,
-        "diff_by_chip": 0.012,
-        "subsidy_only": 0.03,
-    }
-    # tech feedback scaling per scenario (amplify penalties/bonuses for separation)
-    default_tf = {
-        "baseline": 1.0,
-        "tariff_only": 3.0,
-        "tariff_plus_subsidy": 0.9,
-        "diff_by_chip": 1.0,
-        "subsidy_only": 1.4,
-    }
-    demand_growth_map = demand_growth_map or default_dg
-    tech_feedback_map = tech_feedback_map or default_tf
+    demand_growth_map = demand_growth_map or DEFAULT_DEMAND_GROWTH
+    tech_feedback_map = tech_feedback_map or DEFAULT_TECH_FEEDBACK
+    rd_map = rd_hit_map or DEFAULT_RD_HIT
 
-    demand_growth = demand_growth_map.get(scenario_name, config.DEMAND_GROWTH_RATE)
+    demand_growth = demand_growth_map.get(scenario_name, mp.demand_growth_rate)
     tech_feedback_scale = tech_feedback_map.get(scenario_name, 1.0)
 
+    # Warm start: each year's equilibrium starts from last year's prices
+    prev_prices = None
+
     for t_idx, year in enumerate(config.SIM_YEARS):
-        policy_raw = scenario_func(year)
-        if isinstance(policy_raw, dict) and "tau" in policy_raw:
-            tau = policy_raw["tau"]
-            subsidy = policy_raw.get("subsidy", {})
-        else:
-            tau = policy_raw
-            subsidy = {}
-        policy_t = {"tau": tau, "subsidy": subsidy}
+        subsidy = schedule["subsidy"][t_idx]
+        policy_t = {"tau": schedule["tau"][t_idx], "subsidy": subsidy}
 
         # Apply demand growth for current year
         growth = 1.0 + demand_growth
@@ -105,25 +138,19 @@ def run_scenario_with_maps(
         params_year["gamma"] = gamma_curr
         params_year["A"] = A_curr
 
-        static_result = solve_static_equilibrium(params_year, policy_t)
+        static_result = solve_static_equilibrium(params_year, policy_t, init_prices=prev_prices)
         prices = static_result["prices"]
+        prev_prices = prices
         Q_prod = static_result["Q_prod"]
         Q_trade = static_result["Q_trade"]
         Q_cons = static_result["consumption"]
 
         sales = compute_sales(prices, Q_prod)
-        rd_tech = update_rd_and_tech(state_T, sales, rd_intensity)
+        rd_tech = update_rd_and_tech(state_T, sales, rd_intensity, tech_progress_coef=mp.tech_progress_coef)
         state_T = rd_tech["T"]
         RD_t = rd_tech["RD"]
 
         # Scenario-specific RD adjustment from map
-        rd_map = rd_hit_map or {
-            "tariff_only": {"H": 0.2, "M": 0.6},
-            "tariff_plus_subsidy": {"H": 1.40, "M": 1.15},
-            "diff_by_chip": {"H": 0.85, "M": 0.90},
-            "subsidy_only": {"H": 1.25, "M": 1.10},
-            "baseline": {},
-        }
         if scenario_name in rd_map:
             for chip, mult in rd_map[scenario_name].items():
                 key = ("US", chip)
@@ -135,7 +162,11 @@ def run_scenario_with_maps(
         NSI_t = compute_national_security_index(SAF, gap_H)
 
         rd_cost = sum(RD_t.values())
-        subsidy_cost = sum(subsidy.get((i, s), 0.0) * Q_prod[(i, s)] for (i, s) in Q_prod)
+        subsidy_cost = float(sum(
+            subsidy[a, b] * Q_prod[(i, s)]
+            for a, i in enumerate(config.REGIONS)
+            for b, s in enumerate(config.CHIP_TYPES)
+        ))
         W_t = compute_welfare(static_result, params["epsilon"], params["supply_eta"], subsidy_cost, rd_cost)
 
         Obj_t = W_t + config.SECURITY_VS_WELFARE * NSI_t
@@ -158,12 +189,16 @@ def run_scenario_with_maps(
         history["us_prod"].append(us_prod)
         history["us_import_cn"].append(us_import_cn)
         history["us_import_cn_share"].append(us_import_cn_share)
+        history["solver_iterations"].append(static_result["iterations"])
+        history["solver_converged"].append(static_result["converged"])
+        history["solver_max_gap"].append(static_result["max_gap"])
+        history["solver"].append(static_result["solver"])
 
         # Update supply shifters for next year based on tech progress
         gamma_next = {}
         for (i, s), g in gamma_curr.items():
             ratio = state_T[(i, s)] / (prev_T[(i, s)] + config.EPS)
-            mult = 1.0 + tech_feedback_scale * config.TECH_FEEDBACK_SUPPLY * (ratio - 1.0)
+            mult = 1.0 + tech_feedback_scale * mp.tech_feedback_supply * (ratio - 1.0)
             gamma_next[(i, s)] = g * mult
         gamma_curr = gamma_next
         prev_T = state_T.copy()
@@ -172,14 +207,330 @@ def run_scenario_with_maps(
     return history
 
 
-def run_all_scenarios() -> Dict[str, Any]:
-    results = {}
-    for scen in SCENARIO_FUNC_MAP.keys():
-        results[scen] = run_scenario(scen)
-    return results
+# ---------------------------------------------------------------------------
+# Lockstep engine: many runs advanced together on a batch axis
+# ---------------------------------------------------------------------------
+
+def _region_chip_array(d: Dict[Any, Any]) -> np.ndarray:
+    """(R, S) array from ``{(region, chip): v}`` or ``{region: {chip: v}}``."""
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    if isinstance(next(iter(d)), tuple):
+        return np.array([[d[(i, s)] for s in chips] for i in regions], dtype=float)
+    return np.array([[d[i][s] for s in chips] for i in regions], dtype=float)
+
+
+def _task_params(task: Dict[str, Any], contexts: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """The task's context params, with the task's own ``model_params`` attached when it carries one."""
+    params = contexts[task["context"]]["params"]
+    if task.get("model_params") is not None:
+        params = dict(params, model_params=task["model_params"])
+    return params
+
+
+def _lockstep_members(tasks: List[Dict[str, Any]], contexts: Dict[str, Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Stack the per-run inputs of ``tasks`` along a leading batch axis."""
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    us = regions.index("US")
+    packed: Dict[str, Dict[str, np.ndarray]] = {}
+    compiled: Dict[str, Dict[str, Any]] = {}
+    cols: Dict[str, List[Any]] = {k: [] for k in ("arrs", "tau", "subsidy", "growth", "kappa", "rd_mult", "rho", "phi", "T")}
+    for task in tasks:
+        name, scen = task["context"], task["scenario"]
+        params = _task_params(task, contexts)
+        mp = params.get("model_params") or config.default_model_params()
+        if name not in packed:
+            packed[name] = pack_params(params)
+        if task.get("schedule") is not None:
+            schedule = compile_scenario(task["schedule"], config.SIM_YEARS)
+        else:
+            if scen not in compiled:
+                compiled[scen] = compile_scenario(scen, config.SIM_YEARS)
+            schedule = compiled[scen]
+        demand_growth_map = task.get("demand_growth_map") or DEFAULT_DEMAND_GROWTH
+        tech_feedback_map = task.get("tech_feedback_map") or DEFAULT_TECH_FEEDBACK
+        rd_map = task.get("rd_hit_map") or DEFAULT_RD_HIT
+        rd_mult = np.ones((len(regions), len(chips)))
+        for chip, mult in rd_map.get(scen, {}).items():
+            rd_mult[us, chips.index(chip)] = mult
+
+        cols["arrs"].append(packed[name])
+        cols["tau"].append(schedule["tau"])
+        cols["subsidy"].append(schedule["subsidy"])
+        cols["growth"].append(demand_growth_map.get(scen, mp.demand_growth_rate))
+        cols["kappa"].append(tech_feedback_map.get(scen, 1.0) * mp.tech_feedback_supply)
+        cols["rd_mult"].append(rd_mult)
+        cols["rho"].append(_region_chip_array(params["rd_intensity"]))
+        cols["phi"].append([mp.tech_progress_coef[s] for s in chips])
+        cols["T"].append(_region_chip_array(params["tech_initial"]))
+    members = {k: np.array(v, dtype=float) for k, v in cols.items() if k != "arrs"}
+    members["arrs"] = stack_params(cols["arrs"])
+    return members
+
+
+def run_scenarios_lockstep(tasks: List[Dict[str, Any]], contexts: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run scenario tasks (see ``run_scenario_tasks``) in lockstep: the state
+    of every run (``T``, ``RD``, ``gamma``, ``A``, previous ``T``) is an array
+    with a leading batch axis, each year is one batched static solve for all
+    runs, and the R&D/technology, NSI and welfare updates are vectorized.
+    Runs may mix scenarios, schedules, scenario maps and calibrations.
+
+    Returns per task the same history as ``run_scenario_with_maps`` (or its
+    ``summarize_history`` for ``"summary"`` tasks), equal to the one-by-one
+    runs up to floating-point summation order.
+    """
+    if not tasks:
+        return []
+    regions, chips = config.REGIONS, config.CHIP_TYPES
+    us, cn, h = regions.index("US"), regions.index("CN"), chips.index("H")
+    K = len(tasks)
+    m = _lockstep_members(tasks, contexts)
+    arrs = m["arrs"]
+    gamma, A = arrs["gamma"].copy(), arrs["A"].copy()
+    T_prev = m["T"]
+    eps, eta = arrs["epsilon"], arrs["supply_eta"]
+    cs_weight = np.where(eps > 1, 1.0 / np.where(eps > 1, eps - 1.0, 1.0), 0.0)
+    ps_weight = eta / (eta + 1.0)
+    w_sec = np.array([config.SECURITY_WEIGHTS[s] for s in chips])
+
+    years = list(config.SIM_YEARS)
+    n_years = len(years)
+    track = {k: np.empty((n_years, K)) for k in ("NSI", "Welfare", "Obj_t", "gap_H")}
+    track_T = np.empty((n_years, K, len(regions), len(chips)))
+    track_s = {k: np.empty((n_years, K, len(chips))) for k in ("security", "us_prod", "us_import_cn", "us_import_cn_share")}
+    solver_info: List[Dict[str, Any]] = []
+    discounted_obj = np.zeros(K)
+    prev_prices = None
+    for t in range(n_years):
+        A = A * (1.0 + m["growth"])[:, None, None]
+        tau_t, sub_t = pack_policy({"tau": m["tau"][:, t], "subsidy": m["subsidy"][:, t]})
+        res = solve_static_batch(dict(arrs, gamma=gamma, A=A), tau_t, sub_t, init_prices=prev_prices)
+        p, Q, f, C, P = res["prices"], res["Q_prod"], res["Q_trade"], res["consumption"], res["consumption_price"]
+        prev_prices = p
+
+        sales = p * Q
+        RD = m["rho"] * sales
+        world = sales.sum(axis=1, keepdims=True) + config.EPS
+        T = T_prev * (1.0 + m["phi"][:, None, :] * RD / world)
+        RD = RD * m["rd_mult"]
+
+        saf = 1.0 - f[:, cn, us, :] / C[:, us, :]
+        gap = np.log((T[:, us, h] + config.EPS) / (T[:, cn, h] + config.EPS))
+        nsi = saf @ w_sec + config.TECH_GAP_WEIGHT * gap
+        welfare = (
+            (cs_weight * C * P).sum(axis=(1, 2))
+            + (ps_weight * p * Q).sum(axis=(1, 2))
+            + res["gov_revenue"]
+            - (sub_t * Q).sum(axis=(1, 2))
+            - RD.sum(axis=(1, 2))
+        )
+        obj_t = welfare + config.SECURITY_VS_WELFARE * nsi
+        discounted_obj += (config.DISCOUNT ** t) * obj_t
+
+        track["NSI"][t], track["Welfare"][t], track["Obj_t"][t], track["gap_H"][t] = nsi, welfare, obj_t, gap
+        track_T[t] = T
+        track_s["security"][t] = saf
+        track_s["us_prod"][t] = Q[:, us]
+        track_s["us_import_cn"][t] = f[:, cn, us]
+        track_s["us_import_cn_share"][t] = f[:, cn, us] / C[:, us]
+        solver_info.append(res)
+
+        gamma = gamma * (1.0 + m["kappa"][:, None, None] * (T / (T_prev + config.EPS) - 1.0))
+        T_prev = T
+
+    def by_chip(arr: np.ndarray, k: int) -> List[Dict[str, float]]:
+        return [{s: float(arr[t, k, b]) for b, s in enumerate(chips)} for t in range(n_years)]
+
+    out: List[Dict[str, Any]] = []
+    for k, task in enumerate(tasks):
+        if task.get("summary"):
+            out.append({
+                "discounted_obj": float(discounted_obj[k]),
+                "NSI_final": float(track["NSI"][-1, k]),
+                "Welfare_final": float(track["Welfare"][-1, k]),
+                "Welfare_min": float(track["Welfare"][:, k].min()),
+                "SAF_H_final": float(track_s["security"][-1, k, h]),
+                "SAF_H_min": float(track_s["security"][:, k, h].min()),
+            })
+            continue
+        out.append({
+            "year": years,
+            "NSI": [float(v) for v in track["NSI"][:, k]],
+            "Welfare": [float(v) for v in track["Welfare"][:, k]],
+            "Obj_t": [float(v) for v in track["Obj_t"][:, k]],
+            "T": [
+                {(i, s): float(track_T[t, k, a, b]) for a, i in enumerate(regions) for b, s in enumerate(chips)}
+                for t in range(n_years)
+            ],
+            "security": by_chip(track_s["security"], k),
+            "gap_H": [float(v) for v in track["gap_H"][:, k]],
+            "us_prod": by_chip(track_s["us_prod"], k),
+            "us_import_cn": by_chip(track_s["us_import_cn"], k),
+            "us_import_cn_share": by_chip(track_s["us_import_cn_share"], k),
+            "solver_iterations": [int(r["iterations"][k]) for r in solver_info],
+            "solver_converged": [bool(r["converged"][k]) for r in solver_info],
+            "solver_max_gap": [float(r["max_gap"][k]) for r in solver_info],
+            "solver": [r["solver"][k] for r in solver_info],
+            "discounted_obj": float(discounted_obj[k]),
+        })
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Scenario execution (serial or process pool)
+# ---------------------------------------------------------------------------
+
+# Per-process execution contexts: name -> {"params": calibrated params}.
+# Set once per worker by the pool initializer so calibrated parameters are
+# shipped a single time rather than with every task.
+_WORKER_CONTEXTS: Dict[str, Dict[str, Any]] = {}
+
+
+def _init_worker(contexts: Dict[str, Dict[str, Any]]) -> None:
+    _WORKER_CONTEXTS.clear()
+    _WORKER_CONTEXTS.update(contexts)
+
+
+def summarize_history(history: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Headline outputs of one scenario run: discounted objective, final NSI
+    and welfare, and the worst yearly welfare and high-end supply security.
+    """
+    saf_h = [saf.get("H", 0.0) for saf in history["security"]]
+    return {
+        "discounted_obj": float(history["discounted_obj"]),
+        "NSI_final": float(history["NSI"][-1]),
+        "Welfare_final": float(history["Welfare"][-1]),
+        "Welfare_min": float(min(history["Welfare"])),
+        "SAF_H_final": float(saf_h[-1]),
+        "SAF_H_min": float(min(saf_h)),
+    }
+
+
+# Runs per lockstep batch (bounds memory of the stacked state)
+LOCKSTEP_CHUNK = 512
+# Smaller batches are not worth shipping to worker processes
+LOCKSTEP_MIN_CHUNK = 64
+
+
+def _run_lockstep_chunk(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return run_scenarios_lockstep(tasks, _WORKER_CONTEXTS)
+
+
+def _run_lockstep_tasks(
+    tasks: List[Dict[str, Any]],
+    contexts: Dict[str, Dict[str, Any]],
+    workers: int,
+    pool: Optional[ProcessPoolExecutor],
+) -> List[Dict[str, Any]]:
+    """
+    Lockstep batches of ``LOCKSTEP_MIN_CHUNK`` to ``LOCKSTEP_CHUNK`` runs,
+    spread over the workers; a single batch runs in-process.
+    """
+    if pool is None and workers <= 1:
+        size = LOCKSTEP_CHUNK
+    else:
+        size = min(LOCKSTEP_CHUNK, max(LOCKSTEP_MIN_CHUNK, -(-len(tasks) // max(workers, 1))))
+    chunks = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+    if (pool is None and workers <= 1) or len(chunks) <= 1:
+        results = [run_scenarios_lockstep(chunk, contexts) for chunk in chunks]
+    elif pool is not None:
+        results = list(pool.map(_run_lockstep_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(contexts,)) as executor:
+            results = list(executor.map(_run_lockstep_chunk, chunks))
+    return [r for chunk in results for r in chunk]
+
+
+def _run_task(task: Dict[str, Any], contexts: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    history = run_scenario_with_maps(
+        task["scenario"],
+        task.get("demand_growth_map"),
+        task.get("tech_feedback_map"),
+        task.get("rd_hit_map"),
+        params=_task_params(task, contexts),
+        schedule=task.get("schedule"),
+    )
+    return summarize_history(history) if task.get("summary") else history
+
+
+def _run_worker_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Pool entry point: runs against the contexts installed by ``_init_worker``."""
+    return _run_task(task, _WORKER_CONTEXTS)
 
 
-def run_sensitivity_factors(factors) -> Dict[str, Any]:
+def scenario_pool(contexts: Dict[str, Dict[str, Any]], workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool whose workers hold ``contexts``, for callers that submit
+    many small batches (``run_scenario_tasks(..., pool=pool)``) and should not
+    pay the pool start-up each time.  ``None`` when ``workers <= 1``; the
+    caller shuts the pool down.
+    """
+    workers = config.SIM_WORKERS if workers is None else workers
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(contexts,))
+
+
+def run_scenario_tasks(
+    tasks: List[Dict[str, Any]],
+    contexts: Dict[str, Dict[str, Any]],
+    workers: Optional[int] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    lockstep: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Run scenario tasks and return their results in task order.
+
+    ``contexts`` maps a name to ``{"params": calibrated params}``.  Each task
+    is ``{"context", "scenario"}`` plus optional ``demand_growth_map``,
+    ``tech_feedback_map``, ``rd_hit_map``, ``schedule`` (policy rules
+    replacing the registered scenario) and ``model_params`` (replacing the
+    context's ``params["model_params"]``, so runs that differ only in
+    parameters the calibration does not read can share one context); with
+    ``"summary": True`` the task
+    returns ``summarize_history`` of the run instead of the full history,
+    which keeps large batches cheap to ship back from workers.
+
+    With ``workers > 1`` (default ``config.SIM_WORKERS``) tasks run in a
+    process pool; each worker receives ``contexts`` once through the pool
+    initializer and tasks are dispatched in chunks.  ``pool`` (from
+    ``scenario_pool(contexts)``) reuses an existing pool instead.
+
+    ``lockstep=True`` runs the tasks through ``run_scenarios_lockstep`` in
+    batches of up to ``LOCKSTEP_CHUNK`` runs (split across the workers).
+    """
+    workers = config.SIM_WORKERS if workers is None else workers
+    if lockstep:
+        return _run_lockstep_tasks(tasks, contexts, workers, pool)
+    if pool is not None:
+        return list(pool.map(_run_worker_task, tasks))
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        return [_run_task(task, contexts) for task in tasks]
+    chunksize = max(1, len(tasks) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(contexts,)) as pool:
+        return list(pool.map(_run_worker_task, tasks, chunksize=chunksize))
+
+
+def run_all_scenarios(
+    workers: Optional[int] = None,
+    model_params: Optional[config.ModelParams] = None,
+    lockstep: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run every scenario in ``SCENARIO_SCHEDULES``.  ``workers`` > 1 runs them in
+    a process pool (default ``config.SIM_WORKERS``); ``lockstep=True``
+    advances all scenarios together with one batched solve per year.
+    Results keep the scenario order.
+    """
+    contexts = {"base": {"params": run_full_calibration(model_params)}}
+    tasks = [{"context": "base", "scenario": scen} for scen in SCENARIO_SCHEDULES.keys()]
+    histories = run_scenario_tasks(tasks, contexts, workers, lockstep=lockstep)
+    return {task["scenario"]: hist for task, hist in zip(tasks, histories)}
+
+
+def run_sensitivity_factors(factors, workers: Optional[int] = None, model_params: Optional[config.ModelParams] = None) -> Dict[str, Any]:
     """
     factors: dict of name -> overrides dict for config-like params:
       {"demand_growth": val, "tech_feedback": val, "rd_hit_US_H": val, "rd_hit_US_M": val}
@@ -204,7 +555,7 @@ def run_sensitivity_factors(factors) -> Dict[str, Any]:
             "baseline": {},
         },
     }
-    results = {}
+    tasks = []
     for name, overrides in factors.items():
         # apply overrides temporarily
         orig_dg = base_params["demand_growth_map"].copy()
@@ -221,45 +572,56 @@ def run_sensitivity_factors(factors) -> Dict[str, Any]:
             for scen, adj in overrides["rd_hit"].items():
                 base_params["rd_hit"][scen].update(adj)
 
-        # run scenarios using these maps
-        scen_results = {}
-        for scen in SCENARIO_FUNC_MAP.keys():
-            scen_results[scen] = run_scenario_with_maps(
-                scen,
-                base_params["demand_growth_map"],
-                base_params["tech_feedback_map"],
-                base_params["rd_hit"],
+        # queue scenarios using a snapshot of these maps
+        for scen in SCENARIO_SCHEDULES.keys():
+            tasks.append(
+                {
+                    "context": "base",
+                    "case": name,
+                    "scenario": scen,
+                    "demand_growth_map": copy.deepcopy(base_params["demand_growth_map"]),
+                    "tech_feedback_map": copy.deepcopy(base_params["tech_feedback_map"]),
+                    "rd_hit_map": copy.deepcopy(base_params["rd_hit"]),
+                }
             )
-        results[name] = scen_results
 
         # restore
         base_params["demand_growth_map"] = orig_dg
         base_params["tech_feedback_map"] = orig_tf
         base_params["rd_hit"] = orig_rd
+
+    contexts = {"base": {"params": run_full_calibration(model_params)}}
+    histories = run_scenario_tasks(tasks, contexts, workers)
+    results: Dict[str, Any] = {name: {} for name in factors}
+    for task, hist in zip(tasks, histories):
+        results[task["case"]][task["scenario"]] = hist
     return results
 
 
-def run_elasticity_phi_sensitivity(cases: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+def run_elasticity_phi_sensitivity(
+    cases: Dict[str, Dict[str, float]],
+    workers: Optional[int] = None,
+    model_params: Optional[config.ModelParams] = None,
+) -> Dict[str, Any]:
     """
     cases: name -> {"sigma_scale": float, "phi_scale": float}
-    Temporarily scale Armington elasticities and tech progress coefficients.
+    Scale Armington elasticities and tech progress coefficients of
+    ``model_params`` (defaults from ``config``) per case.
     """
-    results = {}
-    orig_sigma = config.DEFAULT_SIGMA.copy()
-    orig_phi = config.TECH_PROGRESS_COEF.copy()
+    base = model_params or config.default_model_params()
+    contexts: Dict[str, Dict[str, Any]] = {}
     for name, cfg in cases.items():
-        sigma_scale = cfg.get("sigma_scale", 1.0)
-        phi_scale = cfg.get("phi_scale", 1.0)
-        # scale globals
-        for k in config.DEFAULT_SIGMA:
-            config.DEFAULT_SIGMA[k] = orig_sigma[k] * sigma_scale
-        for k in config.TECH_PROGRESS_COEF:
-            config.TECH_PROGRESS_COEF[k] = orig_phi[k] * phi_scale
-        scen_results = run_all_scenarios()
-        results[name] = scen_results
-    # restore
-    config.DEFAULT_SIGMA = orig_sigma
-    config.TECH_PROGRESS_COEF = orig_phi
+        case_params = base.scaled(
+            sigma=cfg.get("sigma_scale", 1.0),
+            tech_progress_coef=cfg.get("phi_scale", 1.0),
+        )
+        contexts[name] = {"params": run_full_calibration(case_params)}
+
+    tasks = [{"context": name, "scenario": scen} for name in cases for scen in SCENARIO_SCHEDULES.keys()]
+    histories = run_scenario_tasks(tasks, contexts, workers)
+    results: Dict[str, Any] = {name: {} for name in cases}
+    for task, hist in zip(tasks, histories):
+        results[task["context"]][task["scenario"]] = hist
     return results
 
 
@@ -309,6 +671,27 @@ def save_results_to_csv(results: Dict[str, Any], out_dir: Path) -> None:
     summary.to_csv(out_dir / "summary.csv", index=False)
 
 
+def solver_stats_table(results: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Per-scenario, per-year static solver diagnostics (iterations, convergence,
+    final max relative gap, solver stage used) to locate expensive solves.
+    """
+    rows = []
+    for scen, res in results.items():
+        for idx, year in enumerate(res["year"]):
+            rows.append(
+                {
+                    "scenario": scen,
+                    "year": year,
+                    "iterations": res["solver_iterations"][idx],
+                    "converged": res["solver_converged"][idx],
+                    "max_gap": res["solver_max_gap"][idx],
+                    "solver": res["solver"][idx],
+                }
+            )
+    return pd.DataFrame(rows)
+
+
 def save_final_summary(results: Dict[str, Any], out_dir: Path) -> None:
     """
     Save end-of-horizon comparison table for all scenarios.
@@ -347,6 +730,11 @@ if __name__ == "__main__":
     print(f"Per-scenario time series saved to: {save_dir}")
     save_final_summary(results, save_dir)
     print(f"Final-year summary saved to: {save_dir/'final_summary.csv'}")
+    stats = solver_stats_table(results)
+    stats.to_csv(save_dir / "solver_stats.csv", index=False)
+    n_bad = int((~stats["converged"]).sum())
+    print(f"Static solves: {stats['iterations'].sum()} iterations, {n_bad} not converged "
+          f"(details: {save_dir/'solver_stats.csv'})")
     # Save plots
     plots_dir = save_dir / "plots"
     save_all_plots(results, plots_dir)
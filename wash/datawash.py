@@ -20,30 +20,64 @@ APMCM 2025 Problem C - Unified Data Cleaning Script
 - duty_by_sector_year.csv          : 关税收入（按年 × sector_big）
 
 只需要根据你本地数据文件的位置改一下 CONFIG 部分（默认假设脚本和数据在同一目录）。
+
+关税 Excel 默认只流式读取 TARIFF_USECOLS 中的列（hts8/hs* 为 category，聚合外的税率为 float32），
+tariff_yearly.csv 因此只含这些列；TARIFF_COLUMNS = None 恢复读取全部列。
+
+默认增量构建：cache/manifest.json 记录各源文件的内容哈希，只重算变化的年份 / 文件，
+删除 cache/ 或设 INCREMENTAL_BUILD = False 即全量重建。
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 import numpy as np
 import pandas as pd
 
 import matplotlib.pyplot as plt
 
-# 可选依赖：用于将国家名映射为 ISO3 代码。如果没有安装 pycountry，则 partner_iso3 会是 None。
+# 可选依赖：用于将国家名映射为 ISO3 代码。如果没有安装 pycountry，则只有 COUNTRY_ISO3_OVERRIDES
+# 与映射表中的名称有 partner_iso3，其余为缺失。
 try:
     import pycountry  # type: ignore
 except ImportError:  # pragma: no cover - safe fallback
     pycountry = None  # type: ignore
 
+# 流式读取关税 Excel 用 openpyxl 只读模式；未安装时回退到 pd.read_excel(usecols=...)
+try:
+    import openpyxl  # type: ignore
+except ImportError:  # pragma: no cover - safe fallback
+    openpyxl = None  # type: ignore
+
 
 # ---------------------------------------------------------------------------
 # 配置
 # ---------------------------------------------------------------------------
 
+# 关税库中下游实际用到的列；其余一百多列（各协定税率、文字说明等）不读取
+TARIFF_RATE_COLS: List[str] = [
+    "mfn_ad_val_rate",
+    "mfn_specific_rate",
+    "mfn_other_rate",
+    "col2_ad_val_rate",
+    "col2_specific_rate",
+    "col2_other_rate",
+]
+# 进入发布的 HS2/HS4 聚合面板的税率：流式读取时保留 float64（其余税率为 float32），
+# 否则如 9999.999999 这类值在 float32 下无法精确表示
+TARIFF_AGG_RATE_COLS: List[str] = ["mfn_ad_val_rate", "mfn_specific_rate", "mfn_other_rate"]
+TARIFF_CODE_COLS: List[str] = ["mfn_rate_type_code", "col2_rate_type_code"]
+TARIFF_DATE_COLS: List[str] = ["begin_effect_date", "end_effective_date"]
+TARIFF_USECOLS: List[str] = (
+    ["hts8"] + TARIFF_CODE_COLS + TARIFF_RATE_COLS + TARIFF_DATE_COLS + ["additional_duty"]
+)
+
 def build_default_config() -> Dict[str, object]:
     """
     构建默认配置字典。
@@ -85,6 +119,18 @@ def build_default_config() -> Dict[str, object]:
         "DATAWEB_EXPORT_XLSX": data_root / "DataWeb-Query-Export.xlsx",
         "DATAWEB_IMPORT_XLSX": data_root / "DataWeb-Query-Import.xlsx",
         "MID_MONTH_DAY": "-06-30",  # 年度中点
+        # 关税 Excel 并行读取：进程数（None = min(文件数, CPU 数)，1 = 串行）；
+        # 每个子进程处理若干文件后重启，及时释放 openpyxl 解析残留的内存
+        "TARIFF_WORKERS": None,
+        "TARIFF_MAX_TASKS_PER_CHILD": 1,
+        # 关税 Excel 只读取这些列（流式、分块、定类型读取）；None = 读取全部列（旧版读取器）
+        "TARIFF_COLUMNS": list(TARIFF_USECOLS),
+        "TARIFF_CHUNK_ROWS": 20000,
+        # 增量构建：构建清单与中间结果缓存目录；False 时每次全量重算
+        "INCREMENTAL_BUILD": True,
+        "BUILD_DIR": base_dir / "cache",
+        # 国家名 -> ISO3 映射表（自动维护；source = "manual" 的行为手工修正）
+        "COUNTRY_ISO3_TABLE": output_dir / "country_iso3_map.csv",
     }
     return config
 
@@ -120,24 +166,180 @@ def parse_date_series(series: pd.Series) -> pd.Series:
     return pd.to_datetime(series, errors="coerce")
 
 
+# DataWeb 中 pycountry 无法直接识别（或会识别错）的国家 / 地区名称 -> ISO3。
+# 值为 None 表示明确不映射。优先级低于映射表 CSV 中 source = "manual" 的行。
+COUNTRY_ISO3_OVERRIDES: Dict[str, Optional[str]] = {
+    "Bolivia": "BOL",
+    "British Virgin Islands": "VGB",
+    "Brunei": "BRN",
+    "Côte d`Ivoire": "CIV",
+    "Czechia (Czech Republic)": "CZE",
+    "Democratic Republic of the Congo": "COD",
+    "Eswatini (Swaziland)": "SWZ",
+    "Falkland Islands": "FLK",
+    "French Southern and Antarctic Lands": "ATF",
+    "Gaza Strip": "PSE",
+    "Heard and McDonald Islands": "HMD",
+    "Iran": "IRN",
+    "Kosovo": "XKX",
+    "Laos": "LAO",
+    "Macau": "MAC",
+    "Micronesia": "FSM",
+    "Moldova": "MDA",
+    "Myanmar (Burma)": "MMR",
+    "North Korea": "PRK",
+    "Pitcairn Islands": "PCN",
+    "Republic of the Congo": "COG",
+    "Reunion": "REU",
+    "Russia": "RUS",
+    "Saint Helena": "SHN",
+    "Sint Maarten": "SXM",
+    "South Korea": "KOR",
+    "Syria": "SYR",
+    "Taiwan": "TWN",
+    "Tanzania": "TZA",
+    "Turkey": "TUR",
+    "Vatican City": "VAT",
+    "Venezuela": "VEN",
+    "Vietnam": "VNM",
+    "West Bank": "PSE",
+    "nan": None,
+}
+
+ISO3_TABLE_COLUMNS = ["partner_name", "partner_iso3", "source"]
+
+# 进程内记忆：清洗后的名称 -> ISO3
+_ISO3_MEMO: Dict[str, Optional[str]] = {}
+
+
+def _lookup_country_iso3(name_str: str) -> Tuple[Optional[str], str]:
+    """
+    单个（已 strip 的）名称的解析：代码内覆盖表 -> pycountry。返回 (iso3, source)。
+    """
+    if name_str in COUNTRY_ISO3_OVERRIDES:
+        return COUNTRY_ISO3_OVERRIDES[name_str], "override"
+    if pycountry is None:
+        return None, "unavailable"
+    try:
+        country = pycountry.countries.lookup(name_str)
+        return country.alpha_3, "pycountry"  # type: ignore[no-any-return]
+    except Exception:
+        return None, "unmatched"
+
+
 def map_country_to_iso3(name: Optional[str]) -> Optional[str]:
     """
-    将国家名称映射为 ISO3 代码（如果安装了 pycountry）。
+    将国家名称映射为 ISO3 代码：先查 COUNTRY_ISO3_OVERRIDES，再查 pycountry（如果安装了）。
 
-    未安装 pycountry 或匹配失败时返回 None。
+    结果按名称在进程内记忆；未安装 pycountry 且不在覆盖表中，或匹配失败时返回 None。
     """
     if not isinstance(name, str):
         return None
     name_str = name.strip()
     if not name_str:
         return None
-    if pycountry is None:
-        return None
-    try:
-        country = pycountry.countries.lookup(name_str)
-        return country.alpha_3  # type: ignore[no-any-return]
-    except Exception:
-        return None
+    if name_str not in _ISO3_MEMO:
+        _ISO3_MEMO[name_str] = _lookup_country_iso3(name_str)[0]
+    return _ISO3_MEMO[name_str]
+
+
+def load_country_iso3_table(table_path: Path) -> pd.DataFrame:
+    """
+    读取持久化的国家名 -> ISO3 映射表（列：partner_name, partner_iso3, source）。
+    不存在时返回空表。
+    """
+    if not table_path.exists():
+        return pd.DataFrame(columns=ISO3_TABLE_COLUMNS)
+    table = pd.read_csv(table_path, dtype=str, keep_default_na=False)
+    table = table.reindex(columns=ISO3_TABLE_COLUMNS).fillna("")
+    table["partner_name"] = table["partner_name"].str.strip()
+    return table.drop_duplicates("partner_name", keep="last")
+
+
+def country_iso3_digest(table_path: Optional[Path] = None) -> str:
+    """
+    覆盖表、映射表中手工行以及 pycountry 是否可用 / 版本的哈希；
+    任一变化时依赖 ISO3 的缓存（DataWeb 长表）需要重建（例如安装 pycountry 后补全此前为空的代码）。
+    """
+    manual: List[List[str]] = []
+    if table_path is not None:
+        table = load_country_iso3_table(table_path)
+        manual = table.loc[table["source"] == "manual", ISO3_TABLE_COLUMNS[:2]].values.tolist()
+    resolver = None if pycountry is None else str(getattr(pycountry, "__version__", "unknown"))
+    payload = json.dumps([sorted(COUNTRY_ISO3_OVERRIDES.items(), key=lambda kv: kv[0]), sorted(manual), resolver])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def resolve_country_iso3(
+    names: List[str],
+    table_path: Optional[Path] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    对一组（去重后的）国家名各解析一次，返回 {原名称: ISO3 或 None}。
+
+    优先级：映射表 CSV 中 source = "manual" 的行 > COUNTRY_ISO3_OVERRIDES >
+    映射表中已有的解析结果 > pycountry。给出 table_path 时把新解析的名称追加写回映射表
+    （未安装 pycountry 时查不到的名称不写入，安装后会重新解析）；
+    手工修正只需在 CSV 中改 partner_iso3 并把 source 设为 "manual"。
+    """
+    table = load_country_iso3_table(table_path) if table_path is not None else None
+    known: Dict[str, Tuple[Optional[str], str]] = {}
+    if table is not None:
+        for name, iso3, source in table[ISO3_TABLE_COLUMNS].itertuples(index=False, name=None):
+            known[name] = (iso3 or None, source)
+
+    result: Dict[str, Optional[str]] = {}
+    changed = False
+    for raw in names:
+        name_str = raw.strip() if isinstance(raw, str) else ""
+        if not name_str:
+            result[raw] = None
+            continue
+        entry = known.get(name_str)
+        if entry is not None and entry[1] == "manual":
+            iso3 = entry[0]
+        elif entry is None or entry[1] == "override" or name_str in COUNTRY_ISO3_OVERRIDES:
+            iso3, source = _lookup_country_iso3(name_str)
+            if source != "unavailable" and entry != (iso3, source):
+                known[name_str] = (iso3, source)
+                changed = True
+        else:
+            iso3 = entry[0]
+        _ISO3_MEMO[name_str] = iso3
+        result[raw] = iso3
+
+    if table_path is not None and changed:
+        out = pd.DataFrame(
+            [(name, iso3 or "", source) for name, (iso3, source) in sorted(known.items())],
+            columns=ISO3_TABLE_COLUMNS,
+        )
+        ensure_output_dir(table_path.parent)
+        out.to_csv(table_path, index=False)
+        print(f"[ISO3] Updated country mapping table {table_path} ({len(out)} names)")
+    return result
+
+
+def map_country_series_to_iso3(
+    names: pd.Series,
+    table_path: Optional[Path] = None,
+) -> pd.Series:
+    """
+    向量化的国家名 -> ISO3：按类别（唯一名称）解析一次，再用类别编码映射回所有行。
+    返回 category 列，未匹配为缺失值。
+    """
+    categorical = names.astype("category")
+    categories = list(categorical.cat.categories)
+    mapping = resolve_country_iso3(categories, table_path)
+    iso_of_category = [mapping[c] for c in categories]
+    iso_values = sorted({v for v in iso_of_category if v is not None})
+    iso_index = {v: i for i, v in enumerate(iso_values)}
+    lookup = np.array([iso_index[v] if v is not None else -1 for v in iso_of_category] + [-1], dtype=np.int64)
+    codes = lookup[categorical.cat.codes.to_numpy()]  # 编码 -1（缺失名称）取到末尾的 -1
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=iso_values),
+        index=names.index,
+        name=names.name,
+    )
 
 
 def classify_hs2_sector_big(hs2_code: str) -> str:
@@ -284,17 +486,261 @@ def read_single_tariff_file(
     return df
 
 
+def _prefix_categorical(codes: np.ndarray, categories: np.ndarray, width: int) -> pd.Categorical:
+    """
+    由 hts8 的分类编码直接生成前缀（hs2/hs4/hs6）分类列，只对类别本身做字符串运算。
+    """
+    prefixes, inverse = np.unique(np.array([c[:width] for c in categories], dtype=object), return_inverse=True)
+    prefix_codes = np.where(codes >= 0, inverse[np.maximum(codes, 0)], -1)
+    return pd.Categorical.from_codes(prefix_codes, categories=prefixes)
+
+
+def _iter_sheet_rows(file_path: Path, columns: List[str], chunk_rows: int):
+    """
+    逐块产出 (预估行数, 表头中找到的列, 行块)。行块为只含所选列的元组列表。
+
+    openpyxl 只读模式按行流式解析 XML，不在内存中保留整张表；
+    未安装 openpyxl 时退化为 pd.read_excel(usecols=...) 一次读入。
+    """
+    if openpyxl is None:
+        df = pd.read_excel(file_path, usecols=lambda c: c in columns, dtype=object)
+        present = [c for c in columns if c in df.columns]
+        rows = list(df[present].itertuples(index=False, name=None))
+        yield len(rows), present, []
+        for start in range(0, len(rows), chunk_rows):
+            yield len(rows), present, rows[start:start + chunk_rows]
+        return
+
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        present = [c for c in columns if c in header]
+        idx = [header.index(c) for c in present]
+        n_rows = max((ws.max_row or 1) - 1, 0)
+        yield n_rows, present, []
+        chunk: List[tuple] = []
+        for row in rows:
+            chunk.append(tuple(row[i] if i < len(row) else None for i in idx))
+            if len(chunk) >= chunk_rows:
+                yield n_rows, present, chunk
+                chunk = []
+        if chunk:
+            yield n_rows, present, chunk
+    finally:
+        wb.close()
+
+
+def read_tariff_file_streaming(
+    year: int,
+    file_path: Path,
+    columns: Optional[List[str]] = None,
+    chunk_rows: int = 20000,
+) -> pd.DataFrame:
+    """
+    read_single_tariff_file 的低内存版本：只读取 columns（默认 TARIFF_USECOLS），
+    按 chunk_rows 行分块流式解析，逐块写入按表格行数预分配的定类型数组：
+
+    - hts8 / hs2 / hs4 / hs6：category（hts8 补零为 8 位）
+    - 税率：float32（TARIFF_AGG_RATE_COLS 为 float64）；税率类型码：Int64；日期：datetime64[ns]
+    - has_additional_duty：int8；year：int
+
+    清洗规则与 read_single_tariff_file 相同（缺少 hts8 的空行被跳过）。
+    """
+    if not file_path.exists():
+        raise FileNotFoundError(f"Tariff file for year {year} not found: {file_path}")
+    # hts8 固定放在第一列：下面的空行过滤与 present[1:] 都依赖这一顺序
+    columns = list(TARIFF_USECOLS if columns is None else columns)
+    columns = ["hts8"] + [c for c in columns if c != "hts8"]
+
+    stream = _iter_sheet_rows(file_path, columns, chunk_rows)
+    n_rows, present, _ = next(stream)
+    if "hts8" not in present:
+        raise KeyError(f"'hts8' column not found in tariff file: {file_path}")
+
+    # 预分配（行数不足时按倍数扩容）
+    def alloc(col: str, n: int) -> np.ndarray:
+        if col in TARIFF_AGG_RATE_COLS:
+            return np.full(n, np.nan, dtype=np.float64)
+        if col in TARIFF_RATE_COLS or col in TARIFF_CODE_COLS:
+            return np.full(n, np.nan, dtype=np.float32)
+        if col in TARIFF_DATE_COLS:
+            return np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+        if col == "additional_duty":
+            return np.zeros(n, dtype=np.int8)
+        return np.empty(n, dtype=object)
+
+    capacity = max(n_rows, chunk_rows)
+    buffers = {col: alloc(col, capacity) for col in present}
+    filled = 0
+    for _, _, chunk in stream:
+        chunk = [r for r in chunk if r[0] is not None]
+        if not chunk:
+            continue
+        if filled + len(chunk) > capacity:
+            capacity = max(2 * capacity, filled + len(chunk))
+            for col in present:
+                grown = alloc(col, capacity)
+                grown[:filled] = buffers[col][:filled]
+                buffers[col] = grown
+        block = slice(filled, filled + len(chunk))
+        for col, column_values in zip(present, zip(*chunk)):
+            values = pd.Series(column_values, dtype=object)
+            buf = buffers[col]
+            if col in TARIFF_RATE_COLS or col in TARIFF_CODE_COLS:
+                buf[block] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=buf.dtype, na_value=np.nan)
+            elif col in TARIFF_DATE_COLS:
+                buf[block] = parse_date_series(values).to_numpy(dtype="datetime64[ns]")
+            elif col == "additional_duty":
+                buf[block] = (values.astype(str).str.strip().str.lower() == "yes").to_numpy(dtype=np.int8)
+            else:
+                buf[block] = values.to_numpy()
+        filled += len(chunk)
+
+    data = {col: buffers[col][:filled] for col in present}
+
+    # hts8：先对原值去重，只对唯一值补零
+    raw_codes, raw_uniques = pd.factorize(data.pop("hts8"))
+    padded = zero_pad_series(pd.Series(raw_uniques, dtype=object), 8).to_numpy(dtype=object)
+    categories, inverse = np.unique(padded, return_inverse=True)
+    codes = np.where(raw_codes >= 0, inverse[np.maximum(raw_codes, 0)], -1)
+
+    df = pd.DataFrame({"hts8": pd.Categorical.from_codes(codes, categories=categories)})
+    for col in present[1:]:
+        if col in TARIFF_CODE_COLS:
+            df[col] = pd.array(data[col], dtype="Float32").astype("Int64")
+        elif col == "additional_duty":
+            continue
+        else:
+            df[col] = data[col]
+    for width, name in ((2, "hs2"), (4, "hs4"), (6, "hs6")):
+        df[name] = _prefix_categorical(codes, categories, width)
+    df["year"] = int(year)
+
+    for col in TARIFF_DATE_COLS:
+        if col not in df.columns:
+            df[col] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    df["end_effective_date"] = df["end_effective_date"].fillna(pd.Timestamp("2050-12-31"))
+
+    if "additional_duty" in present:
+        df["has_additional_duty"] = data["additional_duty"]
+    else:
+        df["has_additional_duty"] = np.zeros(len(df), dtype=np.int8)
+
+    return df
+
+
+def _read_tariff_task(task: Tuple[int, Path, Optional[List[str]], int]) -> pd.DataFrame:
+    """
+    进程池任务：读取并清洗一个年度关税文件（columns 为 None 时读全部列）。
+    """
+    year, file_path, columns, chunk_rows = task
+    print(f"[Tariff] Reading {file_path} for year {year} ...", flush=True)
+    if columns is None:
+        return read_single_tariff_file(year, file_path)
+    return read_tariff_file_streaming(year, file_path, columns=columns, chunk_rows=chunk_rows)
+
+
+def read_tariff_files(
+    tariff_dir: Path,
+    tariff_file_info: List[Tuple[int, str]],
+    workers: Optional[int] = None,
+    max_tasks_per_child: Optional[int] = 1,
+    columns: Optional[List[str]] = None,
+    chunk_rows: int = 20000,
+) -> List[pd.DataFrame]:
+    """
+    并行读取所有年度关税 Excel，返回与 tariff_file_info 顺序一致的清洗后 DataFrame 列表。
+
+    - workers：进程数，None = min(文件数, CPU 数)；<= 1 时串行读取
+    - max_tasks_per_child：每个子进程处理的文件数上限，达到后换新进程，
+      使单个进程的内存占用不超过一个文件的解析峰值（None = 不限制）
+    - columns：只读取这些列（read_tariff_file_streaming）；None = 读取全部列（read_single_tariff_file）
+
+    各文件互不依赖，结果按输入顺序收集，与串行读取完全一致。
+    """
+    tasks = [(int(year), tariff_dir / filename, columns, chunk_rows) for year, filename in tariff_file_info]
+    # 启动进程前先检查文件是否齐全
+    for year, file_path, _, _ in tasks:
+        if not file_path.exists():
+            raise FileNotFoundError(f"Tariff file for year {year} not found: {file_path}")
+
+    if workers is None:
+        workers = min(len(tasks), os.cpu_count() or 1)
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        return [_read_tariff_task(task) for task in tasks]
+
+    print(f"[Tariff] Reading {len(tasks)} files with {workers} processes ...")
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child)
+    except TypeError:
+        # Python < 3.11 不支持 max_tasks_per_child
+        executor = ProcessPoolExecutor(max_workers=workers)
+    with executor:
+        return list(executor.map(_read_tariff_task, tasks))
+
+
 def align_tariff_columns(dfs: List[pd.DataFrame]) -> pd.DataFrame:
     """
     多个年度关税 DataFrame 列对齐：取所有列的并集，然后重索引。
+
+    各年都有的分类列（流式读取器产生的 hts8/hs2/hs4/hs6）先统一为类别并集，
+    拼接后仍为 category，而不是退化成逐行字符串。
     """
     all_cols: List[str] = sorted({col for df in dfs for col in df.columns})
     aligned = [df.reindex(columns=all_cols) for df in dfs]
+    for col in all_cols:
+        if all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in aligned):
+            categories = sorted(set().union(*(df[col].cat.categories for df in aligned)))
+            for df in aligned:
+                df[col] = df[col].cat.set_categories(categories)
     combined = pd.concat(aligned, ignore_index=True)
     return combined
 
 
-def annualize_tariff_by_middate(tariff_raw_allyears: pd.DataFrame) -> pd.DataFrame:
+# 年化 / 分期选择的分辨率：每年期数
+PERIOD_RESOLUTIONS: Dict[str, int] = {"year": 1, "quarter": 4, "month": 12}
+
+
+def _period_bounds(years: np.ndarray, resolution: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    各年份各期的中点与期末（datetime64[ns]，形状 (年数, 期数)）及期标签后缀。
+
+    - year：中点 06-30，期末 12-31（与原年度规则一致）
+    - quarter：中点为季度中间月的 15 日，期末为季末
+    - month：中点为当月 15 日，期末为月末
+    """
+    if resolution not in PERIOD_RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution!r} (expected one of {list(PERIOD_RESOLUTIONS)})")
+    n = PERIOD_RESOLUTIONS[resolution]
+    months_per = 12 // n
+    mids = np.empty((len(years), n), dtype="datetime64[ns]")
+    ends = np.empty((len(years), n), dtype="datetime64[ns]")
+    for i, year in enumerate(years):
+        for j in range(n):
+            first_month = j * months_per + 1
+            if resolution == "year":
+                mid = pd.Timestamp(year=int(year), month=6, day=30)
+            else:
+                mid = pd.Timestamp(year=int(year), month=first_month + months_per // 2, day=15)
+            end = pd.Timestamp(year=int(year), month=first_month + months_per - 1, day=1) + pd.offsets.MonthEnd(0)
+            mids[i, j] = np.datetime64(mid, "ns")
+            ends[i, j] = np.datetime64(end, "ns")
+    if resolution == "year":
+        labels = [""]
+    elif resolution == "quarter":
+        labels = [f"Q{j + 1}" for j in range(n)]
+    else:
+        labels = [f"-{j + 1:02d}" for j in range(n)]
+    return mids, ends, labels
+
+
+def annualize_tariff_by_middate(
+    tariff_raw_allyears: pd.DataFrame,
+    resolution: str = "year",
+) -> pd.DataFrame:
     """
     对 (year, hts8) 做年度选择，形成唯一记录，规则：
 
@@ -302,67 +748,84 @@ def annualize_tariff_by_middate(tariff_raw_allyears: pd.DataFrame) -> pd.DataFra
     2. 首选满足 begin_effect_date <= mid_date <= end_effective_date 的记录。
     3. 若没有覆盖 mid_date 的记录，则在 begin_effect_date <= year_end 的记录中选。
     4. 在候选记录中，按 priority（覆盖 mid_date 优先）和 begin_effect_date
-      （越新越优先）选一条。
+      （越新越优先）选一条；仍并列时取原表中靠后的一条。
     5. 如果没有任何符合条件的记录，该 (year, hts8) 会被丢弃。
-    """
-    df = tariff_raw_allyears.copy()
-
-    # 确保日期为 datetime
-    df["begin_effect_date"] = parse_date_series(df["begin_effect_date"])
-    df["end_effective_date"] = parse_date_series(df["end_effective_date"])
-    df["end_effective_date"] = df["end_effective_date"].fillna(pd.Timestamp("2050-12-31"))
-
-    df["year"] = df["year"].astype(int)
-    df["mid_date"] = pd.to_datetime(df["year"].astype(str) + "-06-30")
-    df["year_end"] = pd.to_datetime(df["year"].astype(str) + "-12-31")
-
-    covers_mid = (df["begin_effect_date"] <= df["mid_date"]) & (df["end_effective_date"] >= df["mid_date"])
-    before_end = df["begin_effect_date"] <= df["year_end"]
 
-    # priority: 2 = 覆盖 mid_date；1 = 只在 year_end 之前有效；0 = 无效
-    df["priority"] = np.select(
-        condlist=[covers_mid, before_end],
-        choicelist=[2, 1],
-        default=0,
-    )
+    resolution="quarter" / "month" 时按同样规则对每个 (year, 期, hts8) 选择，
+    mid_date / year_end 换成该期的中点和期末（见 _period_bounds），
+    结果在 year 之后多一列 period（如 "2021Q1"、"2021-03"）。
 
-    df_valid = df[df["priority"] > 0].copy()
-    if df_valid.empty:
+    实现上不复制、不排序整张表：把 (priority, begin_effect_date 的秩, 行号)
+    打包成一个 int64 分数，按 (year, 期, hts8) 分组取最大值，只取出选中的行。
+    """
+    df = tariff_raw_allyears
+
+    begin_dates = parse_date_series(df["begin_effect_date"])
+    end_dates = parse_date_series(df["end_effective_date"]).fillna(pd.Timestamp("2050-12-31"))
+    begin = begin_dates.to_numpy(dtype="datetime64[ns]")
+    end = end_dates.to_numpy(dtype="datetime64[ns]")
+    years = df["year"].astype(int).to_numpy()
+    year_values, year_idx = np.unique(years, return_inverse=True)
+    hts_codes, hts_values = pd.factorize(df["hts8"], sort=True)
+    mids, ends, labels = _period_bounds(year_values, resolution)
+    n_periods = len(labels)
+
+    # begin_effect_date 的稠密秩（NaT 的行 priority 必为 0，不参与选择）
+    valid_begin = ~np.isnat(begin)
+    begin_rank = np.zeros(len(df), dtype=np.int64)
+    if valid_begin.any():
+        begin_rank[valid_begin] = np.unique(begin[valid_begin], return_inverse=True)[1]
+    position = np.arange(len(df), dtype=np.int64)
+    if len(df) >= 1 << 32 or begin_rank.max(initial=0) >= 1 << 24:
+        raise ValueError("Tariff panel too large for packed selection scores")
+    base_score = (begin_rank << 32) | position
+
+    group_keys: List[np.ndarray] = []
+    scores: List[np.ndarray] = []
+    for j in range(n_periods):
+        mid = mids[year_idx, j]
+        covers_mid = (begin <= mid) & (end >= mid)
+        before_end = begin <= ends[year_idx, j]
+        # priority: 2 = 覆盖 mid_date；1 = 只在期末之前有效；0 = 无效
+        priority = np.where(covers_mid, 2, np.where(before_end, 1, 0)).astype(np.int64)
+        keep = (priority > 0) & (hts_codes >= 0)
+        group_keys.append(((year_idx[keep] * n_periods + j) * len(hts_values)) + hts_codes[keep])
+        scores.append((priority[keep] << 56) | base_score[keep])
+
+    group_key = np.concatenate(group_keys)
+    if group_key.size == 0:
         raise ValueError("No valid tariff records found after applying mid-date/year-end selection rules.")
-
-    # 排序，使得每个 (year, hts8) 中最后一条是我们需要的
-    df_valid = df_valid.sort_values(
-        ["year", "hts8", "priority", "begin_effect_date"],
-        ascending=[True, True, True, True],
-    )
-
-    # 每组取最后一条
-    tariff_yearly = (
-        df_valid
-        .groupby(["year", "hts8"], as_index=False)
-        .tail(1)
-        .drop(columns=["mid_date", "year_end", "priority"])
-        .sort_values(["year", "hts8"])
-        .reset_index(drop=True)
-    )
-
+    best = pd.Series(np.concatenate(scores)).groupby(group_key, sort=True).max()
+
+    selected = best.to_numpy() & ((1 << 32) - 1)
+    tariff_yearly = df.take(selected).reset_index(drop=True)
+    if n_periods > 1:
+        period_idx = (best.index.to_numpy() // len(hts_values)) % n_periods
+        period = [f"{y}{labels[j]}" for y, j in zip(tariff_yearly["year"].astype(int), period_idx)]
+        tariff_yearly.insert(tariff_yearly.columns.get_loc("year") + 1, "period", period)
+
+    # 与旧实现一致：日期列统一为解析后的 datetime，end_effective_date 缺失填 2050-12-31
+    tariff_yearly["begin_effect_date"] = begin_dates.to_numpy()[selected]
+    tariff_yearly["end_effective_date"] = end_dates.to_numpy()[selected]
+    tariff_yearly["year"] = years[selected]
     return tariff_yearly
 
 
 def build_tariff_yearly_panel(config: Dict[str, object]) -> pd.DataFrame:
     """
-    读取所有年度关税 Excel，列对齐后按年度中点规则生成年度 HTS8 面板。
+    读取所有年度关税 Excel（进程池并行，见 read_tariff_files），列对齐后按年度中点规则生成年度 HTS8 面板。
     """
     tariff_dir: Path = config["TARIFF_DIR"]  # type: ignore[assignment]
     tariff_file_info: List[Tuple[int, str]] = config["TARIFF_FILE_INFO"]  # type: ignore[assignment]
 
-    all_year_dfs: List[pd.DataFrame] = []
-
-    for year, filename in tariff_file_info:
-        file_path = tariff_dir / filename
-        print(f"[Tariff] Reading {file_path} for year {year} ...")
-        df = read_single_tariff_file(year, file_path)
-        all_year_dfs.append(df)
+    all_year_dfs = read_tariff_files(
+        tariff_dir,
+        tariff_file_info,
+        workers=config.get("TARIFF_WORKERS"),  # type: ignore[arg-type]
+        max_tasks_per_child=config.get("TARIFF_MAX_TASKS_PER_CHILD", 1),  # type: ignore[arg-type]
+        columns=config.get("TARIFF_COLUMNS"),  # type: ignore[arg-type]
+        chunk_rows=config.get("TARIFF_CHUNK_ROWS", 20000),  # type: ignore[arg-type]
+    )
 
     print("[Tariff] Aligning columns across years ...")
     tariff_raw_allyears = align_tariff_columns(all_year_dfs)
@@ -409,9 +872,12 @@ def build_tariff_aggregates(
         raise KeyError(f"Missing expected columns in tariff_yearly: {missing}")
 
     t_core = tariff_yearly[core_cols].copy()
+    # 在 float64 下求均值，发布的聚合面板保持全精度
+    for col in TARIFF_AGG_RATE_COLS:
+        t_core[col] = t_core[col].astype(np.float64)
 
     # HS2 聚合
-    hs2_group = t_core.groupby(["year", "hs2"], as_index=False)
+    hs2_group = t_core.groupby(["year", "hs2"], as_index=False, observed=True)
     tariff_hs2_panel = hs2_group.agg(
         mfn_adval_hs2=("mfn_ad_val_rate", "mean"),
         mfn_spec_q1_hs2=("mfn_specific_rate", "mean"),
@@ -420,7 +886,7 @@ def build_tariff_aggregates(
     )
 
     # HS4 聚合
-    hs4_group = t_core.groupby(["year", "hs4"], as_index=False)
+    hs4_group = t_core.groupby(["year", "hs4"], as_index=False, observed=True)
     tariff_hs4_panel = hs4_group.agg(
         mfn_adval_hs4=("mfn_ad_val_rate", "mean"),
         mfn_spec_q1_hs4=("mfn_specific_rate", "mean"),
@@ -442,6 +908,7 @@ def read_dataweb_metric(
     xlsx_path: Path,
     sheet_name: str,
     metric_name: str,
+    iso3_table: Optional[Path] = None,
 ) -> pd.DataFrame:
     """
     读取一个 DataWeb 导出表并转成长表。
@@ -459,6 +926,8 @@ def read_dataweb_metric(
         "FAS Value" 或 "General Import Charges"
     metric_name : str
         内部指标名："export_fas" 或 "import_duty"
+    iso3_table : Path, optional
+        国家名 -> ISO3 映射表 CSV（见 resolve_country_iso3）；每个唯一名称只解析一次
 
     返回
     -------
@@ -511,7 +980,7 @@ def read_dataweb_metric(
     long["description"] = long["Description"].astype(str)
 
     # ISO3 代码（可选）
-    long["partner_iso3"] = long["partner_name"].apply(map_country_to_iso3)
+    long["partner_iso3"] = map_country_series_to_iso3(long["partner_name"], iso3_table)
 
     cols = [
         "year",
@@ -538,16 +1007,19 @@ def build_trade_long_tables(
     """
     export_path: Path = config["DATAWEB_EXPORT_XLSX"]  # type: ignore[assignment]
     import_path: Path = config["DATAWEB_IMPORT_XLSX"]  # type: ignore[assignment]
+    iso3_table: Optional[Path] = config.get("COUNTRY_ISO3_TABLE")  # type: ignore[assignment]
 
     exports_long = read_dataweb_metric(
         export_path,
         sheet_name="FAS Value",
         metric_name="export_fas",
+        iso3_table=iso3_table,
     )
     duties_long = read_dataweb_metric(
         import_path,
         sheet_name="General Import Charges",
         metric_name="import_duty",
+        iso3_table=iso3_table,
     )
 
     return exports_long, duties_long
@@ -700,13 +1172,24 @@ def build_common_features(
 def save_all_outputs(
     outputs: Dict[str, pd.DataFrame],
     output_dir: Path,
+    manifest: Optional[Dict[str, Any]] = None,
 ) -> None:
     """
     将所有 DataFrame 保存为 CSV。
+
+    传入构建清单 manifest 时，内容哈希与上次写出时相同且文件仍在的输出不再重写，
+    并把新的哈希记入 manifest["outputs"]。
     """
     ensure_output_dir(output_dir)
     for name, df in outputs.items():
         file_path = output_dir / f"{name}.csv"
+        if manifest is not None:
+            digest = frame_digest(df)
+            recorded = manifest.setdefault("outputs", {})
+            if recorded.get(name) == digest and file_path.exists():
+                print(f"[Save] {file_path} unchanged, skipped")
+                continue
+            recorded[name] = digest
         print(f"[Save] Writing {file_path} ({len(df)} rows, {len(df.columns)} columns)")
         df.to_csv(file_path, index=False)
 
@@ -759,7 +1242,213 @@ def run_basic_quality_checks(
 
 
 # ---------------------------------------------------------------------------
-# 7. 主入口
+# 7. 增量构建：构建清单 + 年度缓存
+# ---------------------------------------------------------------------------
+
+# 年化规则或清洗逻辑变化时递增，使所有缓存失效
+BUILD_VERSION = 3
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    计算文件内容的 SHA-256。
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """
+    DataFrame 内容哈希（列名、dtype 与逐行哈希），用于判断输出是否变化。
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def load_build_manifest(build_dir: Path) -> Dict[str, Any]:
+    """
+    读取构建清单；不存在、损坏或版本不符时返回空清单（即全量重建）。
+    """
+    path = build_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != BUILD_VERSION:
+        manifest = {"version": BUILD_VERSION}
+    manifest.setdefault("sources", {})
+    return manifest
+
+
+def save_build_manifest(build_dir: Path, manifest: Dict[str, Any]) -> None:
+    """
+    原子写入构建清单。
+    """
+    ensure_output_dir(build_dir)
+    tmp = build_dir / f"{MANIFEST_NAME}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(build_dir / MANIFEST_NAME)
+
+
+def source_fingerprint(path: Path, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    源文件指纹：大小、mtime 与内容哈希。大小和 mtime 与上次记录一致时沿用旧哈希，
+    否则重新计算（仅 touch 过、内容未变的文件哈希不变，不会触发重算）。
+    """
+    st = path.stat()
+    fp = {"name": path.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if previous and all(previous.get(k) == fp[k] for k in ("name", "size", "mtime_ns")) and previous.get("sha256"):
+        fp["sha256"] = previous["sha256"]
+    else:
+        fp["sha256"] = file_sha256(path)
+    return fp
+
+
+def tariff_reader_digest(config: Dict[str, object]) -> str:
+    """
+    关税读取设置（读取器类型与所读列）的哈希；变化时已缓存的年度切片需要重建。
+    """
+    columns = config.get("TARIFF_COLUMNS")
+    payload = {
+        "reader": "full" if columns is None else "streaming",
+        "columns": None if columns is None else list(columns),  # type: ignore[arg-type]
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _source_unchanged(previous: Optional[Dict[str, Any]], current: Dict[str, Any], cache_path: Path) -> bool:
+    # size / mtime 只用于跳过哈希计算；其余字段（名称、内容哈希及附加依赖）都须一致
+    return (
+        previous is not None
+        and all(previous.get(k) == v for k, v in current.items() if k not in ("size", "mtime_ns"))
+        and cache_path.exists()
+    )
+
+
+def _write_pickle(df: pd.DataFrame, path: Path) -> None:
+    ensure_output_dir(path.parent)
+    tmp = path.with_suffix(".tmp")
+    df.to_pickle(tmp)
+    tmp.replace(path)
+
+
+def _annualize_single_year(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    单个年度文件的年化结果；没有有效记录时返回空表（该年被丢弃，与全量年化一致）。
+    """
+    try:
+        return annualize_tariff_by_middate(df)
+    except ValueError:
+        return df.iloc[:0]
+
+
+def build_tariff_yearly_incremental(
+    config: Dict[str, object],
+    manifest: Dict[str, Any],
+) -> pd.DataFrame:
+    """
+    增量版 build_tariff_yearly_panel：每个年度的年化 HTS8 切片缓存为
+    BUILD_DIR/tariff_yearly/<year>.pkl，只重新读取、年化源文件内容或读取设置
+    （TARIFF_COLUMNS，见 tariff_reader_digest）有变化的年份，再合并所有年份。
+
+    年化只在 (year, hts8) 内选择记录，年度文件之间互不影响，
+    因此合并结果与全量构建完全一致。
+    """
+    tariff_dir: Path = config["TARIFF_DIR"]  # type: ignore[assignment]
+    build_dir: Path = config["BUILD_DIR"]  # type: ignore[assignment]
+    tariff_file_info: List[Tuple[int, str]] = config["TARIFF_FILE_INFO"]  # type: ignore[assignment]
+    slice_dir = build_dir / "tariff_yearly"
+    recorded: Dict[str, Any] = manifest["sources"].setdefault("tariff", {})
+    reader_digest = tariff_reader_digest(config)
+
+    fingerprints: Dict[int, Dict[str, Any]] = {}
+    stale: List[Tuple[int, str]] = []
+    for year, filename in tariff_file_info:
+        file_path = tariff_dir / filename
+        if not file_path.exists():
+            raise FileNotFoundError(f"Tariff file for year {year} not found: {file_path}")
+        fp = source_fingerprint(file_path, recorded.get(str(year)))
+        fp["reader"] = reader_digest
+        fingerprints[int(year)] = fp
+        if not _source_unchanged(recorded.get(str(year)), fp, slice_dir / f"{year}.pkl"):
+            stale.append((year, filename))
+
+    print(f"[Tariff] {len(tariff_file_info) - len(stale)} years cached, {len(stale)} to rebuild")
+    if stale:
+        raw_dfs = read_tariff_files(
+            tariff_dir,
+            stale,
+            workers=config.get("TARIFF_WORKERS"),  # type: ignore[arg-type]
+            max_tasks_per_child=config.get("TARIFF_MAX_TASKS_PER_CHILD", 1),  # type: ignore[arg-type]
+            columns=config.get("TARIFF_COLUMNS"),  # type: ignore[arg-type]
+            chunk_rows=config.get("TARIFF_CHUNK_ROWS", 20000),  # type: ignore[arg-type]
+        )
+        for (year, _), raw in zip(stale, raw_dfs):
+            print(f"[Tariff] Annualizing year {year} ...")
+            _write_pickle(_annualize_single_year(raw), slice_dir / f"{year}.pkl")
+            recorded[str(year)] = fingerprints[int(year)]
+
+    # 移除已不在文件列表中的年份
+    for key in list(recorded):
+        if int(key) not in fingerprints:
+            del recorded[key]
+            (slice_dir / f"{key}.pkl").unlink(missing_ok=True)
+
+    slices = [pd.read_pickle(slice_dir / f"{year}.pkl") for year, _ in tariff_file_info]
+    tariff_yearly = align_tariff_columns(slices)
+    if tariff_yearly.empty:
+        raise ValueError("No valid tariff records found after applying mid-date/year-end selection rules.")
+    tariff_yearly = tariff_yearly.sort_values(["year", "hts8"]).reset_index(drop=True)
+
+    print(f"[Tariff] Completed annual panel with {len(tariff_yearly)} rows.")
+    return tariff_yearly
+
+
+def build_trade_long_tables_incremental(
+    config: Dict[str, object],
+    manifest: Dict[str, Any],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    增量版 build_trade_long_tables：DataWeb 长表缓存在 BUILD_DIR/dataweb/，
+    源文件内容与国家 ISO3 覆盖 / 手工映射均未变时直接读缓存。
+    """
+    build_dir: Path = config["BUILD_DIR"]  # type: ignore[assignment]
+    iso3_table: Optional[Path] = config.get("COUNTRY_ISO3_TABLE")  # type: ignore[assignment]
+    iso3_digest = country_iso3_digest(iso3_table)
+    recorded: Dict[str, Any] = manifest["sources"].setdefault("dataweb", {})
+    specs = [
+        ("export_fas", config["DATAWEB_EXPORT_XLSX"], "FAS Value"),
+        ("import_duty", config["DATAWEB_IMPORT_XLSX"], "General Import Charges"),
+    ]
+
+    tables: List[pd.DataFrame] = []
+    for metric_name, xlsx_path, sheet_name in specs:
+        xlsx_path = Path(xlsx_path)  # type: ignore[arg-type]
+        if not xlsx_path.exists():
+            raise FileNotFoundError(f"DataWeb file not found: {xlsx_path}")
+        cache_path = build_dir / "dataweb" / f"{metric_name}.pkl"
+        fp = source_fingerprint(xlsx_path, recorded.get(metric_name))
+        fp["iso3"] = iso3_digest
+        if _source_unchanged(recorded.get(metric_name), fp, cache_path):
+            print(f"[DataWeb] {xlsx_path.name} unchanged, using cache")
+            tables.append(pd.read_pickle(cache_path))
+            continue
+        long = read_dataweb_metric(xlsx_path, sheet_name=sheet_name, metric_name=metric_name, iso3_table=iso3_table)
+        _write_pickle(long, cache_path)
+        recorded[metric_name] = fp
+        tables.append(long)
+
+    return tables[0], tables[1]
+
+
+# ---------------------------------------------------------------------------
+# 8. 主入口
 # ---------------------------------------------------------------------------
 
 def main() -> None:
@@ -771,20 +1460,33 @@ def main() -> None:
     4. 合并关税与贸易
     5. 构建五题共用的派生数据
     6. 保存结果并做基础质量检查
+
+    INCREMENTAL_BUILD 为真时，关税年度切片与 DataWeb 长表按源文件内容哈希缓存在
+    BUILD_DIR，只重算变化的部分，内容未变的 CSV 不重写（见第 7 节）。
     """
     config = build_default_config()
 
     output_dir: Path = config["OUTPUT_DIR"]  # type: ignore[assignment]
     ensure_output_dir(output_dir)
 
+    incremental = bool(config.get("INCREMENTAL_BUILD", False))
+    build_dir: Path = config["BUILD_DIR"]  # type: ignore[assignment]
+    manifest = load_build_manifest(build_dir) if incremental else None
+
     # 1. 关税面板
-    tariff_yearly = build_tariff_yearly_panel(config)
+    if manifest is not None:
+        tariff_yearly = build_tariff_yearly_incremental(config, manifest)
+    else:
+        tariff_yearly = build_tariff_yearly_panel(config)
 
     # 2. HS2 / HS4 聚合
     tariff_hs2_panel, tariff_hs4_panel = build_tariff_aggregates(tariff_yearly)
 
     # 3. 贸易长表
-    exports_long, duties_long = build_trade_long_tables(config)
+    if manifest is not None:
+        exports_long, duties_long = build_trade_long_tables_incremental(config, manifest)
+    else:
+        exports_long, duties_long = build_trade_long_tables(config)
 
     # 4. 合并关税与贸易
     trade_export_panel, trade_duty_panel = merge_tariff_trade(
@@ -803,8 +1505,10 @@ def main() -> None:
     )
 
     # 6. 保存并检查
-    save_all_outputs(outputs, output_dir=output_dir)
+    save_all_outputs(outputs, output_dir=output_dir, manifest=manifest)
     run_basic_quality_checks(outputs, output_dir=output_dir)
+    if manifest is not None:
+        save_build_manifest(build_dir, manifest)
 
     print("[Done] All data cleaned and saved.")
 